@@ -4,22 +4,58 @@ import logging
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel, Field
 
 from ..core.config import get_settings
+from ..core.timing import TimedRoute, profile_call
+from ..models.animation import AnimationFrame, AnimationFramesResult
+from ..models.clusters import IntroductionAnalysisResult
+from ..models.dispersal import DispersalAnalysisResult
 from ..models.discrete import DiscreteAnalysisResult, DiscreteComparisonResult
-from ..models.tree import TreePayload
+from ..models.lineages import LineagesThroughTimeResult
+from ..models.topology import TopologyComparisonResult
+from ..models.traits import TraitPredicate, TraitQueryResult, TraitSummaryResult
+from ..models.tree import (
+    AncestryResult,
+    DescendantTipsResult,
+    MRCAResult,
+    NodeReference,
+    PatristicDistanceResult,
+    TreePayload,
+)
+from ..services.admission import AdmissionError, OverBudgetError, estimate_parse_bytes, get_admission_controller
+from ..services.columnar import get_columnar_tree
 from ..services.tree_parser import TreeParseError
-from ..services.tree_service import MCCTreeService
+from ..services.trait_index import get_trait_index
+from ..services.trait_summary import get_trait_summary
+from ..services.tree_index import TreeIndex, get_tree_index
+from ..services.tree_service import CachedTree, MCCTreeService
+from ..services.tree_transport import (
+    BINARY_TREE_MEDIA_TYPE,
+    encode_tree_binary,
+    encode_tree_json,
+    get_shared_tree_file,
+    get_tree_binary,
+)
+from ..services.clusters import get_introduction_cluster_service
+from ..services.dispersal import get_dispersal_analysis_service
 from ..services.discrete_analysis import get_discrete_analysis_service
 from ..services.comparison_service import get_tree_comparison_service
+from ..services.animation import animation_frames
+from ..services.hpd_regions import DEFAULT_TOLERANCE, hpd_geojson
+from ..services.map_features import DEFAULT_FEATURE_LIMIT, get_map_feature_service
+from ..services.map_tiles import MVT_MEDIA_TYPE, get_map_tile_service
+from ..services.lineages import get_lineage_index, lineages_through_time
+from ..services.single_flight import single_flight_stats
+from ..services.topology import get_topology_comparison_service
 from ..services.migration_matrix import build_migration_matrix
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/health")
@@ -27,6 +63,20 @@ def api_health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/stats/admission")
+def get_admission_stats() -> dict[str, int]:
+    """Running and queued heavy operations and the reserved memory estimate."""
+
+    return get_admission_controller().stats()
+
+
+@router.get("/stats/coalescing")
+def get_coalescing_stats() -> dict[str, dict[str, int]]:
+    """Executed and coalesced call counts of every single-flight group."""
+
+    return single_flight_stats()
+
+
 class DiscreteComparisonRequest(BaseModel):
     filenames: list[str] = Field(..., min_items=2, description="List of stored MCC tree filenames to compare.")
     labels: Optional[list[str]] = Field(
@@ -37,6 +87,54 @@ class DiscreteComparisonRequest(BaseModel):
         default=10,
         description="Number of most divergent paths to include; non-positive means return all.",
     )
+    significance: Optional[str] = Field(
+        default=None,
+        description="Optional resampling test for path differences: 'permutation' or 'bootstrap'.",
+    )
+    resamples: int = Field(default=1000, ge=1, description="Number of resamples for the significance test.")
+    seed: int = Field(default=0, description="Seed that makes the significance test reproducible.")
+    time_budget: float = Field(
+        default=10.0,
+        gt=0.0,
+        description="Seconds the significance test may spend before returning the resamples completed so far.",
+    )
+    confidence: float = Field(default=0.95, gt=0.0, lt=1.0, description="Confidence level for bootstrap intervals.")
+    reconstruction: Optional[str] = Field(
+        default=None,
+        description="Reconstruct unannotated node states with 'parsimony' or 'ml' before analysing.",
+    )
+
+
+class TopologyComparisonRequest(BaseModel):
+    filenames: list[str] = Field(..., min_items=2, description="List of stored MCC tree filenames to compare.")
+    labels: Optional[list[str]] = Field(
+        default=None,
+        description="Optional labels for each tree to make the distance matrix readable.",
+    )
+
+
+class TraitQueryRequest(BaseModel):
+    filename: Optional[str] = Field(default=None, description="Stored MCC tree filename; defaults to the configured tree.")
+    predicates: list[TraitPredicate] = Field(..., min_items=1, description="Conditions that nodes must satisfy.")
+    combine: str = Field(default="all", description="'all' to AND the predicates, 'any' to OR them.")
+    count_only: bool = Field(default=False, description="Return only the number of matching nodes.")
+    limit: Optional[int] = Field(default=None, ge=0, description="Maximum number of node ids to return.")
+
+
+class IntroductionRequest(BaseModel):
+    filename: Optional[str] = Field(default=None, description="Stored MCC tree filename; defaults to the configured tree.")
+    state: Optional[str] = Field(default=None, description="Location state to analyse; all states when omitted.")
+    threshold: float = Field(default=0.5, ge=0.0, le=1.0, description="Minimum best-state posterior for cluster membership.")
+    min_size: int = Field(default=1, ge=0, description="Drop clusters with fewer tips than this.")
+    reconstruction: Optional[str] = Field(
+        default=None,
+        description="Reconstruct unannotated node states with 'parsimony' or 'ml'.",
+    )
+
+
+class DispersalRequest(BaseModel):
+    filename: Optional[str] = Field(default=None, description="Stored MCC tree filename; defaults to the configured tree.")
+    points: int = Field(default=100, description="Number of evenly spaced times for the wavefront.")
 
 
 def _get_service(tree_path: Optional[str] = None) -> MCCTreeService:
@@ -45,11 +143,58 @@ def _get_service(tree_path: Optional[str] = None) -> MCCTreeService:
     return MCCTreeService()
 
 
+def _load_cached_tree(filename: Optional[str] = None) -> CachedTree:
+    try:
+        return _get_service().load_cached(filename)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except TreeParseError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _load_tree_index(filename: Optional[str] = None) -> TreeIndex:
+    try:
+        return get_tree_index(_load_cached_tree(filename))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _resolve_node(index: TreeIndex, reference: str) -> int:
+    try:
+        return index.resolve(reference)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0]) from exc
+
+
+def _node_reference(index: TreeIndex, position: int) -> NodeReference:
+    tree = index.tree
+    return NodeReference(
+        id=tree.ids[position],
+        label=tree.labels[position],
+        time_from_root=float(tree.time_from_root[position]),
+        time_before_present=float(tree.time_before_present[position]),
+    )
+
+
 @router.get("/tree", response_model=TreePayload)
-def get_tree(filename: Optional[str] = None) -> TreePayload:
+def get_tree(
+    filename: Optional[str] = None,
+    format: str = Query(default="json", description="'json' or 'binary' (columnar typed-array buffer)."),
+) -> TreePayload:
+    if format not in {"json", "binary"}:
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'binary'.")
     service = _get_service()
-    logger.info("GET /tree invoked", extra={"filename": filename})
+    logger.info("GET /tree invoked", extra={"filename": filename, "format": format})
     try:
+        # With the shared cache on, workers serve the encoded tree from disk without loading it.
+        if format == "binary":
+            shared_path = get_shared_tree_file(service.resolve_tree_path(filename), "tree_binary", encode_tree_binary)
+            if shared_path is not None:
+                return FileResponse(shared_path, media_type=BINARY_TREE_MEDIA_TYPE)
+            return Response(content=get_tree_binary(service.load_cached(filename)), media_type=BINARY_TREE_MEDIA_TYPE)
+        shared_path = get_shared_tree_file(service.resolve_tree_path(filename), "tree_json", encode_tree_json)
+        if shared_path is not None:
+            return FileResponse(shared_path, media_type="application/json")
         payload = service.load_tree(filename)
         logger.info(
             "Tree loaded",
@@ -66,12 +211,165 @@ def get_tree(filename: Optional[str] = None) -> TreePayload:
         raise HTTPException(status_code=422, detail=str(exc)) from exc
 
 
+@router.get("/tree/index/descendants", response_model=DescendantTipsResult)
+def get_descendant_tips(
+    node: str,
+    filename: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=0, description="Maximum number of tips to list."),
+) -> DescendantTipsResult:
+    index = _load_tree_index(filename)
+    position = _resolve_node(index, node)
+    tips = index.descendant_tips(position)
+    listed = tips if limit is None else tips[:limit]
+    return DescendantTipsResult(
+        node=_node_reference(index, position),
+        tip_count=int(tips.size),
+        tips=[_node_reference(index, tip) for tip in listed.tolist()],
+    )
+
+
+@router.get("/tree/index/mrca", response_model=MRCAResult)
+def get_mrca(
+    tips: list[str] = Query(..., description="Node ids or tip labels; repeat the parameter per tip."),
+    filename: Optional[str] = None,
+) -> MRCAResult:
+    index = _load_tree_index(filename)
+    mrca = index.mrca(_resolve_node(index, tip) for tip in tips)
+    return MRCAResult(mrca=_node_reference(index, mrca), tip_count=index.descendant_tip_count(mrca))
+
+
+@router.get("/tree/index/distance", response_model=PatristicDistanceResult)
+def get_patristic_distance(source: str, target: str, filename: Optional[str] = None) -> PatristicDistanceResult:
+    index = _load_tree_index(filename)
+    first = _resolve_node(index, source)
+    second = _resolve_node(index, target)
+    return PatristicDistanceResult(
+        source=_node_reference(index, first),
+        target=_node_reference(index, second),
+        mrca=_node_reference(index, index.lca(first, second)),
+        distance=index.patristic_distance(first, second),
+    )
+
+
+@router.get("/tree/index/ancestry", response_model=AncestryResult)
+def get_ancestry(ancestor: str, descendant: str, filename: Optional[str] = None) -> AncestryResult:
+    index = _load_tree_index(filename)
+    first = _resolve_node(index, ancestor)
+    second = _resolve_node(index, descendant)
+    return AncestryResult(
+        ancestor=_node_reference(index, first),
+        descendant=_node_reference(index, second),
+        is_ancestor=index.is_ancestor(first, second),
+    )
+
+
+@router.get("/tree/traits/summary", response_model=TraitSummaryResult)
+def get_traits_summary(
+    filename: Optional[str] = None,
+    limit: Optional[int] = Query(
+        default=50,
+        ge=0,
+        description="Maximum number of values listed per trait; 0 lists every value.",
+    ),
+) -> TraitSummaryResult:
+    summary = get_trait_summary(_load_cached_tree(filename))
+    if not limit:
+        return summary
+    return summary.copy(
+        update={"traits": [entry.copy(update={"values": entry.values[:limit]}) for entry in summary.traits]}
+    )
+
+
+@router.post("/tree/traits/query", response_model=TraitQueryResult)
+def query_traits(request: TraitQueryRequest) -> TraitQueryResult:
+    cached = _load_cached_tree(request.filename)
+    index = get_trait_index(cached)
+    try:
+        positions = index.query(request.predicates, combine=request.combine)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if request.count_only:
+        return TraitQueryResult(count=int(positions.size))
+    listed = positions if request.limit is None else positions[: request.limit]
+    ids = get_columnar_tree(cached).ids
+    return TraitQueryResult(
+        count=int(positions.size),
+        node_ids=[ids[position] for position in listed.tolist()],
+    )
+
+
+@router.get("/tree/lineages", response_model=LineagesThroughTimeResult)
+def get_lineages_through_time(
+    filename: Optional[str] = None,
+    points: int = Query(default=200, description="Number of evenly spaced grid times."),
+    start: Optional[float] = Query(default=None, description="First grid time (time from root); defaults to the root."),
+    end: Optional[float] = Query(default=None, description="Last grid time (time from root); defaults to the latest tip."),
+    times: Optional[list[float]] = Query(default=None, description="Explicit grid times; overrides points/start/end."),
+    by_state: bool = Query(default=True, description="Include per-location-state curves."),
+) -> LineagesThroughTimeResult:
+    index = get_lineage_index(_load_cached_tree(filename))
+    try:
+        return lineages_through_time(index, times=times, points=points, start=start, end=end, by_state=by_state)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/tree/animation/frame", response_model=AnimationFrame)
+def get_animation_frame(
+    time: float = Query(..., description="Frame time measured from the root."),
+    filename: Optional[str] = None,
+) -> AnimationFrame:
+    result = animation_frames(_load_cached_tree(filename), times=[time])
+    return JSONResponse(result.frames[0].dict())
+
+
+@router.get("/tree/animation/frames", response_model=AnimationFramesResult)
+def get_animation_frames(
+    filename: Optional[str] = None,
+    count: int = Query(default=100, description="Number of evenly spaced frames."),
+    start: Optional[float] = Query(default=None, description="First frame time; defaults to the earliest branch."),
+    end: Optional[float] = Query(default=None, description="Last frame time; defaults to the latest branch."),
+    times: Optional[list[float]] = Query(default=None, description="Explicit frame times; overrides count/start/end."),
+) -> AnimationFramesResult:
+    try:
+        result = animation_frames(_load_cached_tree(filename), times=times, count=count, start=start, end=end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Frames are built from validated arrays; skip re-validating every column.
+    return JSONResponse(result.dict())
+
+
+@router.get("/tree/hpd")
+def get_hpd_regions(
+    filename: Optional[str] = None,
+    level: Optional[str] = Query(default=None, description="HPD level such as '80'; defaults to the highest present."),
+    tolerance: float = Query(default=DEFAULT_TOLERANCE, description="Simplification tolerance in degrees."),
+    slices: int = Query(default=10, description="Number of time slices to merge regions into."),
+    merge: bool = Query(default=True, description="Merge regions per time slice instead of per node."),
+) -> JSONResponse:
+    cached = _load_cached_tree(filename)
+    try:
+        collection = hpd_geojson(cached, level=level, tolerance=tolerance, slices=slices, merge=merge)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return JSONResponse(collection, media_type="application/geo+json")
+
+
 @router.post("/tree/upload")
 async def upload_tree(file: UploadFile = File(...)) -> dict[str, str]:
     settings = get_settings()
-    target_path = settings.data_dir / file.filename
+    name = file.filename or ""
+    if name in {"", ".", ".."} or Path(name).name != name or "\\" in name:
+        raise HTTPException(status_code=400, detail="Upload filename must be a plain file name without directories.")
+    target_path = settings.data_dir / name
 
     contents = await file.read()
+    try:
+        # Reject trees that could never be parsed before they are stored.
+        get_admission_controller().check(estimate_parse_bytes(len(contents)), f"Parsing {file.filename}")
+    except OverBudgetError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     target_path.write_bytes(contents)
 
     return {"filename": file.filename, "stored_path": str(target_path)}
@@ -82,15 +380,8 @@ async def run_discrete_analysis(
     filename: Optional[str] = Form(None),
     top_k: Optional[int] = Form(10),
     support_file: Optional[UploadFile] = File(None),
+    reconstruction: Optional[str] = Form(None),
 ) -> DiscreteAnalysisResult:
-    service = _get_service()
-    try:
-        payload = service.load_tree(filename)
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=404, detail=str(exc)) from exc
-    except TreeParseError as exc:
-        raise HTTPException(status_code=422, detail=str(exc)) from exc
-
     support_text = None
     if support_file is not None:
         try:
@@ -104,18 +395,46 @@ async def run_discrete_analysis(
     except (TypeError, ValueError) as exc:
         raise HTTPException(status_code=400, detail="top_k must be an integer") from exc
 
-    analysis_service = get_discrete_analysis_service()
+    def analyse() -> DiscreteAnalysisResult:
+        # Parsing and analysis run in the threadpool so the event loop stays free.
+        cached = _load_cached_tree(filename)
+        try:
+            return get_discrete_analysis_service().analyse_tree(
+                cached,
+                support_table=support_text,
+                top_k=resolved_top_k,
+                reconstruction=reconstruction or None,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return await run_in_threadpool(profile_call, analyse)
+
+
+@router.post("/analysis/introductions", response_model=IntroductionAnalysisResult)
+def detect_introductions(request: IntroductionRequest) -> IntroductionAnalysisResult:
+    cached = _load_cached_tree(request.filename)
     try:
-        return analysis_service.run_analysis(
-            nodes=list(payload.nodes),
-            edges=list(payload.edges),
-            support_table=support_text,
-            top_k=resolved_top_k,
+        return get_introduction_cluster_service().detect(
+            cached,
+            state=request.state,
+            threshold=request.threshold,
+            min_size=request.min_size,
+            reconstruction=request.reconstruction,
         )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@router.post("/analysis/dispersal", response_model=DispersalAnalysisResult)
+def analyse_dispersal(request: DispersalRequest) -> DispersalAnalysisResult:
+    cached = _load_cached_tree(request.filename)
+    try:
+        return get_dispersal_analysis_service().analyse(cached, points=request.points)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.get("/analysis/discrete/{analysis_id}/{artifact}")
 def download_discrete_artifact(analysis_id: str, artifact: str) -> FileResponse:
     settings = get_settings()
@@ -123,7 +442,10 @@ def download_discrete_artifact(analysis_id: str, artifact: str) -> FileResponse:
         "nodes.csv": "text/csv",
         "edges.csv": "text/csv",
         "map.geojson": "application/geo+json",
+        "arcs.geojson": "application/geo+json",
         "summary.md": "text/markdown",
+        "clusters.csv": "text/csv",
+        "dispersal.csv": "text/csv",
     }
     if artifact not in allowed:
         raise HTTPException(status_code=404, detail="Unknown analysis artefact.")
@@ -135,9 +457,38 @@ def download_discrete_artifact(analysis_id: str, artifact: str) -> FileResponse:
     return FileResponse(path, media_type=allowed[artifact], filename=artifact)
 
 
+@router.get("/map/features")
+def get_map_features(
+    analysis_id: str = Query(..., description="Discrete analysis whose map.geojson is queried."),
+    bbox: Optional[str] = Query(default=None, description="Viewport as 'west,south,east,north' in degrees."),
+    zoom: Optional[float] = Query(default=None, description="Map zoom; drops sub-pixel lines and rounds coordinates."),
+    min_weight: float = Query(default=0.0, description="Skip features lighter than this weight."),
+    limit: Optional[int] = Query(default=DEFAULT_FEATURE_LIMIT, description="Maximum number of features, heaviest first."),
+) -> JSONResponse:
+    try:
+        collection = get_map_feature_service().features(
+            analysis_id, bbox=bbox, zoom=zoom, min_weight=min_weight, limit=limit
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return JSONResponse(collection, media_type="application/geo+json")
+
+
+@router.get("/map/tiles/{analysis_id}/{z}/{x}/{y}.mvt")
+def get_map_tile(analysis_id: str, z: int, x: int, y: int) -> Response:
+    try:
+        data = get_map_tile_service().tile(analysis_id, z, x, y)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return Response(content=data, media_type=MVT_MEDIA_TYPE, headers={"Cache-Control": "public, max-age=3600"})
+
+
 @router.post("/analysis/discrete/compare", response_model=DiscreteComparisonResult)
-async def compare_discrete_trees(request: DiscreteComparisonRequest) -> DiscreteComparisonResult:
-    service = _get_service()
+def compare_discrete_trees(request: DiscreteComparisonRequest) -> DiscreteComparisonResult:
     analysis_service = get_discrete_analysis_service()
     comparison_service = get_tree_comparison_service()
 
@@ -154,23 +505,26 @@ async def compare_discrete_trees(request: DiscreteComparisonRequest) -> Discrete
         raise HTTPException(status_code=400, detail="top_k must be an integer") from exc
 
     labelled_results: list[tuple[str, DiscreteAnalysisResult]] = []
+    branch_weights: list[list[dict[tuple[str, str], float]]] = []
     for index, filename in enumerate(filenames):
+        cached = _load_cached_tree(filename)
+        payload = cached.payload
         try:
-            payload = service.load_tree(filename)
-        except FileNotFoundError as exc:
-            raise HTTPException(status_code=404, detail=str(exc)) from exc
-        except TreeParseError as exc:
-            raise HTTPException(status_code=422, detail=str(exc)) from exc
-
-        try:
-            analysis_result = analysis_service.run_analysis(
-                nodes=list(payload.nodes),
-                edges=list(payload.edges),
+            analysis_result = analysis_service.analyse_tree(
+                cached,
                 top_k=resolved_top_k,
+                reconstruction=request.reconstruction,
             )
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+        if request.significance:
+            branch_weights.append(
+                analysis_service.branch_transition_weights(
+                    list(payload.nodes), list(payload.edges), reconstruction=request.reconstruction
+                )
+            )
+
         if request.labels:
             label = request.labels[index]
         else:
@@ -178,15 +532,66 @@ async def compare_discrete_trees(request: DiscreteComparisonRequest) -> Discrete
         labelled_results.append((label, analysis_result))
 
     try:
-        return comparison_service.compare(labelled_results, top_k=resolved_top_k)
+        comparison = comparison_service.compare(labelled_results, top_k=resolved_top_k)
+        if request.significance:
+            # The resampler pulls in shared memory and a process pool; load it on first use.
+            from ..services.significance import get_path_significance_service  # noqa: PLC0415
+
+            get_path_significance_service().annotate(
+                comparison,
+                branch_weights,
+                method=request.significance,
+                resamples=request.resamples,
+                seed=request.seed,
+                time_budget=request.time_budget,
+                confidence=request.confidence,
+            )
+        return comparison
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@router.post("/analysis/topology/compare", response_model=TopologyComparisonResult)
+def compare_tree_topologies(request: TopologyComparisonRequest) -> TopologyComparisonResult:
+    service = _get_service()
+    topology_service = get_topology_comparison_service()
+
+    if request.labels and len(request.labels) != len(request.filenames):
+        raise HTTPException(status_code=400, detail="labels length must match filenames length.")
+
+    tables = []
+    for filename in request.filenames:
+        try:
+            tables.append(topology_service.clade_table(service.resolve_tree_path(filename)))
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except TreeParseError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    try:
+        result = topology_service.compare(tables, labels=request.labels)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Returning the response directly skips re-validating N x N matrices.
+    return JSONResponse(result.dict())
+
+
 @router.get("/analysis/migration/matrix")
-def get_migration_matrix(filename: Optional[str] = None) -> dict[str, object]:
+def get_migration_matrix(
+    filename: Optional[str] = None,
+    reconstruction: Optional[str] = Query(
+        default=None,
+        description="Reconstruct unannotated node states with 'parsimony' or 'ml'.",
+    ),
+) -> dict[str, object]:
     try:
-        matrix = build_migration_matrix(filename)
+        matrix = build_migration_matrix(filename, reconstruction=reconstruction)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except AdmissionError:
+        raise
     except Exception as exc:  # pragma: no cover - defensive catch
         logger.exception("Failed to build migration matrix")
         raise HTTPException(status_code=500, detail=f"Unable to build migration matrix: {exc}") from exc
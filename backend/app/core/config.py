@@ -16,6 +16,61 @@ class Settings(BaseSettings):
         env="LOCALPHYLOGEO_TREE_PATH",
         description="Path to the default MCC tree file to load on startup.",
     )
+    tree_cache_size: int = Field(
+        default=8,
+        env="LOCALPHYLOGEO_TREE_CACHE_SIZE",
+        description="Number of parsed trees (with their derived indexes) kept in memory.",
+    )
+    warmup: bool = Field(
+        default=False,
+        env="LOCALPHYLOGEO_WARMUP",
+        description="Pre-parse the default and recently used trees in a background thread on startup.",
+    )
+    warmup_recent: int = Field(
+        default=4,
+        env="LOCALPHYLOGEO_WARMUP_RECENT",
+        description="Number of most recently modified trees in the data directory to pre-parse.",
+    )
+    watch_interval: float = Field(
+        default=2.0,
+        env="LOCALPHYLOGEO_WATCH_INTERVAL",
+        description="Seconds between scans of the data directory for new or replaced trees; 0 disables watching.",
+    )
+    shared_cache: bool = Field(
+        default=False,
+        env="LOCALPHYLOGEO_SHARED_CACHE",
+        description="Share parsed trees and their array columns between worker processes through an on-disk cache.",
+    )
+    shared_cache_dir: Optional[Path] = Field(
+        default=None,
+        env="LOCALPHYLOGEO_SHARED_CACHE_DIR",
+        description="Directory of the shared cache; defaults to a per-data-directory folder under ~/.cache/maple.",
+    )
+    shared_cache_max_mb: float = Field(
+        default=1024.0,
+        env="LOCALPHYLOGEO_SHARED_CACHE_MAX_MB",
+        description="Size budget of the shared cache before least recently used entries are pruned.",
+    )
+    max_concurrent_jobs: int = Field(
+        default=4,
+        env="LOCALPHYLOGEO_MAX_CONCURRENT_JOBS",
+        description="Tree parses and analyses allowed to run at once; further requests queue.",
+    )
+    memory_budget_mb: float = Field(
+        default=2048.0,
+        env="LOCALPHYLOGEO_MEMORY_BUDGET_MB",
+        description="Estimated memory that concurrent parses and analyses may reserve; 0 disables the check.",
+    )
+    admission_timeout: float = Field(
+        default=30.0,
+        env="LOCALPHYLOGEO_ADMISSION_TIMEOUT",
+        description="Seconds a queued parse or analysis waits for capacity before the request gets a 503.",
+    )
+    significance_workers: Optional[int] = Field(
+        default=None,
+        env="LOCALPHYLOGEO_SIGNIFICANCE_WORKERS",
+        description="Process pool size for comparison resampling; defaults to the CPU count.",
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,272 @@
+"""Per-request timing spans, ``Server-Timing`` headers and opt-in profiling.
+
+Code marks hot stages with ``with span("phylo_parse"):``. While a request is
+being served, :class:`TimingMiddleware` collects these spans (summing repeats),
+reports them in a ``Server-Timing`` header and logs them as one structured
+record. Outside a request (warm-up thread, scripts) spans cost only a clock
+read.
+
+Adding ``?profile=1`` to any API request replaces its response with a plain
+text cProfile report. Sync endpoints are profiled in their worker thread; the
+event-loop part of the route (request parsing, serialization) is profiled
+separately and merged into the same report.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional, TypeVar
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILE_PARAM = "profile"
+PROFILE_TOP_FUNCTIONS = 40
+
+
+class SpanRecorder:
+    """Accumulated durations of the spans of one request."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: dict[str, list[float]] = {}
+        self.endpoint_finished: Optional[float] = None
+        self.route: Optional[str] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def as_dict(self) -> dict[str, float]:
+        with self._lock:
+            return {name: round(total * 1000.0, 3) for name, (total, _) in self.spans.items()}
+
+    def header(self, total: float) -> str:
+        with self._lock:
+            entries = [
+                f"{name};dur={seconds * 1000.0:.1f}" + (f';desc="{count} calls"' if count > 1 else "")
+                for name, (seconds, count) in self.spans.items()
+            ]
+        entries.append(f"total;dur={total * 1000.0:.1f}")
+        return ", ".join(entries)
+
+
+class ProfileSession:
+    """cProfile runs of one request, one profiler per thread that did work."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: list[cProfile.Profile] = []
+
+    def new(self) -> cProfile.Profile:
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profiler)
+        return profiler
+
+    def report(self, status: int, recorder: SpanRecorder, total: float) -> str:
+        stream = io.StringIO()
+        stream.write(f"status: {status}\ntotal: {total * 1000.0:.1f} ms\n")
+        for name, duration in recorder.as_dict().items():
+            stream.write(f"  {name}: {duration:.1f} ms\n")
+        stream.write("\n")
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            stream.write("No profile was recorded for this request.\n")
+            return stream.getvalue()
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return stream.getvalue()
+
+
+_recorder: ContextVar[Optional[SpanRecorder]] = ContextVar("maple_span_recorder", default=None)
+_profile_session: ContextVar[Optional[ProfileSession]] = ContextVar("maple_profile_session", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as ``name`` in the current request, if any."""
+
+    recorder = _recorder.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorder is not None:
+            recorder.add(name, time.perf_counter() - started)
+
+
+def profile_call(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call ``fn``, under a fresh profiler when the current request is profiled.
+
+    Use it for work handed to another thread (``run_in_threadpool``), which
+    the request's other profilers do not see.
+    """
+
+    session = _profile_session.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    profiler = session.new()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+
+
+class TimedRoute(APIRoute):
+    """Route class that records ``endpoint`` and ``serialize`` spans and supports profiling."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+        if call is None:
+            return
+        # The wrapper must stay sync or async like the endpoint, since FastAPI
+        # decides from it whether to run the endpoint in the threadpool.
+        if asyncio.iscoroutinefunction(call):
+
+            @wraps(call)
+            async def timed_call(**values: Any) -> Any:
+                try:
+                    with span("endpoint"):
+                        return await call(**values)
+                finally:
+                    _mark_endpoint_finished()
+
+        else:
+
+            @wraps(call)
+            def timed_call(**values: Any) -> Any:
+                try:
+                    with span("endpoint"):
+                        return profile_call(call, **values)
+                finally:
+                    _mark_endpoint_finished()
+
+        self.dependant.call = timed_call
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Any) -> Any:
+            recorder = _recorder.get()
+            if recorder is not None:
+                # The path template keeps metric labels bounded (no ids or tile coordinates).
+                recorder.route = self.path_format
+            session = _profile_session.get()
+            profiler = session.new() if session is not None else None
+            if profiler is not None:
+                profiler.enable()
+            try:
+                return await handler(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                if recorder is not None and recorder.endpoint_finished is not None:
+                    recorder.add("serialize", time.perf_counter() - recorder.endpoint_finished)
+
+        return timed_handler
+
+
+def _mark_endpoint_finished() -> None:
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.endpoint_finished = time.perf_counter()
+
+
+def _wants_profile(scope: Scope) -> bool:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(PROFILE_PARAM, [])
+    return any(value.lower() in {"1", "true", "yes"} for value in values)
+
+
+class TimingMiddleware:
+    """ASGI middleware that collects spans and emits ``Server-Timing`` and a log record."""
+
+    def __init__(self, app: ASGIApp, log_prefix: str = "/api") -> None:
+        self.app = app
+        self.log_prefix = log_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recorder = SpanRecorder()
+        session = ProfileSession() if _wants_profile(scope) else None
+        recorder_token = _recorder.set(recorder)
+        session_token = _profile_session.set(session)
+        started = time.perf_counter()
+        status = 500
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if session is None:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", recorder.header(time.perf_counter() - started)
+                    )
+            if session is None:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _recorder.reset(recorder_token)
+            _profile_session.reset(session_token)
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            if recorder.route is not None:
+                REQUEST_LATENCY.observe(
+                    elapsed, method=scope.get("method", ""), route=recorder.route, status=str(status)
+                )
+            if scope.get("path", "").startswith(self.log_prefix):
+                logger.info(
+                    "Request timing",
+                    extra={
+                        "method": scope.get("method"),
+                        "path": scope.get("path"),
+                        "status": status,
+                        "duration_ms": round(elapsed * 1000.0, 3),
+                        "spans": recorder.as_dict(),
+                    },
+                )
+
+        if session is not None:
+            body = session.report(status, recorder, elapsed).encode("utf-8")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/plain; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode("latin-1")),
+                        (b"server-timing", recorder.header(elapsed).encode("latin-1")),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
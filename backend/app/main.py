@@ -2,17 +2,40 @@ from __future__ import annotations
 
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from .api.routes import router
 from .core.config import get_settings
+from .core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from .core.timing import TimingMiddleware
+from .services.admission import OverBudgetError, ServerBusyError
 
-app = FastAPI(title="LocalPhylogeo", version="0.1.0")
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    warmer = None
+    if get_settings().warmup:
+        # Imported lazily: the warm-up pulls in the analysis stack.
+        from .services.warmup import get_tree_warmer  # noqa: PLC0415
+
+        warmer = get_tree_warmer()
+        warmer.start()
+    try:
+        yield
+    finally:
+        if warmer is not None:
+            warmer.stop()
+
+
+app = FastAPI(title="LocalPhylogeo", version="0.1.0", lifespan=lifespan)
+
+app.add_middleware(TimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -23,10 +46,33 @@ app.add_middleware(
 
 app.include_router(router, prefix="/api")
 
+
+@app.exception_handler(OverBudgetError)
+async def over_budget_handler(_request: Request, exc: OverBudgetError) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(ServerBusyError)
+async def server_busy_handler(_request: Request, exc: ServerBusyError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    # Registers the scrape-time gauges on first use.
+    from .services import runtime_metrics  # noqa: F401, PLC0415
+
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Serve the frontend assets so the tool runs as a single package.
 settings = get_settings()
 
@@ -0,0 +1,26 @@
+"""Data models for time-resolved spread animation frames."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class AnimationFrame(BaseModel):
+    """Lineages in flight at one time, stored column-wise to keep frames compact."""
+
+    time_from_root: float = Field(..., description="Frame time measured from the root.")
+    node_ids: list[str] = Field(default_factory=list, description="Child node of every active branch.")
+    parent_ids: list[str] = Field(default_factory=list, description="Parent node of every active branch.")
+    states: list[str] = Field(default_factory=list, description="Inferred location state of each branch's child.")
+    progress: list[float] = Field(default_factory=list, description="Fraction of each branch elapsed at the frame time.")
+    latitude: list[float] = Field(default_factory=list, description="Interpolated latitude of each active lineage.")
+    longitude: list[float] = Field(default_factory=list, description="Interpolated longitude of each active lineage.")
+
+
+class AnimationFramesResult(BaseModel):
+    branch_count: int = Field(..., ge=0, description="Branches whose parent and child both carry coordinates.")
+    start: Optional[float] = Field(default=None, description="Earliest branch start (time from root).")
+    end: Optional[float] = Field(default=None, description="Latest branch end (time from root).")
+    frames: list[AnimationFrame] = Field(default_factory=list)
@@ -0,0 +1,42 @@
+"""Data models for introduction (transmission cluster) detection."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class IntroductionCluster(BaseModel):
+    """A maximal subtree whose nodes are all confidently assigned to one state."""
+
+    cluster_id: int = Field(..., ge=1, description="1-based cluster number, ordered by tMRCA.")
+    state: str = Field(..., description="Location state shared by every node of the cluster.")
+    source_state: Optional[str] = Field(
+        default=None,
+        description="Best state of the parent of the cluster MRCA (absent when the cluster starts at the root).",
+    )
+    source_probability: Optional[float] = Field(default=None, description="Posterior of the source state.")
+    mrca_id: str = Field(..., description="Identifier of the node founding the cluster.")
+    mrca_probability: float = Field(..., description="Posterior of the cluster state at the MRCA.")
+    tmrca_from_root: float = Field(..., description="Time of the cluster MRCA measured from the root.")
+    tmrca_before_present: float = Field(..., description="Time of the cluster MRCA before the most recent tip.")
+    tmrca_year: Optional[float] = Field(default=None, description="Calendar year of the MRCA when dates are known.")
+    tip_count: int = Field(..., ge=0, description="Number of sampled tips in the cluster.")
+    node_count: int = Field(..., ge=1, description="Number of nodes (tips and internal) in the cluster.")
+
+
+class StateIntroductionSummary(BaseModel):
+    state: str
+    introductions: int = Field(..., ge=0, description="Number of independent introductions into the state.")
+    tips: int = Field(..., ge=0, description="Tips belonging to any introduction of the state.")
+    largest_cluster: int = Field(..., ge=0, description="Tip count of the largest cluster.")
+    singletons: int = Field(..., ge=0, description="Clusters made of a single tip.")
+
+
+class IntroductionAnalysisResult(BaseModel):
+    analysis_id: str = Field(..., description="Identifier of the persisted clusters.csv artefact.")
+    threshold: float = Field(..., description="Minimum best-state posterior for a node to join a cluster.")
+    summaries: list[StateIntroductionSummary] = Field(default_factory=list)
+    clusters: list[IntroductionCluster] = Field(default_factory=list)
+    exports: dict[str, str] = Field(default_factory=dict)
@@ -113,6 +113,20 @@ class PathDifference(BaseModel):
         default=None,
         description="Label of the tree with the largest contribution for this path.",
     )
+    p_value: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Permutation p-value for the observed delta (when significance testing was requested).",
+    )
+    ci_low: Optional[float] = Field(
+        default=None,
+        description="Lower bootstrap confidence bound for delta (when significance testing was requested).",
+    )
+    ci_high: Optional[float] = Field(
+        default=None,
+        description="Upper bootstrap confidence bound for delta (when significance testing was requested).",
+    )
 
 
 class DiscreteAnalysisResult(BaseModel):
@@ -160,6 +174,25 @@ class TreeComparisonSummary(BaseModel):
     )
 
 
+class SignificanceSummary(BaseModel):
+    """Bookkeeping for the resampling test attached to a comparison."""
+
+    method: str = Field(..., description="Resampling scheme used: 'permutation' or 'bootstrap'.")
+    resamples_requested: int = Field(..., ge=0, description="Number of resamples asked for.")
+    resamples_completed: int = Field(
+        ...,
+        ge=0,
+        description="Number of resamples actually evaluated before the time budget ran out.",
+    )
+    seed: int = Field(..., description="Seed that makes the resampling reproducible.")
+    confidence: float = Field(..., gt=0.0, lt=1.0, description="Confidence level of bootstrap intervals.")
+    elapsed_seconds: float = Field(default=0.0, ge=0.0, description="Wall-clock time spent resampling.")
+    truncated: bool = Field(
+        default=False,
+        description="True when the time budget stopped resampling before all resamples completed.",
+    )
+
+
 class DiscreteComparisonResult(BaseModel):
     """Response structure for multi-tree discrete comparison."""
 
@@ -171,3 +204,7 @@ class DiscreteComparisonResult(BaseModel):
         default_factory=list,
         description="Top migration paths whose support differs between trees.",
     )
+    significance: Optional[SignificanceSummary] = Field(
+        default=None,
+        description="Details of the optional resampling test behind p-values and intervals.",
+    )
@@ -0,0 +1,50 @@
+"""Data models for continuous-phylogeography dispersal statistics."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DispersalSummary(BaseModel):
+    """Branch-level dispersal statistics aggregated over the tree.
+
+    Distances are great-circle kilometres; durations use the tree's time unit.
+    """
+
+    branch_count: int = Field(..., ge=0, description="Branches whose parent and child both carry coordinates.")
+    total_distance_km: float = Field(default=0.0, description="Summed great-circle length of all branches.")
+    total_duration: float = Field(default=0.0, description="Summed duration of all branches.")
+    mean_velocity: Optional[float] = Field(default=None, description="Mean of per-branch distance / duration.")
+    weighted_velocity: Optional[float] = Field(default=None, description="Total distance divided by total duration.")
+    mean_diffusion_coefficient: Optional[float] = Field(
+        default=None,
+        description="Mean of per-branch distance^2 / (4 * duration).",
+    )
+    weighted_diffusion_coefficient: Optional[float] = Field(
+        default=None,
+        description="Summed distance^2 divided by 4 * total duration.",
+    )
+
+
+class WavefrontSeries(BaseModel):
+    """Distance of the furthest lineage from the root location through time."""
+
+    time_from_root: list[float] = Field(default_factory=list)
+    time_before_present: list[float] = Field(default_factory=list)
+    max_distance_km: list[Optional[float]] = Field(
+        default_factory=list,
+        description="Furthest distance from the root among lineages in flight at each time.",
+    )
+    wavefront_km: list[float] = Field(
+        default_factory=list,
+        description="Running maximum of max_distance_km: the furthest extent reached so far.",
+    )
+
+
+class DispersalAnalysisResult(BaseModel):
+    analysis_id: str = Field(..., description="Identifier of the persisted dispersal.csv artefact.")
+    summary: DispersalSummary
+    wavefront: WavefrontSeries
+    exports: dict[str, str] = Field(default_factory=dict)
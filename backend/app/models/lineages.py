@@ -0,0 +1,20 @@
+"""Data models for lineages-through-time curves."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class LineagesThroughTimeResult(BaseModel):
+    """Lineage counts sampled on a time grid."""
+
+    time_from_root: list[float] = Field(default_factory=list, description="Grid times measured from the root.")
+    time_before_present: list[float] = Field(
+        default_factory=list,
+        description="The same grid expressed as time before the most recent tip.",
+    )
+    lineages: list[int] = Field(default_factory=list, description="Number of lineages alive at each grid time.")
+    by_state: dict[str, list[int]] = Field(
+        default_factory=dict,
+        description="Lineage counts per inferred location state (branches take their child's state).",
+    )
@@ -0,0 +1,28 @@
+"""Data models for topological tree comparisons."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class TopologyComparisonResult(BaseModel):
+    """Pairwise Robinson–Foulds distances between several MCC trees."""
+
+    labels: list[str] = Field(..., description="Tree labels in matrix row/column order.")
+    tip_count: int = Field(..., ge=0, description="Number of tips shared by every compared tree.")
+    clade_counts: list[int] = Field(
+        default_factory=list,
+        description="Number of non-trivial clades (excluding tips and the root) per tree.",
+    )
+    robinson_foulds: list[list[int]] = Field(
+        default_factory=list,
+        description="Symmetric difference of the clade sets for every pair of trees.",
+    )
+    normalized_robinson_foulds: list[list[float]] = Field(
+        default_factory=list,
+        description="Robinson–Foulds distance divided by the combined non-trivial clade count.",
+    )
+    weighted_robinson_foulds: list[list[float]] = Field(
+        default_factory=list,
+        description="Sum of absolute branch-length differences over the union of clades.",
+    )
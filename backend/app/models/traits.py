@@ -0,0 +1,67 @@
+"""Data models for server-side trait queries."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TraitPredicate(BaseModel):
+    """Single condition on a node trait."""
+
+    trait: str = Field(..., description="Trait key as annotated in the MCC tree, e.g. 'location'.")
+    op: str = Field(
+        default="eq",
+        description="One of eq, ne, in, not_in, lt, le, gt, ge, between, exists.",
+    )
+    value: Any = Field(
+        default=None,
+        description="Comparison value; a list for 'in'/'not_in' and [low, high] for 'between'.",
+    )
+
+
+class TraitQueryResult(BaseModel):
+    """Nodes matching a trait query."""
+
+    count: int = Field(..., ge=0, description="Number of matching nodes.")
+    node_ids: Optional[list[str]] = Field(
+        default=None,
+        description="Matching node ids in tree order (omitted for count-only queries).",
+    )
+
+
+class NumericTraitSummary(BaseModel):
+    """Distribution summary of a numeric trait."""
+
+    count: int = Field(..., ge=0, description="Number of finite values observed.")
+    minimum: float
+    maximum: float
+    mean: float
+    quantiles: dict[str, float] = Field(
+        default_factory=dict,
+        description="Quantiles keyed by probability, e.g. '0.5' for the median.",
+    )
+    histogram_edges: list[float] = Field(default_factory=list, description="Bin edges of the histogram.")
+    histogram_counts: list[int] = Field(default_factory=list, description="Number of values per histogram bin.")
+
+
+class TraitSummaryEntry(BaseModel):
+    """Frequency card for one trait."""
+
+    trait: str
+    kind: str = Field(..., description="'categorical' or 'numeric'.")
+    total: int = Field(..., ge=0, description="Number of observed values (list traits count each element).")
+    distinct: int = Field(..., ge=0, description="Number of distinct values.")
+    values: list[tuple[str, int]] = Field(
+        default_factory=list,
+        description="Value (or histogram bin) labels with counts, most frequent first.",
+    )
+    numeric: Optional[NumericTraitSummary] = None
+
+
+class TraitSummaryResult(BaseModel):
+    """Trait summary cards for a whole tree."""
+
+    node_count: int = Field(..., ge=0)
+    traits: list[TraitSummaryEntry] = Field(default_factory=list, description="Traits ordered by total, descending.")
@@ -30,3 +30,34 @@ class TreePayload(BaseModel):
     nodes: List[TreeNode]
     edges: List[TreeEdge]
     metadata: TreeMetadata
+
+
+class NodeReference(BaseModel):
+    id: str
+    label: Optional[str] = None
+    time_from_root: Optional[float] = None
+    time_before_present: Optional[float] = None
+
+
+class DescendantTipsResult(BaseModel):
+    node: NodeReference
+    tip_count: int = Field(..., ge=0, description="Number of tips below the node.")
+    tips: List[NodeReference] = Field(default_factory=list, description="Tips below the node in preorder.")
+
+
+class MRCAResult(BaseModel):
+    mrca: NodeReference
+    tip_count: int = Field(..., ge=0, description="Number of tips descending from the MRCA.")
+
+
+class PatristicDistanceResult(BaseModel):
+    source: NodeReference
+    target: NodeReference
+    mrca: NodeReference
+    distance: float = Field(..., description="Summed branch length along the path joining the two nodes.")
+
+
+class AncestryResult(BaseModel):
+    ancestor: NodeReference
+    descendant: NodeReference
+    is_ancestor: bool
@@ -0,0 +1,153 @@
+"""Admission control for memory-heavy work (tree parses and analyses).
+
+Every heavy operation declares an estimated memory cost before it runs. The
+controller admits it once both a concurrency slot and enough of the memory
+budget are free, queueing it otherwise. A request whose estimate alone
+exceeds the budget can never run and is rejected with
+:class:`OverBudgetError` (HTTP 413). One that waits longer than the queue
+timeout gets :class:`ServerBusyError` (HTTP 503) so the client can retry
+instead of the server running out of memory.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator
+
+from ..core.config import get_settings
+from ..core.timing import span
+
+# Parsed payloads (Pydantic nodes plus trait dicts) measure ~14x the NEXUS
+# file size; the factor leaves headroom for the parser's transient objects.
+PARSE_BYTES_PER_FILE_BYTE = 16
+# Discrete analysis keeps a few dicts per node and a distribution entry per
+# node and state.
+ANALYSIS_BYTES_PER_NODE = 512
+ANALYSIS_BYTES_PER_NODE_STATE = 256
+
+
+class AdmissionError(RuntimeError):
+    """Base class of admission failures."""
+
+
+class OverBudgetError(AdmissionError):
+    """Raised when an operation's estimate exceeds the whole memory budget."""
+
+
+class ServerBusyError(AdmissionError):
+    """Raised when an operation could not be admitted within the queue timeout."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_parse_bytes(file_size: int) -> int:
+    return int(file_size) * PARSE_BYTES_PER_FILE_BYTE
+
+
+def estimate_analysis_bytes(node_count: int, state_count: int) -> int:
+    return node_count * (ANALYSIS_BYTES_PER_NODE + ANALYSIS_BYTES_PER_NODE_STATE * max(state_count, 1))
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.0f} MB"
+
+
+class AdmissionController:
+    """Bounded-concurrency, memory-budgeted gate shared by all heavy operations.
+
+    Waiters are admitted in arrival order, so a large job queued behind small
+    ones is not starved by later small jobs. A ``memory_budget`` of ``0``
+    disables the memory check.
+    """
+
+    def __init__(self, max_concurrent: int, memory_budget: int, queue_timeout: float) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.memory_budget = max(0, memory_budget)
+        self.queue_timeout = max(0.0, queue_timeout)
+        self._condition = threading.Condition()
+        self._running = 0
+        self._reserved = 0
+        self._queue: list[object] = []
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def check(self, estimate: int, operation: str) -> None:
+        """Raise :class:`OverBudgetError` if ``estimate`` could never be admitted."""
+
+        if self.memory_budget and estimate > self.memory_budget:
+            with self._condition:
+                self.rejected += 1
+            raise OverBudgetError(
+                f"{operation} needs an estimated {_megabytes(estimate)}, more than the"
+                f" server's {_megabytes(self.memory_budget)} memory budget."
+            )
+
+    def _fits(self, ticket: object, estimate: int) -> bool:
+        return (
+            self._queue[0] is ticket
+            and self._running < self.max_concurrent
+            and (not self.memory_budget or self._reserved + estimate <= self.memory_budget)
+        )
+
+    @contextmanager
+    def admit(self, estimate: int, operation: str) -> Iterator[None]:
+        """Hold a concurrency slot and ``estimate`` bytes of budget for the block."""
+
+        self.check(estimate, operation)
+        ticket = object()
+        deadline = time.monotonic() + self.queue_timeout
+        with span("admission_wait"), self._condition:
+            self._queue.append(ticket)
+            try:
+                while not self._fits(ticket, estimate):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise ServerBusyError(
+                            f"Server is busy; {operation} could not start within {self.queue_timeout:g} s.",
+                            retry_after=max(1, int(self.queue_timeout)),
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._queue.remove(ticket)
+                # The head may have changed; let the next waiter re-check.
+                self._condition.notify_all()
+            self._running += 1
+            self._reserved += estimate
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._reserved -= estimate
+                self._condition.notify_all()
+
+    def stats(self) -> dict[str, int]:
+        with self._condition:
+            return {
+                "running": self._running,
+                "queued": len(self._queue),
+                "reserved_bytes": self._reserved,
+                "budget_bytes": self.memory_budget,
+                "max_concurrent": self.max_concurrent,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_concurrent=settings.max_concurrent_jobs,
+        memory_budget=int(settings.memory_budget_mb * 1024 * 1024),
+        queue_timeout=settings.admission_timeout,
+    )
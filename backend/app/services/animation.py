@@ -0,0 +1,183 @@
+"""Branch interval index for animating geographic spread through time."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..models.animation import AnimationFrame, AnimationFramesResult
+from .columnar import get_columnar_tree, get_trait_columns
+from .discrete_analysis import LATITUDE_KEYS, LONGITUDE_KEYS, DiscreteAnalysisService
+from .node_states import get_node_states
+from .tree_service import CachedTree
+
+MAX_FRAMES = 2000
+
+
+@dataclass(frozen=True)
+class DurationBucket:
+    """Branches of similar duration sorted by start time.
+
+    A branch active at ``t`` starts in ``[t - max_duration, t]``; keeping the
+    durations within a factor of two means most of that window is a hit, so a
+    lookup costs two binary searches plus work proportional to the output.
+    """
+
+    start: np.ndarray
+    end: np.ndarray
+    branches: np.ndarray
+    max_duration: float
+
+    def active(self, time: float) -> np.ndarray:
+        low = np.searchsorted(self.start, time - self.max_duration, side="left")
+        high = np.searchsorted(self.start, time, side="right")
+        window = slice(low, high)
+        return self.branches[window][self.end[window] >= time]
+
+
+@dataclass(frozen=True)
+class BranchIntervalIndex:
+    """Geolocated branches (parent → child) with their time intervals.
+
+    Arrays are indexed by branch; ``buckets`` group branch ids by duration.
+    """
+
+    child: np.ndarray
+    parent: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    buckets: list[DurationBucket]
+
+    @property
+    def size(self) -> int:
+        return int(self.child.size)
+
+    def active(self, time: float) -> np.ndarray:
+        """Return the ids of branches spanning ``time``, ordered by start time."""
+
+        if not self.buckets:
+            return np.empty(0, dtype=np.int64)
+        hits = np.concatenate([bucket.active(time) for bucket in self.buckets])
+        return hits[np.argsort(self.start[hits], kind="stable")]
+
+    def positions(self, branches: np.ndarray, time: float) -> tuple[np.ndarray, np.ndarray]:
+        """Linearly interpolate the (lat, lon) of ``branches`` at ``time``."""
+
+        duration = self.end[branches] - self.start[branches]
+        progress = np.divide(
+            time - self.start[branches],
+            duration,
+            out=np.ones_like(duration),
+            where=duration > 0,
+        )
+        progress = np.clip(progress, 0.0, 1.0)
+        source = self.source[branches]
+        points = source + (self.target[branches] - source) * progress[:, None]
+        return progress, points
+
+
+def build_branch_intervals(cached: CachedTree) -> BranchIntervalIndex:
+    tree = get_columnar_tree(cached)
+    traits = get_trait_columns(cached)
+    coordinates = np.full((tree.size, 2), np.nan)
+    for position, row in enumerate(traits.rows(LATITUDE_KEYS + LONGITUDE_KEYS)):
+        coordinate = DiscreteAnalysisService._extract_coordinates(row)
+        if coordinate is not None:
+            coordinates[position] = coordinate
+
+    child = np.flatnonzero(tree.parent >= 0)
+    parent = tree.parent[child].astype(np.int64)
+    located = ~np.isnan(coordinates[child]).any(axis=1) & ~np.isnan(coordinates[parent]).any(axis=1)
+    child, parent = child[located], parent[located]
+    start = tree.time_from_root[parent]
+    end = np.maximum(tree.time_from_root[child], start)
+
+    duration = end - start
+    positive = duration[duration > 0]
+    # Durations are grouped by powers of two relative to the shortest branch.
+    floor = positive.min() if positive.size else 1.0
+    classes = np.floor(np.log2(np.maximum(duration, floor) / floor)).astype(np.int64)
+    buckets = []
+    for klass in np.unique(classes):
+        members = np.flatnonzero(classes == klass)
+        members = members[np.argsort(start[members], kind="stable")]
+        buckets.append(
+            DurationBucket(
+                start=start[members],
+                end=end[members],
+                branches=members,
+                max_duration=float(duration[members].max()),
+            )
+        )
+
+    return BranchIntervalIndex(
+        child=child,
+        parent=parent,
+        start=start,
+        end=end,
+        source=coordinates[parent],
+        target=coordinates[child],
+        buckets=buckets,
+    )
+
+
+def get_branch_intervals(cached: CachedTree) -> BranchIntervalIndex:
+    """Return the branch interval index of ``cached``, built once per parsed tree."""
+
+    return cached.derived("branch_intervals", lambda: build_branch_intervals(cached))
+
+
+def animation_frames(
+    cached: CachedTree,
+    times: Optional[Sequence[float]] = None,
+    count: int = 100,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> AnimationFramesResult:
+    """Return active lineages at explicit ``times`` or ``count`` evenly spaced times.
+
+    Raises:
+        ValueError: If the requested grid is empty, reversed or too large.
+    """
+
+    index = get_branch_intervals(cached)
+    tree = get_columnar_tree(cached)
+    states = get_node_states(cached)
+    first = float(index.start.min()) if index.size else None
+    last = float(index.end.max()) if index.size else None
+
+    if times is not None:
+        grid = [float(value) for value in times]
+    else:
+        if not 1 <= count <= MAX_FRAMES:
+            raise ValueError(f"count must be between 1 and {MAX_FRAMES}.")
+        low = start if start is not None else (first or 0.0)
+        high = end if end is not None else (last or 0.0)
+        if high < low:
+            raise ValueError("end must not precede start.")
+        grid = np.linspace(low, high, count).tolist()
+    if len(grid) > MAX_FRAMES:
+        raise ValueError(f"At most {MAX_FRAMES} frames can be requested.")
+
+    frames = []
+    for time in grid:
+        branches = index.active(time)
+        progress, points = index.positions(branches, time)
+        children = index.child[branches]
+        frames.append(
+            AnimationFrame.construct(
+                time_from_root=time,
+                node_ids=[tree.ids[position] for position in children.tolist()],
+                parent_ids=[tree.ids[position] for position in index.parent[branches].tolist()],
+                states=[states.states[code] for code in states.codes[children].tolist()],
+                progress=progress.tolist(),
+                latitude=points[:, 0].tolist(),
+                longitude=points[:, 1].tolist(),
+            )
+        )
+
+    return AnimationFramesResult.construct(branch_count=index.size, start=first, end=last, frames=frames)
@@ -0,0 +1,201 @@
+"""Introduction / transmission-cluster detection over inferred location states."""
+
+from __future__ import annotations
+
+import csv
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..models.clusters import IntroductionAnalysisResult, IntroductionCluster, StateIntroductionSummary
+from .columnar import get_trait_columns
+from .discrete_analysis import DiscreteAnalysisService
+from .node_states import get_node_states
+from .tree_index import get_tree_index
+from .tree_service import CachedTree
+
+
+class IntroductionClusterService:
+    """Split the tree into maximal single-state clusters and persist them as CSV."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.analysis_dir = settings.data_dir / "analysis"
+        self.analysis_dir.mkdir(parents=True, exist_ok=True)
+
+    def detect(
+        self,
+        cached: CachedTree,
+        state: Optional[str] = None,
+        threshold: float = 0.5,
+        min_size: int = 1,
+        reconstruction: Optional[str] = None,
+    ) -> IntroductionAnalysisResult:
+        """Find introductions into ``state`` (or every state) in one preorder pass.
+
+        A node belongs to state ``X`` when its best state is ``X`` with posterior
+        at least ``threshold``. Each node in ``X`` whose parent is not (or which
+        is the root) founds a cluster; the cluster holds every node reachable
+        from it through nodes in ``X``. Nodes below the threshold break clusters.
+        ``reconstruction`` fills in states of unannotated nodes first.
+
+        Raises:
+            ValueError: If the threshold is out of range or ``state`` is unknown.
+        """
+
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError("threshold must be between 0 and 1.")
+        if min_size < 0:
+            raise ValueError("min_size must not be negative.")
+
+        states = get_node_states(cached, reconstruction)
+        index = get_tree_index(cached)
+        tree = index.tree
+
+        member = states.probabilities >= threshold
+        member &= np.asarray([label != "Unknown" for label in states.states], dtype=bool)[states.codes]
+        if state is not None:
+            code = states.code_of(state)
+            if code is None:
+                raise ValueError(f"Unknown location state '{state}'.")
+            member &= states.codes == code
+
+        # Preorder guarantees a parent's cluster is known before its children.
+        codes = states.codes.tolist()
+        parents = tree.parent.tolist()
+        member_list = member.tolist()
+        head = [-1] * tree.size
+        for node in index.preorder.tolist():
+            if not member_list[node]:
+                continue
+            parent = parents[node]
+            if parent >= 0 and member_list[parent] and codes[parent] == codes[node]:
+                head[node] = head[parent]
+            else:
+                head[node] = node
+
+        heads = np.asarray(head, dtype=np.int64)
+        members = np.flatnonzero(heads >= 0)
+        node_counts = np.bincount(heads[members], minlength=tree.size)
+        tip_members = members[tree.is_tip[members]]
+        tip_counts = np.bincount(heads[tip_members], minlength=tree.size)
+
+        founders = np.flatnonzero(node_counts > 0)
+        founders = founders[tip_counts[founders] >= min_size]
+        founders = founders[np.argsort(tree.time_from_root[founders], kind="stable")]
+
+        traits = get_trait_columns(cached)
+        dated = [name for name in traits.names if "date" in name.lower() or "year" in name.lower()]
+        reference_year = DiscreteAnalysisService._reference_year_of_traits(traits.rows(dated))
+        clusters: list[IntroductionCluster] = []
+        for cluster_id, founder in enumerate(founders.tolist(), start=1):
+            parent = parents[founder]
+            before_present = float(tree.time_before_present[founder])
+            clusters.append(
+                IntroductionCluster(
+                    cluster_id=cluster_id,
+                    state=states.states[codes[founder]],
+                    source_state=states.states[codes[parent]] if parent >= 0 else None,
+                    source_probability=float(states.probabilities[parent]) if parent >= 0 else None,
+                    mrca_id=tree.ids[founder],
+                    mrca_probability=float(states.probabilities[founder]),
+                    tmrca_from_root=float(tree.time_from_root[founder]),
+                    tmrca_before_present=before_present,
+                    tmrca_year=DiscreteAnalysisService._convert_to_year(reference_year, before_present)
+                    if reference_year is not None
+                    else None,
+                    tip_count=int(tip_counts[founder]),
+                    node_count=int(node_counts[founder]),
+                )
+            )
+
+        summaries = self._summarise(clusters)
+        analysis_id = uuid4().hex
+        output_dir = self.analysis_dir / analysis_id
+        output_dir.mkdir(parents=True, exist_ok=False)
+        tips_by_founder: dict[int, list[str]] = {}
+        for tip in tip_members.tolist():
+            tips_by_founder.setdefault(head[tip], []).append(tree.labels[tip] or tree.ids[tip])
+        self._write_clusters_csv(
+            output_dir, clusters, [tips_by_founder.get(founder, []) for founder in founders.tolist()]
+        )
+
+        return IntroductionAnalysisResult(
+            analysis_id=analysis_id,
+            threshold=threshold,
+            summaries=summaries,
+            clusters=clusters,
+            exports={"clusters_csv": f"/api/analysis/discrete/{analysis_id}/clusters.csv"},
+        )
+
+    @staticmethod
+    def _summarise(clusters: list[IntroductionCluster]) -> list[StateIntroductionSummary]:
+        grouped: dict[str, list[IntroductionCluster]] = {}
+        for cluster in clusters:
+            grouped.setdefault(cluster.state, []).append(cluster)
+        summaries = [
+            StateIntroductionSummary(
+                state=state,
+                introductions=len(items),
+                tips=sum(item.tip_count for item in items),
+                largest_cluster=max(item.tip_count for item in items),
+                singletons=sum(1 for item in items if item.tip_count == 1 and item.node_count == 1),
+            )
+            for state, items in grouped.items()
+        ]
+        summaries.sort(key=lambda summary: (-summary.introductions, summary.state))
+        return summaries
+
+    @staticmethod
+    def _write_clusters_csv(
+        directory: Path,
+        clusters: list[IntroductionCluster],
+        cluster_tips: list[list[str]],
+    ) -> None:
+        path = directory / "clusters.csv"
+        with path.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(
+                [
+                    "cluster_id",
+                    "state",
+                    "source_state",
+                    "source_probability",
+                    "mrca_id",
+                    "mrca_probability",
+                    "tmrca_from_root",
+                    "tmrca_before_present",
+                    "tmrca_year",
+                    "tip_count",
+                    "node_count",
+                    "tips",
+                ]
+            )
+            for cluster, tips in zip(clusters, cluster_tips):
+                writer.writerow(
+                    [
+                        cluster.cluster_id,
+                        cluster.state,
+                        cluster.source_state or "",
+                        f"{cluster.source_probability:.6f}" if cluster.source_probability is not None else "",
+                        cluster.mrca_id,
+                        f"{cluster.mrca_probability:.6f}",
+                        f"{cluster.tmrca_from_root:.6f}",
+                        f"{cluster.tmrca_before_present:.6f}",
+                        f"{cluster.tmrca_year:.6f}" if cluster.tmrca_year is not None else "",
+                        cluster.tip_count,
+                        cluster.node_count,
+                        ";".join(tips),
+                    ]
+                )
+
+
+@lru_cache(maxsize=1)
+def get_introduction_cluster_service() -> IntroductionClusterService:
+    """Return a cached service instance."""
+
+    return IntroductionClusterService()
@@ -0,0 +1,417 @@
+"""Array-based (columnar) view of a parsed tree for vectorized algorithms.
+
+With the shared cache on, these columns are also what worker processes share:
+the first worker to need them builds them from its ``TreePayload`` and stores
+them as ``.npy`` files, and every other worker memory-maps those files. Node
+ids, labels and trait values are kept as packed UTF-8 string tables rather
+than Python objects, so an attached worker holds page-cache pages plus small
+per-trait descriptors instead of its own unpickled payload.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from bisect import bisect_left
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+from ..models.tree import TreePayload
+from .shared_cache import get_shared_cache
+from .tree_service import CachedTree
+
+# Integers beyond this cannot round-trip through a float64 column.
+_MAX_EXACT_INTEGER = 2**53
+
+
+@dataclass(frozen=True, eq=False)
+class StringColumn(Sequence):
+    """Strings packed into two arrays so the column can be memory-mapped.
+
+    Entry ``i`` is the UTF-8 text ``data[offsets[i]:offsets[i + 1]]``, or
+    ``None`` where ``present`` is false (``present=None`` means no entry is
+    missing).
+    """
+
+    offsets: np.ndarray
+    data: np.ndarray
+    present: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_strings(cls, values: Sequence[Optional[str]]) -> StringColumn:
+        encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        present = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+        return cls(
+            offsets=offsets,
+            data=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            present=None if present.all() else present,
+        )
+
+    def __len__(self) -> int:
+        return self.offsets.size - 1
+
+    def __getitem__(self, position: int) -> Optional[str]:
+        position = range(len(self))[position]
+        if self.present is not None and not self.present[position]:
+            return None
+        return self.data[self.offsets[position] : self.offsets[position + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return iter(self.tolist())
+
+    def tolist(self) -> list[Optional[str]]:
+        """Decode every entry at once, which is much faster than indexing one by one."""
+
+        data = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        values: list[Optional[str]] = [
+            data[start:stop].decode("utf-8") for start, stop in zip(bounds, bounds[1:])
+        ]
+        if self.present is not None:
+            for position in np.flatnonzero(~self.present).tolist():
+                values[position] = None
+        return values
+
+    def arrays(self, prefix: str) -> dict[str, np.ndarray]:
+        arrays = {f"{prefix}offsets": self.offsets, f"{prefix}data": self.data}
+        if self.present is not None:
+            arrays[f"{prefix}present"] = self.present
+        return arrays
+
+
+@dataclass(frozen=True, eq=False)
+class StringIndex(Mapping):
+    """Read-only ``string -> position`` lookup over a :class:`StringColumn`.
+
+    ``order`` lists positions sorted by their string, so a lookup is a binary
+    search that decodes ``O(log n)`` entries instead of a per-worker dict.
+    """
+
+    column: StringColumn
+    order: np.ndarray
+
+    @staticmethod
+    def sort_order(values: Sequence[str]) -> np.ndarray:
+        return np.asarray(sorted(range(len(values)), key=values.__getitem__), dtype=np.int32)
+
+    def __getitem__(self, key: str) -> int:
+        if isinstance(key, str):
+            slot = bisect_left(self.order, key, key=lambda position: self.column[int(position)])
+            if slot < self.order.size:
+                position = int(self.order[slot])
+                if self.column[position] == key:
+                    return position
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.column)
+
+    def __len__(self) -> int:
+        return len(self.column)
+
+
+@dataclass(frozen=True)
+class ColumnarTree:
+    """Node columns aligned with ``TreePayload.nodes``.
+
+    ``parent`` holds the parent position of every node (``-1`` for the root)
+    and children are stored CSR-style: the children of node ``i`` are
+    ``child_index[child_start[i]:child_start[i + 1]]``.
+    """
+
+    ids: Sequence[str]
+    labels: Sequence[Optional[str]]
+    index: Mapping[str, int]
+    parent: np.ndarray
+    branch_length: np.ndarray
+    time_from_root: np.ndarray
+    time_before_present: np.ndarray
+    child_start: np.ndarray
+    child_index: np.ndarray
+    root: int
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def is_tip(self) -> np.ndarray:
+        return np.diff(self.child_start) == 0
+
+    def children(self, position: int) -> np.ndarray:
+        return self.child_index[self.child_start[position] : self.child_start[position + 1]]
+
+
+def build_columnar_tree(payload: TreePayload) -> ColumnarTree:
+    """Convert the node/edge lists of ``payload`` into flat NumPy columns."""
+
+    nodes = payload.nodes
+    size = len(nodes)
+    index = {node.id: position for position, node in enumerate(nodes)}
+
+    parent = np.full(size, -1, dtype=np.int32)
+    for edge in payload.edges:
+        child = index.get(edge.child_id)
+        parent_position = index.get(edge.parent_id)
+        if child is None or parent_position is None:
+            continue
+        parent[child] = parent_position
+
+    roots = np.flatnonzero(parent < 0)
+    if roots.size != 1:
+        raise ValueError(f"Tree must have exactly one root; found {roots.size}.")
+
+    branch_length = np.fromiter(
+        (np.nan if node.branch_length is None else node.branch_length for node in nodes),
+        dtype=np.float64,
+        count=size,
+    )
+    time_from_root = np.fromiter((node.time_from_root for node in nodes), dtype=np.float64, count=size)
+    time_before_present = np.fromiter(
+        (node.time_before_present for node in nodes), dtype=np.float64, count=size
+    )
+
+    has_parent = np.flatnonzero(parent >= 0)
+    # Stable ordering keeps children in their original (file) order.
+    child_index = has_parent[np.argsort(parent[has_parent], kind="stable")].astype(np.int32)
+    child_start = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(np.bincount(parent[has_parent], minlength=size), out=child_start[1:])
+
+    return ColumnarTree(
+        ids=[node.id for node in nodes],
+        labels=[node.label for node in nodes],
+        index=index,
+        parent=parent,
+        branch_length=branch_length,
+        time_from_root=time_from_root,
+        time_before_present=time_before_present,
+        child_start=child_start,
+        child_index=child_index,
+        root=int(roots[0]),
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class TraitColumn:
+    """One trait across all nodes.
+
+    ``float`` and ``integer`` traits keep their values in ``values`` (``NaN``
+    where absent). ``categorical`` and ``json`` traits keep ``int32`` codes
+    into ``dictionary`` (``-1`` where absent); ``json`` entries are
+    JSON-encoded lists, booleans or mixed values, so decoding is lossless.
+    """
+
+    kind: str
+    values: np.ndarray
+    dictionary: Optional[StringColumn] = None
+
+    def present(self) -> np.ndarray:
+        """Return the sorted positions of the nodes carrying this trait."""
+
+        if self.dictionary is None:
+            return np.flatnonzero(~np.isnan(self.values))
+        return np.flatnonzero(self.values >= 0)
+
+    def value(self, position: int) -> Any:
+        """Return the value of one node, ``None`` where the trait is absent."""
+
+        if self.dictionary is None:
+            value = float(self.values[position])
+            if math.isnan(value):
+                return None
+            return int(value) if self.kind == "integer" else value
+        code = int(self.values[position])
+        if code < 0:
+            return None
+        entry = self.dictionary[code]
+        return json.loads(entry) if self.kind == "json" else entry
+
+    def decode(self) -> list[Any]:
+        """Return the value of every node, ``None`` where the trait is absent."""
+
+        if self.dictionary is None:
+            convert = int if self.kind == "integer" else float
+            return [None if math.isnan(value) else convert(value) for value in self.values.tolist()]
+        entries: list[Any] = self.dictionary.tolist()
+        if self.kind == "json":
+            entries = [json.loads(entry) for entry in entries]
+        return [None if code < 0 else entries[code] for code in self.values.tolist()]
+
+
+@dataclass(frozen=True, eq=False)
+class TraitColumns:
+    """Every node trait as a :class:`TraitColumn`, in order of first appearance."""
+
+    size: int
+    columns: dict[str, TraitColumn]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.columns
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.columns)
+
+    def decode(self, name: str) -> list[Any]:
+        column = self.columns.get(name)
+        return column.decode() if column is not None else [None] * self.size
+
+    def row(self, position: int) -> dict[str, Any]:
+        """Return the ``traits`` dict of one node without decoding whole columns."""
+
+        values = ((name, column.value(position)) for name, column in self.columns.items())
+        return {name: value for name, value in values if value is not None}
+
+    def rows(self, names: Optional[Sequence[str]] = None) -> Iterator[dict[str, Any]]:
+        """Yield a ``traits`` dict per node, like ``TreeNode.traits``.
+
+        Only the ``names`` columns (all by default) are decoded, once each.
+        """
+
+        decoded = [(name, self.columns[name].decode()) for name in (names or self.columns) if name in self.columns]
+        for position in range(self.size):
+            yield {name: values[position] for name, values in decoded if values[position] is not None}
+
+
+def _trait_kind(values: list[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, float) and not math.isnan(value) for value in present):
+        return "float"
+    if all(
+        isinstance(value, int) and not isinstance(value, bool) and abs(value) <= _MAX_EXACT_INTEGER
+        for value in present
+    ):
+        return "integer"
+    if all(isinstance(value, str) for value in present):
+        return "categorical"
+    return "json"
+
+
+def _dictionary_codes(values: list[Optional[str]]) -> tuple[np.ndarray, StringColumn]:
+    lookup: dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, StringColumn.from_strings(list(lookup))
+
+
+def build_trait_columns(payload: TreePayload) -> TraitColumns:
+    """Split the per-node ``traits`` dicts of ``payload`` into typed columns."""
+
+    nodes = payload.nodes
+    names: dict[str, None] = {}
+    for node in nodes:
+        names.update(dict.fromkeys(node.traits or {}))
+
+    columns: dict[str, TraitColumn] = {}
+    for name in names:
+        values = [(node.traits or {}).get(name) for node in nodes]
+        kind = _trait_kind(values)
+        if kind in {"float", "integer"}:
+            array = np.fromiter((math.nan if value is None else value for value in values), np.float64, len(values))
+            columns[name] = TraitColumn(kind=kind, values=array)
+            continue
+        if kind == "json":
+            values = [None if value is None else json.dumps(value, separators=(",", ":")) for value in values]
+        codes, dictionary = _dictionary_codes(values)
+        columns[name] = TraitColumn(kind=kind, values=codes, dictionary=dictionary)
+    return TraitColumns(size=len(nodes), columns=columns)
+
+
+_SHARED_COLUMNS = ["parent", "branch_length", "time_from_root", "time_before_present", "child_start", "child_index"]
+_STRING_COLUMNS = ["id_offsets", "id_data", "id_order", "label_offsets", "label_data", "label_present"]
+
+
+def _shared_columnar_tree(cached: CachedTree) -> ColumnarTree:
+    """Build the columnar view, attaching to arrays another worker already stored.
+
+    Shared columns, including the id and label tables, are read-only memory
+    maps, so every worker reads the same pages instead of holding its own copy
+    or its own ``TreePayload``.
+    """
+
+    shared = get_shared_cache()
+    if shared is None:
+        return build_columnar_tree(cached.payload)
+    arrays = shared.load_arrays(cached.signature, "columnar", _SHARED_COLUMNS + _STRING_COLUMNS)
+    if arrays is None:
+        columnar = build_columnar_tree(cached.payload)
+        labels = StringColumn.from_strings(columnar.labels)
+        stored = {name: getattr(columnar, name) for name in _SHARED_COLUMNS}
+        stored.update(StringColumn.from_strings(columnar.ids).arrays("id_"))
+        stored["id_order"] = StringIndex.sort_order(columnar.ids)
+        stored.update(labels.arrays("label_"))
+        # Always store the mask so the field list is fixed.
+        stored["label_present"] = np.ones(len(labels), dtype=bool) if labels.present is None else labels.present
+        shared.store_arrays(cached.signature, "columnar", stored)
+        return columnar
+    ids = StringColumn(offsets=arrays.pop("id_offsets"), data=arrays.pop("id_data"))
+    labels = StringColumn(
+        offsets=arrays.pop("label_offsets"), data=arrays.pop("label_data"), present=arrays.pop("label_present")
+    )
+    return ColumnarTree(
+        ids=ids,
+        labels=labels,
+        index=StringIndex(column=ids, order=arrays.pop("id_order")),
+        root=int(np.flatnonzero(arrays["parent"] < 0)[0]),
+        **arrays,
+    )
+
+
+def _shared_trait_columns(cached: CachedTree) -> TraitColumns:
+    """Build the trait columns, attaching to arrays another worker already stored.
+
+    The ``traits`` manifest (one ``(name, kind)`` pair per trait) is written
+    after the arrays, so a worker that finds it can map every column.
+    """
+
+    shared = get_shared_cache()
+    if shared is None:
+        return build_trait_columns(cached.payload)
+    manifest = shared.load_object(cached.signature, "traits")
+    if isinstance(manifest, dict):
+        fields = ["size"]
+        for position, (_, kind) in enumerate(manifest["traits"]):
+            fields.append(f"{position}.values")
+            if kind in {"categorical", "json"}:
+                fields.extend((f"{position}.offsets", f"{position}.data"))
+        arrays = shared.load_arrays(cached.signature, "traits", fields)
+        if arrays is not None:
+            columns = {}
+            for position, (name, kind) in enumerate(manifest["traits"]):
+                dictionary = None
+                if kind in {"categorical", "json"}:
+                    dictionary = StringColumn(offsets=arrays[f"{position}.offsets"], data=arrays[f"{position}.data"])
+                columns[name] = TraitColumn(kind=kind, values=arrays[f"{position}.values"], dictionary=dictionary)
+            return TraitColumns(size=int(arrays["size"][0]), columns=columns)
+
+    traits = build_trait_columns(cached.payload)
+    stored: dict[str, np.ndarray] = {"size": np.asarray([traits.size], dtype=np.int64)}
+    for position, column in enumerate(traits.columns.values()):
+        stored[f"{position}.values"] = column.values
+        if column.dictionary is not None:
+            stored.update(column.dictionary.arrays(f"{position}."))
+    shared.store_arrays(cached.signature, "traits", stored)
+    shared.store_object(
+        cached.signature, "traits", {"traits": [(name, column.kind) for name, column in traits.columns.items()]}
+    )
+    return traits
+
+
+def get_columnar_tree(cached: CachedTree) -> ColumnarTree:
+    """Return the columnar view of ``cached``, building it once per parsed tree."""
+
+    return cached.derived("columnar", lambda: _shared_columnar_tree(cached))
+
+
+def get_trait_columns(cached: CachedTree) -> TraitColumns:
+    """Return the trait columns of ``cached``, building them once per parsed tree."""
+
+    return cached.derived("trait_columns", lambda: _shared_trait_columns(cached))
@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import io
 import json
 import math
 import re
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
@@ -17,13 +19,21 @@ from typing import Any, Iterable, Optional
 from uuid import uuid4
 
 from ..core.config import get_settings
+from ..core.metrics import ANALYSIS_EDGE_OBSERVATIONS, ANALYSIS_SECONDS, ANALYSIS_STATES
+from ..core.timing import span
 from ..models.discrete import (
     DiscreteAnalysisResult,
     EdgeAggregate,
     LocationPosterior,
     NodeAggregate,
 )
-from ..models.tree import TreeEdge, TreeNode
+from ..models.tree import TreeEdge, TreeMetadata, TreeNode, TreePayload
+from .admission import estimate_analysis_bytes, get_admission_controller
+from .columnar import build_columnar_tree
+from .geodesy import great_circle_arcs
+from .reconstruction import reconstruct_states
+from .single_flight import get_single_flight
+from .tree_service import CachedTree
 
 
 # Patterns used to interpret optional BSSVS / Markov jump tables.
@@ -31,6 +41,10 @@ EDGE_COLUMN_PATTERN = re.compile(
     r"(?P<prefix>[a-zA-Z]+)[_\[(]{1}(?P<src>[^,\->:;\s]+)[,>\-\s]+(?P<dst>[^)\]\s]+)"
 )
 GENERIC_PAIR_PATTERN = re.compile(r"(?P<src>[^->:]+)[->:](?P<dst>.+)")
+COORDINATE_KEYS = {"location_lat", "location_lon", "location1", "location2"}
+# Traits read as node coordinates, in order of preference.
+LATITUDE_KEYS = ("location_lat", "latitude", "lat", "location1")
+LONGITUDE_KEYS = ("location_lon", "longitude", "lon", "location2")
 
 
 @dataclass
@@ -81,6 +95,7 @@ class DiscreteAnalysisService:
         edges: list[TreeEdge],
         support_table: Optional[str] = None,
         top_k: int = 10,
+        reconstruction: Optional[str] = None,
     ) -> DiscreteAnalysisResult:
         """Run the discrete analysis and persist artefacts.
 
@@ -89,6 +104,8 @@ class DiscreteAnalysisService:
             edges: Directed edges of the MCC tree.
             support_table: Optional CSV/TSV text with BSSVS/Markov jumps output.
             top_k: Number of pathways to highlight in the summary.
+            reconstruction: Optional ``"parsimony"`` or ``"ml"`` to infer the
+                location of nodes that carry no location annotation.
 
         Returns:
             A :class:`DiscreteAnalysisResult` describing posterior rankings and
@@ -98,15 +115,19 @@ class DiscreteAnalysisService:
         if not nodes:
             raise ValueError("Tree payload has no nodes to analyse.")
 
+        started = time.perf_counter()
         node_lookup = {node.id: node for node in nodes}
         children_map: dict[str, list[str]] = defaultdict(list)
         for edge in edges:
             children_map[edge.parent_id].append(edge.child_id)
 
-        distributions = {
-            node.id: self._extract_location_distribution(node.traits)
-            for node in nodes
-        }
+        with span("distribution_extraction"):
+            distributions = {
+                node.id: self._extract_location_distribution(node.traits)
+                for node in nodes
+            }
+            if reconstruction:
+                distributions = self.reconstruct_distributions(nodes, edges, reconstruction, distributions)
 
         root_nodes = [node for node in nodes if node.parent_id is None]
         if len(root_nodes) != 1:
@@ -144,23 +165,18 @@ class DiscreteAnalysisService:
                 location_stats[best_location].add(latitude, longitude, max(best_prob, 0.0))
 
         observations: dict[tuple[str, str], list[EdgeObservation]] = defaultdict(list)
-        for edge in edges:
-            parent = node_lookup.get(edge.parent_id)
-            child = node_lookup.get(edge.child_id)
-            if not parent or not child:
-                continue
-            parent_dist = self._normalise_distribution(distributions.get(parent.id))
-            child_dist = self._normalise_distribution(distributions.get(child.id))
-            if not parent_dist or not child_dist:
-                continue
-            time_stats = self._extract_time_stats(child, reference_year)
-            for src, src_prob in parent_dist.items():
-                for dst, dst_prob in child_dist.items():
-                    if src == dst:
-                        continue
-                    weight = src_prob * dst_prob
-                    if weight <= 0:
-                        continue
+        with span("edge_expansion"):
+            for edge in edges:
+                parent = node_lookup.get(edge.parent_id)
+                child = node_lookup.get(edge.child_id)
+                if not parent or not child:
+                    continue
+                parent_dist = self._normalise_distribution(distributions.get(parent.id))
+                child_dist = self._normalise_distribution(distributions.get(child.id))
+                if not parent_dist or not child_dist:
+                    continue
+                time_stats = self._extract_time_stats(child, reference_year)
+                for (src, dst), weight in self._transition_weights(parent_dist, child_dist):
                     observations[(src, dst)].append(
                         EdgeObservation(
                             src=src,
@@ -185,6 +201,8 @@ class DiscreteAnalysisService:
 
         node_summaries: list[NodeAggregate] = []
         observed_locations = set(list(ancestral_weight) + list(tip_weight))
+        ANALYSIS_STATES.observe(len(observed_locations))
+        ANALYSIS_EDGE_OBSERVATIONS.observe(sum(len(obs_list) for obs_list in observations.values()))
         for location in sorted(observed_locations):
             accumulator = location_stats.get(location)
             latitude: Optional[float]
@@ -208,19 +226,22 @@ class DiscreteAnalysisService:
         output_dir = self.analysis_dir / analysis_id
         output_dir.mkdir(parents=True, exist_ok=False)
 
-        self._write_nodes_csv(output_dir, node_summaries)
-        self._write_edges_csv(output_dir, edge_summaries)
-        self._write_geojson(output_dir, node_summaries, edge_summaries)
-        self._write_summary_markdown(
-            output_dir,
-            root_distribution,
-            edge_summaries[: top_k or 10],
-        )
+        with span("artifact_writes"):
+            self._write_nodes_csv(output_dir, node_summaries)
+            self._write_edges_csv(output_dir, edge_summaries)
+            self._write_geojson(output_dir, node_summaries, edge_summaries)
+            self._write_arcs_geojson(output_dir, node_summaries, edge_summaries)
+            self._write_summary_markdown(
+                output_dir,
+                root_distribution,
+                edge_summaries[: top_k or 10],
+            )
 
         exports = {
             "nodes_csv": f"/api/analysis/discrete/{analysis_id}/nodes.csv",
             "edges_csv": f"/api/analysis/discrete/{analysis_id}/edges.csv",
             "map_geojson": f"/api/analysis/discrete/{analysis_id}/map.geojson",
+            "arcs_geojson": f"/api/analysis/discrete/{analysis_id}/arcs.geojson",
             "summary_md": f"/api/analysis/discrete/{analysis_id}/summary.md",
         }
 
@@ -231,6 +252,7 @@ class DiscreteAnalysisService:
             )
         ]
 
+        ANALYSIS_SECONDS.observe(time.perf_counter() - started)
         return DiscreteAnalysisResult(
             analysis_id=analysis_id,
             root_distribution=root_rank,
@@ -240,6 +262,119 @@ class DiscreteAnalysisService:
             exports=exports,
         )
 
+    def analyse_tree(
+        self,
+        cached: CachedTree,
+        support_table: Optional[str] = None,
+        top_k: int = 10,
+        reconstruction: Optional[str] = None,
+    ) -> DiscreteAnalysisResult:
+        """Run :meth:`run_analysis` on a cached tree.
+
+        Concurrent requests for the same file version and parameters share a
+        single run (and therefore the same ``analysis_id``).
+        """
+
+        support_digest = hashlib.sha1(support_table.encode("utf-8")).hexdigest() if support_table else None
+        key = (cached.signature, top_k, reconstruction, support_digest)
+
+        def run() -> DiscreteAnalysisResult:
+            nodes = cached.payload.nodes
+            root = next((node for node in nodes if node.parent_id is None), None)
+            state_count = len(self._extract_location_distribution(root.traits)) if root is not None else 1
+            estimate = estimate_analysis_bytes(len(nodes), state_count)
+            with get_admission_controller().admit(estimate, f"Analysis of {cached.path.name}"):
+                return self.run_analysis(
+                    nodes=list(nodes),
+                    edges=list(cached.payload.edges),
+                    support_table=support_table,
+                    top_k=top_k,
+                    reconstruction=reconstruction,
+                )
+
+        return get_single_flight("discrete_analysis").do(key, run)
+
+    def branch_transition_weights(
+        self,
+        nodes: list[TreeNode],
+        edges: list[TreeEdge],
+        reconstruction: Optional[str] = None,
+    ) -> list[dict[tuple[str, str], float]]:
+        """Return the per-branch transition weights behind the edge aggregates.
+
+        The list is aligned with ``edges``; each entry maps ``(src, dst)`` to the
+        posterior weight that branch contributes to the path, so summing over
+        branches reproduces :attr:`EdgeAggregate.weight`.
+        """
+
+        node_lookup = {node.id: node for node in nodes}
+        distributions: dict[str, dict[str, float]] = {}
+        if reconstruction:
+            distributions = {
+                node_id: self._normalise_distribution(distribution)
+                for node_id, distribution in self.reconstruct_distributions(nodes, edges, reconstruction).items()
+            }
+        contributions: list[dict[tuple[str, str], float]] = []
+        for edge in edges:
+            weights: dict[tuple[str, str], float] = {}
+            contributions.append(weights)
+            parent = node_lookup.get(edge.parent_id)
+            child = node_lookup.get(edge.child_id)
+            if not parent or not child:
+                continue
+            for node in (parent, child):
+                if node.id not in distributions:
+                    distributions[node.id] = self._normalise_distribution(
+                        self._extract_location_distribution(node.traits)
+                    )
+            for pair, weight in self._transition_weights(
+                distributions[parent.id], distributions[child.id]
+            ):
+                weights[pair] = weights.get(pair, 0.0) + weight
+        return contributions
+
+    def reconstruct_distributions(
+        self,
+        nodes: list[TreeNode],
+        edges: list[TreeEdge],
+        method: str,
+        distributions: Optional[dict[str, dict[str, float]]] = None,
+    ) -> dict[str, dict[str, float]]:
+        """Fill in location distributions for nodes without annotations.
+
+        Annotated nodes keep their distribution; the others are inferred from
+        the annotated ones with Fitch parsimony (``"parsimony"``) or marginal
+        ML under a symmetric Mk model (``"ml"``).
+
+        Raises:
+            ValueError: For an unknown method or a tree without a single root.
+        """
+
+        if distributions is None:
+            distributions = {node.id: self._extract_location_distribution(node.traits) for node in nodes}
+        payload = TreePayload.construct(nodes=list(nodes), edges=list(edges), metadata=TreeMetadata())
+        tree = build_columnar_tree(payload)
+        result = reconstruct_states(
+            tree,
+            [self._normalise_distribution(distributions.get(node_id)) for node_id in tree.ids],
+            method=method,
+        )
+        return dict(zip(tree.ids, result.distributions))
+
+    @staticmethod
+    def _transition_weights(
+        parent_dist: dict[str, float],
+        child_dist: dict[str, float],
+    ) -> Iterable[tuple[tuple[str, str], float]]:
+        for src, src_prob in parent_dist.items():
+            for dst, dst_prob in child_dist.items():
+                if src == dst:
+                    continue
+                weight = src_prob * dst_prob
+                if weight <= 0:
+                    continue
+                yield (src, dst), weight
+
     @staticmethod
     def _normalise_distribution(distribution: Optional[dict[str, float]]) -> dict[str, float]:
         if not distribution:
@@ -282,6 +417,9 @@ class DiscreteAnalysisService:
         for key in candidate_keys:
             lowered = key.lower()
             value = traits[key]
+            # Coordinates (location1/location2) and their HPD polygons are not state labels.
+            if lowered in COORDINATE_KEYS or isinstance(value, (bool, float, list, tuple, dict)):
+                continue
             if lowered.endswith("state") or "location" in lowered:
                 label = self._clean_label(value)
                 if label != "Unknown":
@@ -346,7 +484,11 @@ class DiscreteAnalysisService:
         prefixes = [key.replace("prob", "set"), key.replace("prob", "states"), key.replace("posterior", "states")]
         prefixes.append(key.replace("prob", "labels"))
         prefixes.append(key.replace("prob", "state"))
+        # BEAST writes ``location.set`` alongside ``location.set.prob``.
+        prefixes.append(re.sub(r"[._]?(prob|probs|posterior)$", "", key))
         for prefix in prefixes:
+            if prefix == key:
+                continue
             if prefix in traits and isinstance(traits[prefix], (list, tuple)):
                 labels = [self._clean_label(label) for label in traits[prefix]]
                 if len(labels) == expected_length:
@@ -357,16 +499,14 @@ class DiscreteAnalysisService:
     def _extract_coordinates(traits: dict[str, Any]) -> Optional[tuple[float, float]]:
         if not traits:
             return None
-        lat_keys = ("location_lat", "latitude", "lat", "location1")
-        lon_keys = ("location_lon", "longitude", "lon", "location2")
         latitude = None
         longitude = None
-        for key in lat_keys:
+        for key in LATITUDE_KEYS:
             value = traits.get(key)
             if DiscreteAnalysisService._is_number(value):
                 latitude = float(value)
                 break
-        for key in lon_keys:
+        for key in LONGITUDE_KEYS:
             value = traits.get(key)
             if DiscreteAnalysisService._is_number(value):
                 longitude = float(value)
@@ -385,9 +525,12 @@ class DiscreteAnalysisService:
 
     @staticmethod
     def _infer_reference_year(nodes: Iterable[TreeNode]) -> Optional[float]:
+        return DiscreteAnalysisService._reference_year_of_traits(node.traits or {} for node in nodes)
+
+    @staticmethod
+    def _reference_year_of_traits(rows: Iterable[dict[str, Any]]) -> Optional[float]:
         latest_date: Optional[datetime] = None
-        for node in nodes:
-            traits = node.traits or {}
+        for traits in rows:
             for key, value in traits.items():
                 if not isinstance(value, (str, int, float)):
                     continue
@@ -735,19 +878,7 @@ class DiscreteAnalysisService:
                             [dst_node.longitude, dst_node.latitude],
                         ],
                     },
-                    "properties": {
-                        "src": edge.src,
-                        "dst": edge.dst,
-                        "weight": edge.weight,
-                        "time_median": edge.time_median,
-                        "time_hpd_low": edge.time_hpd_low,
-                        "time_hpd_high": edge.time_hpd_high,
-                        "bayes_factor": edge.bayes_factor,
-                        "posterior_support": edge.posterior_support,
-                        "jumps_mean": edge.jumps_mean,
-                        "jumps_hpd_low": edge.jumps_hpd_low,
-                        "jumps_hpd_high": edge.jumps_hpd_high,
-                    },
+                    "properties": self._edge_properties(edge),
                 }
             )
 
@@ -755,6 +886,54 @@ class DiscreteAnalysisService:
         with path.open("w", encoding="utf-8") as handle:
             json.dump({"type": "FeatureCollection", "features": features}, handle, ensure_ascii=False, indent=2)
 
+    def _write_arcs_geojson(
+        self,
+        directory: Path,
+        nodes: list[NodeAggregate],
+        edges: list[EdgeAggregate],
+    ) -> None:
+        """Write migration lines as densified great-circle arcs, computed once per analysis."""
+
+        node_lookup = {
+            node.location: (node.longitude, node.latitude)
+            for node in nodes
+            if node.latitude is not None and node.longitude is not None
+        }
+        located = [edge for edge in edges if edge.src in node_lookup and edge.dst in node_lookup]
+        arcs = great_circle_arcs(
+            [node_lookup[edge.src] for edge in located],
+            [node_lookup[edge.dst] for edge in located],
+        )
+        features: list[dict[str, Any]] = []
+        for edge, parts in zip(located, arcs):
+            coordinates = [part.tolist() for part in parts]
+            geometry = (
+                {"type": "LineString", "coordinates": coordinates[0]}
+                if len(coordinates) == 1
+                else {"type": "MultiLineString", "coordinates": coordinates}
+            )
+            features.append({"type": "Feature", "geometry": geometry, "properties": self._edge_properties(edge)})
+
+        path = directory / "arcs.geojson"
+        with path.open("w", encoding="utf-8") as handle:
+            json.dump({"type": "FeatureCollection", "features": features}, handle, ensure_ascii=False)
+
+    @staticmethod
+    def _edge_properties(edge: EdgeAggregate) -> dict[str, Any]:
+        return {
+            "src": edge.src,
+            "dst": edge.dst,
+            "weight": edge.weight,
+            "time_median": edge.time_median,
+            "time_hpd_low": edge.time_hpd_low,
+            "time_hpd_high": edge.time_hpd_high,
+            "bayes_factor": edge.bayes_factor,
+            "posterior_support": edge.posterior_support,
+            "jumps_mean": edge.jumps_mean,
+            "jumps_hpd_low": edge.jumps_hpd_low,
+            "jumps_hpd_high": edge.jumps_hpd_high,
+        }
+
     def _write_summary_markdown(
         self,
         directory: Path,
@@ -0,0 +1,183 @@
+"""Dispersal statistics (distances, velocities, diffusion, wavefront) over geolocated branches."""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..models.dispersal import DispersalAnalysisResult, DispersalSummary, WavefrontSeries
+from .animation import BranchIntervalIndex, get_branch_intervals
+from .columnar import get_columnar_tree, get_trait_columns
+from .discrete_analysis import DiscreteAnalysisService
+from .geodesy import haversine_km
+from .tree_service import CachedTree
+
+MAX_WAVEFRONT_POINTS = 2000
+
+
+@dataclass(frozen=True)
+class BranchDispersal:
+    """Per-branch distance and duration, aligned with a :class:`BranchIntervalIndex`."""
+
+    intervals: BranchIntervalIndex
+    distance_km: np.ndarray
+    duration: np.ndarray
+    root_coordinate: Optional[tuple[float, float]]
+
+
+def get_branch_dispersal(cached: CachedTree) -> BranchDispersal:
+    """Return branch distances of ``cached``, computed once per parsed tree."""
+
+    def build() -> BranchDispersal:
+        intervals = get_branch_intervals(cached)
+        tree = get_columnar_tree(cached)
+        distance = haversine_km(
+            intervals.source[:, 0], intervals.source[:, 1], intervals.target[:, 0], intervals.target[:, 1]
+        )
+        root_coordinate = DiscreteAnalysisService._extract_coordinates(get_trait_columns(cached).row(tree.root))
+        return BranchDispersal(
+            intervals=intervals,
+            distance_km=distance,
+            duration=intervals.end - intervals.start,
+            root_coordinate=root_coordinate,
+        )
+
+    return cached.derived("branch_dispersal", build)
+
+
+def summarise_dispersal(branches: BranchDispersal) -> DispersalSummary:
+    """Aggregate velocities and diffusion coefficients; zero-length branches only count in totals."""
+
+    distance, duration = branches.distance_km, branches.duration
+    timed = duration > 0
+    total_distance = float(distance.sum())
+    total_duration = float(duration.sum())
+    summary = DispersalSummary(
+        branch_count=int(distance.size),
+        total_distance_km=total_distance,
+        total_duration=total_duration,
+    )
+    if not timed.any():
+        return summary
+
+    summary.mean_velocity = float(np.mean(distance[timed] / duration[timed]))
+    summary.weighted_velocity = total_distance / total_duration
+    summary.mean_diffusion_coefficient = float(np.mean(distance[timed] ** 2 / (4.0 * duration[timed])))
+    summary.weighted_diffusion_coefficient = float((distance**2).sum() / (4.0 * total_duration))
+    return summary
+
+
+def dispersal_wavefront(branches: BranchDispersal, points: int = 100) -> WavefrontSeries:
+    """Sample the furthest lineage distance from the root on ``points`` evenly spaced times."""
+
+    if not 2 <= points <= MAX_WAVEFRONT_POINTS:
+        raise ValueError(f"points must be between 2 and {MAX_WAVEFRONT_POINTS}.")
+    intervals = branches.intervals
+    if branches.root_coordinate is None or not intervals.size:
+        return WavefrontSeries()
+
+    latest = float(intervals.end.max())
+    grid = np.linspace(0.0, latest, points)
+    root_latitude, root_longitude = branches.root_coordinate
+    furthest: list[Optional[float]] = []
+    for time in grid.tolist():
+        active = intervals.active(time)
+        if not active.size:
+            furthest.append(None)
+            continue
+        _, positions = intervals.positions(active, time)
+        furthest.append(float(haversine_km(root_latitude, root_longitude, positions[:, 0], positions[:, 1]).max()))
+
+    reached = np.maximum.accumulate(np.asarray([value or 0.0 for value in furthest]))
+    return WavefrontSeries(
+        time_from_root=grid.tolist(),
+        time_before_present=(latest - grid).tolist(),
+        max_distance_km=furthest,
+        wavefront_km=reached.tolist(),
+    )
+
+
+class DispersalAnalysisService:
+    """Compute dispersal statistics for a tree and persist per-branch values as CSV."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.analysis_dir = settings.data_dir / "analysis"
+        self.analysis_dir.mkdir(parents=True, exist_ok=True)
+
+    def analyse(self, cached: CachedTree, points: int = 100) -> DispersalAnalysisResult:
+        """Return the dispersal summary and wavefront of ``cached``.
+
+        Raises:
+            ValueError: If ``points`` is out of range.
+        """
+
+        branches = get_branch_dispersal(cached)
+        wavefront = dispersal_wavefront(branches, points)
+        summary = summarise_dispersal(branches)
+
+        analysis_id = uuid4().hex
+        output_dir = self.analysis_dir / analysis_id
+        output_dir.mkdir(parents=True, exist_ok=False)
+        self._write_dispersal_csv(output_dir, branches, get_columnar_tree(cached).ids)
+
+        return DispersalAnalysisResult(
+            analysis_id=analysis_id,
+            summary=summary,
+            wavefront=wavefront,
+            exports={"dispersal_csv": f"/api/analysis/discrete/{analysis_id}/dispersal.csv"},
+        )
+
+    @staticmethod
+    def _write_dispersal_csv(directory: Path, branches: BranchDispersal, ids: list[str]) -> None:
+        intervals = branches.intervals
+        path = directory / "dispersal.csv"
+        with path.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(
+                [
+                    "parent_id",
+                    "child_id",
+                    "start_time",
+                    "end_time",
+                    "duration",
+                    "distance_km",
+                    "velocity_km_per_time",
+                    "start_lat",
+                    "start_lon",
+                    "end_lat",
+                    "end_lon",
+                ]
+            )
+            for branch in range(intervals.size):
+                duration = float(branches.duration[branch])
+                distance = float(branches.distance_km[branch])
+                writer.writerow(
+                    [
+                        ids[intervals.parent[branch]],
+                        ids[intervals.child[branch]],
+                        f"{intervals.start[branch]:.6f}",
+                        f"{intervals.end[branch]:.6f}",
+                        f"{duration:.6f}",
+                        f"{distance:.6f}",
+                        f"{distance / duration:.6f}" if duration > 0 else "",
+                        f"{intervals.source[branch, 0]:.6f}",
+                        f"{intervals.source[branch, 1]:.6f}",
+                        f"{intervals.target[branch, 0]:.6f}",
+                        f"{intervals.target[branch, 1]:.6f}",
+                    ]
+                )
+
+
+@lru_cache(maxsize=1)
+def get_dispersal_analysis_service() -> DispersalAnalysisService:
+    """Return a cached service instance."""
+
+    return DispersalAnalysisService()
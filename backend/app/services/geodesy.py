@@ -0,0 +1,122 @@
+"""Great-circle distances and densified arcs, split at the antimeridian."""
+
+from __future__ import annotations
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Target spacing between arc vertices; the vertex count adapts to arc length.
+ARC_SEGMENT_KM = 100.0
+MAX_ARC_SEGMENTS = 128
+
+
+def haversine_km(
+    latitude1: np.ndarray,
+    longitude1: np.ndarray,
+    latitude2: np.ndarray,
+    longitude2: np.ndarray,
+) -> np.ndarray:
+    """Great-circle distance in kilometres between coordinate arrays (degrees)."""
+
+    phi1, phi2 = np.radians(latitude1), np.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2.0
+    half_dlambda = np.radians(np.asarray(longitude2) - np.asarray(longitude1)) / 2.0
+    chord = np.sin(half_dphi) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(half_dlambda) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(chord, 0.0, 1.0)))
+
+
+def great_circle_arcs(
+    source: np.ndarray,
+    target: np.ndarray,
+    segment_km: float = ARC_SEGMENT_KM,
+    max_segments: int = MAX_ARC_SEGMENTS,
+) -> list[list[np.ndarray]]:
+    """Densify the great circles from ``source`` to ``target`` rows of ``(lon, lat)``.
+
+    Every arc gets ``ceil(length / segment_km)`` segments (at least one, at
+    most ``max_segments``), interpolated with slerp on the unit sphere for all
+    arcs at once. Arcs crossing the antimeridian are split into parts that end
+    and restart at +/-180 degrees, as RFC 7946 recommends. Returns, per arc,
+    the list of its ``(k, 2)`` longitude/latitude parts.
+    """
+
+    source = np.asarray(source, dtype=np.float64).reshape(-1, 2)
+    target = np.asarray(target, dtype=np.float64).reshape(-1, 2)
+    count = source.shape[0]
+    if count == 0:
+        return []
+
+    lengths = haversine_km(source[:, 1], source[:, 0], target[:, 1], target[:, 0])
+    segments = np.clip(np.ceil(lengths / segment_km), 1, max_segments).astype(np.int64)
+    sizes = segments + 1
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    arc = np.repeat(np.arange(count), sizes)
+    fraction = (np.arange(offsets[-1]) - offsets[arc]) / segments[arc]
+
+    start, end = _unit_vectors(source), _unit_vectors(target)
+    omega = np.arccos(np.clip(np.einsum("ij,ij->i", start, end), -1.0, 1.0))
+    sin_omega = np.sin(omega)
+    stable = sin_omega > 1e-12
+    # Coincident or antipodal endpoints have no unique great circle; fall back to lerp.
+    weight_start = np.where(
+        stable[arc], np.sin((1.0 - fraction) * omega[arc]) / np.where(stable, sin_omega, 1.0)[arc], 1.0 - fraction
+    )
+    weight_end = np.where(
+        stable[arc], np.sin(fraction * omega[arc]) / np.where(stable, sin_omega, 1.0)[arc], fraction
+    )
+    points = weight_start[:, None] * start[arc] + weight_end[:, None] * end[arc]
+    points /= np.maximum(np.linalg.norm(points, axis=1, keepdims=True), 1e-15)
+    longitudes = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+    latitudes = np.degrees(np.arcsin(np.clip(points[:, 2], -1.0, 1.0)))
+    # Keep endpoints exact (and the poles' longitudes meaningful).
+    longitudes[offsets[:-1]], latitudes[offsets[:-1]] = source[:, 0], source[:, 1]
+    longitudes[offsets[1:] - 1], latitudes[offsets[1:] - 1] = target[:, 0], target[:, 1]
+
+    return _split_antimeridian(longitudes, latitudes, offsets)
+
+
+def _unit_vectors(coordinates: np.ndarray) -> np.ndarray:
+    longitudes, latitudes = np.radians(coordinates[:, 0]), np.radians(coordinates[:, 1])
+    cos_lat = np.cos(latitudes)
+    return np.column_stack([cos_lat * np.cos(longitudes), cos_lat * np.sin(longitudes), np.sin(latitudes)])
+
+
+def _split_antimeridian(
+    longitudes: np.ndarray,
+    latitudes: np.ndarray,
+    offsets: np.ndarray,
+) -> list[list[np.ndarray]]:
+    """Cut each arc wherever consecutive vertices jump by more than 180 degrees of longitude."""
+
+    step = np.diff(longitudes)
+    crossing = np.abs(step) > 180.0
+    crossing[offsets[1:-1] - 1] = False
+    cuts = np.flatnonzero(crossing)
+
+    if cuts.size:
+        # Unwrap the far vertex next to the near one and interpolate the latitude at +/-180.
+        near = longitudes[cuts]
+        far = longitudes[cuts + 1] - 360.0 * np.sign(step[cuts])
+        edge = 180.0 * np.sign(near)
+        ratio = (edge - near) / np.where(far != near, far - near, 1.0)
+        latitude = latitudes[cuts] + ratio * (latitudes[cuts + 1] - latitudes[cuts])
+        # Each cut adds the vertex ending the current part and the one starting the next.
+        insert_at = np.repeat(cuts + 1, 2)
+        longitudes = np.insert(longitudes, insert_at, np.column_stack([edge, -edge]).ravel())
+        latitudes = np.insert(latitudes, insert_at, np.repeat(latitude, 2))
+        shift = np.searchsorted(cuts, offsets, side="left") * 2
+        breaks = cuts + 2 * np.arange(cuts.size) + 2
+    else:
+        shift = np.zeros_like(offsets)
+        breaks = cuts
+
+    offsets = offsets + shift
+    coordinates = np.column_stack([longitudes, latitudes])
+    bounds = np.union1d(offsets, breaks).tolist()
+    parts_per_arc = np.diff(np.searchsorted(bounds, offsets)).tolist()
+    arcs: list[list[np.ndarray]] = []
+    position = 0
+    for parts in parts_per_arc:
+        arcs.append([coordinates[bounds[index] : bounds[index + 1]] for index in range(position, position + parts)])
+        position += parts
+    return arcs
@@ -0,0 +1,267 @@
+"""HPD uncertainty polygons built from BEAST ``<trait>1_<level>%HPD_<n>`` annotations."""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from .columnar import TraitColumns, get_columnar_tree, get_trait_columns
+from .single_flight import get_single_flight
+from .tree_service import CachedTree
+
+HPD_KEY_PATTERN = re.compile(r"^(?P<prefix>.+?)1_(?P<level>\d+(?:\.\d+)?)%HPD_(?P<index>\d+)$")
+DEFAULT_TOLERANCE = 0.01
+MAX_SLICES = 200
+# Tolerances are snapped down to these steps (degrees) so clients cannot mint
+# an unbounded number of distinct renders.
+TOLERANCE_STEPS = (0.0, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Rendered collections kept per tree, least recently used first out.
+MAX_CACHED_RENDERS = 8
+
+
+@dataclass(frozen=True)
+class HPDLevel:
+    """Valid per-node HPD geometries (all contours of a node unioned) for one level."""
+
+    positions: np.ndarray
+    geometries: np.ndarray
+    vertex_count: int
+
+
+@dataclass(frozen=True)
+class HPDRegions:
+    levels: dict[str, HPDLevel]
+
+    def resolve_level(self, level: Optional[str]) -> str:
+        """Return ``level`` (e.g. ``"80"``) or the highest available one.
+
+        Raises:
+            ValueError: If the tree has no HPD annotations or lacks ``level``.
+        """
+
+        if not self.levels:
+            raise ValueError("The tree has no HPD region annotations (e.g. location1_80%HPD_1).")
+        if level is None:
+            return max(self.levels, key=float)
+        normalised = level.rstrip("%")
+        if normalised not in self.levels:
+            raise ValueError(
+                f"HPD level '{level}' not found; available: {', '.join(sorted(self.levels, key=float))}."
+            )
+        return normalised
+
+
+@dataclass
+class _RenderCache:
+    renders: OrderedDict[str, dict[str, Any]] = field(default_factory=OrderedDict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def get(self, key: str, build: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        with self.lock:
+            if key in self.renders:
+                self.renders.move_to_end(key)
+                return self.renders[key]
+        value = build()
+        with self.lock:
+            self.renders[key] = value
+            self.renders.move_to_end(key)
+            while len(self.renders) > MAX_CACHED_RENDERS:
+                self.renders.popitem(last=False)
+        return value
+
+
+def snap_tolerance(tolerance: float) -> float:
+    """Return the largest of ``TOLERANCE_STEPS`` not above ``tolerance``.
+
+    Raises:
+        ValueError: For a negative or non-finite tolerance.
+    """
+
+    if not math.isfinite(tolerance) or tolerance < 0:
+        raise ValueError("tolerance must be a finite, non-negative number.")
+    return TOLERANCE_STEPS[bisect_right(TOLERANCE_STEPS, tolerance) - 1]
+
+
+def _coordinates(value: Any) -> Optional[np.ndarray]:
+    if not isinstance(value, (list, tuple)) or len(value) < 3:
+        return None
+    try:
+        return np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_hpd_regions(traits: TraitColumns) -> HPDRegions:
+    """Build one valid geometry per node and HPD level.
+
+    Rings are assembled with ``shapely.from_ragged_array`` and repaired with a
+    zero-width buffer (BEAST contours may self-intersect); a node with several
+    contours gets their union.
+    """
+
+    # shapely is only needed here, so it is imported on first use rather than at startup.
+    import shapely  # noqa: PLC0415
+
+    rings: dict[str, list[np.ndarray]] = {}
+    owners: dict[str, list[int]] = {}
+    for key in traits.names:
+        match = HPD_KEY_PATTERN.match(key)
+        if match is None:
+            continue
+        companion = f"{match['prefix']}2_{match['level']}%HPD_{match['index']}"
+        for position, (value, other) in enumerate(zip(traits.decode(key), traits.decode(companion))):
+            latitudes = _coordinates(value)
+            longitudes = _coordinates(other)
+            if latitudes is None or longitudes is None or latitudes.size != longitudes.size:
+                continue
+            ring = np.column_stack([longitudes, latitudes])
+            rings.setdefault(match["level"], []).append(np.vstack([ring, ring[:1]]))
+            owners.setdefault(match["level"], []).append(position)
+
+    levels: dict[str, HPDLevel] = {}
+    for level, level_rings in rings.items():
+        ring_sizes = np.fromiter((ring.shape[0] for ring in level_rings), dtype=np.int64)
+        ring_offsets = np.concatenate(([0], np.cumsum(ring_sizes)))
+        polygon_offsets = np.arange(len(level_rings) + 1)
+        polygons = shapely.from_ragged_array(
+            shapely.GeometryType.POLYGON,
+            np.concatenate(level_rings),
+            (ring_offsets, polygon_offsets),
+        )
+        polygons = shapely.buffer(polygons, 0)
+
+        ring_owners = np.asarray(owners[level], dtype=np.int64)
+        positions, first, counts = np.unique(ring_owners, return_index=True, return_counts=True)
+        geometries = polygons[first]
+        for row in np.flatnonzero(counts > 1).tolist():
+            geometries[row] = shapely.union_all(polygons[ring_owners == positions[row]])
+        keep = ~shapely.is_empty(geometries)
+        levels[level] = HPDLevel(
+            positions=positions[keep],
+            geometries=geometries[keep],
+            vertex_count=int(shapely.get_num_coordinates(geometries[keep]).sum()),
+        )
+    return HPDRegions(levels=levels)
+
+
+def get_hpd_regions(cached: CachedTree) -> HPDRegions:
+    """Return the HPD geometries of ``cached``, built once per parsed tree."""
+
+    return cached.derived("hpd_regions", lambda: build_hpd_regions(get_trait_columns(cached)))
+
+
+def hpd_geojson(
+    cached: CachedTree,
+    level: Optional[str] = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+    slices: int = 10,
+    merge: bool = True,
+) -> dict[str, Any]:
+    """Return a GeoJSON FeatureCollection of simplified HPD regions.
+
+    With ``merge`` the nodes are binned into ``slices`` equal time slices
+    (time from root) and the regions of each slice are unioned into one
+    feature; otherwise every node keeps its own simplified feature.
+    ``tolerance`` is snapped down to one of ``TOLERANCE_STEPS``, and the last
+    ``MAX_CACHED_RENDERS`` rendered collections are cached with the tree.
+
+    Raises:
+        ValueError: For an unknown level, a negative or non-finite tolerance or
+            a bad slice count.
+    """
+
+    regions = get_hpd_regions(cached)
+    resolved = regions.resolve_level(level)
+    tolerance = snap_tolerance(tolerance)
+    if merge and not 1 <= slices <= MAX_SLICES:
+        raise ValueError(f"slices must be between 1 and {MAX_SLICES}.")
+
+    key = f"{resolved}:{tolerance}:{slices if merge else 'nodes'}"
+    renders = cached.derived("hpd_geojson_renders", _RenderCache)
+    return renders.get(
+        key,
+        lambda: get_single_flight("hpd_geojson").do(
+            (cached.signature, key),
+            lambda: _render(cached, regions.levels[resolved], resolved, tolerance, slices, merge),
+        ),
+    )
+
+
+def _render(
+    cached: CachedTree,
+    regions: HPDLevel,
+    level: str,
+    tolerance: float,
+    slices: int,
+    merge: bool,
+) -> dict[str, Any]:
+    import shapely  # noqa: PLC0415
+    from shapely.geometry import mapping  # noqa: PLC0415
+
+    tree = get_columnar_tree(cached)
+    times = tree.time_from_root[regions.positions]
+    latest = float(tree.time_from_root.max(initial=0.0))
+    features: list[dict[str, Any]] = []
+
+    if merge:
+        width = latest / slices if latest > 0 else 1.0
+        bins = np.minimum((times / width).astype(np.int64), slices - 1)
+        merged = [
+            (index, np.flatnonzero(bins == index)) for index in range(slices) if np.any(bins == index)
+        ]
+        unions = np.empty(len(merged), dtype=object)
+        unions[:] = [shapely.union_all(regions.geometries[members]) for _, members in merged]
+        geometries = shapely.simplify(unions, tolerance, preserve_topology=True)
+        for (index, members), geometry in zip(merged, geometries):
+            start, end = index * width, min((index + 1) * width, latest)
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": mapping(geometry),
+                    "properties": {
+                        "level": level,
+                        "slice": index,
+                        "start_from_root": start,
+                        "end_from_root": end,
+                        "start_before_present": latest - start,
+                        "end_before_present": latest - end,
+                        "node_count": int(members.size),
+                    },
+                }
+            )
+    else:
+        geometries = shapely.simplify(regions.geometries, tolerance, preserve_topology=True)
+        for position, geometry in zip(regions.positions.tolist(), geometries):
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": mapping(geometry),
+                    "properties": {
+                        "level": level,
+                        "node_id": tree.ids[position],
+                        "label": tree.labels[position],
+                        "time_from_root": float(tree.time_from_root[position]),
+                        "time_before_present": float(tree.time_before_present[position]),
+                    },
+                }
+            )
+
+    served = int(sum(shapely.get_num_coordinates(geometries).tolist())) if len(geometries) else 0
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "properties": {
+            "level": level,
+            "tolerance": tolerance,
+            "node_count": int(regions.positions.size),
+            "raw_vertex_count": regions.vertex_count,
+            "vertex_count": served,
+        },
+    }
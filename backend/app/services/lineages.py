@@ -0,0 +1,114 @@
+"""Lineages-through-time curves, overall and per inferred location state."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..models.lineages import LineagesThroughTimeResult
+from .columnar import get_columnar_tree
+from .node_states import get_node_states
+from .tree_service import CachedTree
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 10_000
+
+
+@dataclass(frozen=True)
+class BranchEvents:
+    """Sorted branch birth/death times (``time_from_root``) for one group of branches.
+
+    Tip branches are kept apart from internal ones because a sampled lineage
+    still counts at its sampling time, whereas an internal branch has already
+    split into its children at the node time.
+    """
+
+    starts: np.ndarray
+    internal_ends: np.ndarray
+    tip_ends: np.ndarray
+
+    def count(self, times: np.ndarray) -> np.ndarray:
+        born = np.searchsorted(self.starts, times, side="right")
+        split = np.searchsorted(self.internal_ends, times, side="right")
+        sampled = np.searchsorted(self.tip_ends, times, side="left")
+        return born - split - sampled
+
+
+@dataclass(frozen=True)
+class LineageIndex:
+    overall: BranchEvents
+    by_state: dict[str, BranchEvents]
+    root_height: float
+
+
+def _events(starts: np.ndarray, ends: np.ndarray, is_tip: np.ndarray) -> BranchEvents:
+    return BranchEvents(
+        starts=np.sort(starts),
+        internal_ends=np.sort(ends[~is_tip]),
+        tip_ends=np.sort(ends[is_tip]),
+    )
+
+
+def get_lineage_index(cached: CachedTree) -> LineageIndex:
+    """Return sorted branch events of ``cached``, built once per parsed tree."""
+
+    def build() -> LineageIndex:
+        tree = get_columnar_tree(cached)
+        states = get_node_states(cached)
+        children = np.flatnonzero(tree.parent >= 0)
+        starts = tree.time_from_root[tree.parent[children]]
+        ends = tree.time_from_root[children]
+        is_tip = tree.is_tip[children]
+        # A branch carries the state inferred for the node it leads to.
+        codes = states.codes[children]
+        by_state = {
+            state: _events(starts[codes == code], ends[codes == code], is_tip[codes == code])
+            for code, state in enumerate(states.states)
+            if np.any(codes == code)
+        }
+        return LineageIndex(
+            overall=_events(starts, ends, is_tip),
+            by_state=by_state,
+            root_height=float(tree.time_from_root.max(initial=0.0)),
+        )
+
+    return cached.derived("lineage_index", build)
+
+
+def lineages_through_time(
+    index: LineageIndex,
+    times: Optional[Sequence[float]] = None,
+    points: int = DEFAULT_POINTS,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    by_state: bool = True,
+) -> LineagesThroughTimeResult:
+    """Count lineages alive at each time (``time_from_root``, root = 0).
+
+    Either pass explicit ``times`` or a regular grid of ``points`` between
+    ``start`` (default: root) and ``end`` (default: most recent tip).
+    """
+
+    if times is not None:
+        grid = np.asarray(sorted(times), dtype=np.float64)
+        if grid.size > MAX_POINTS:
+            raise ValueError(f"At most {MAX_POINTS} time points can be requested.")
+    else:
+        if not 2 <= points <= MAX_POINTS:
+            raise ValueError(f"points must be between 2 and {MAX_POINTS}.")
+        low = 0.0 if start is None else float(start)
+        high = index.root_height if end is None else float(end)
+        if high < low:
+            raise ValueError("end must not precede start.")
+        grid = np.linspace(low, high, points)
+
+    return LineagesThroughTimeResult(
+        time_from_root=grid.tolist(),
+        time_before_present=(index.root_height - grid).tolist(),
+        lineages=index.overall.count(grid).tolist(),
+        by_state={state: events.count(grid).tolist() for state, events in index.by_state.items()}
+        if by_state
+        else {},
+    )
@@ -0,0 +1,270 @@
+"""Spatial index over discrete-analysis ``map.geojson`` files for viewport queries."""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..core.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+from .single_flight import get_single_flight
+from .tree_service import file_signature
+
+if TYPE_CHECKING:
+    from shapely import STRtree
+
+MAX_CACHED_INDEXES = 16
+DEFAULT_FEATURE_LIMIT = 5000
+TILE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class MapFeatureIndex:
+    """The features of one ``map.geojson`` with an STRtree over their geometries.
+
+    Features are stored by descending weight (points weigh ancestral plus tip
+    weight, lines their transition weight), so the heaviest matches come first.
+    """
+
+    signature: tuple[str, int, int]
+    features: list[dict[str, Any]]
+    geometries: np.ndarray
+    weights: np.ndarray
+    tree: STRtree
+
+    def query(self, boxes: list[tuple[float, float, float, float]], min_weight: float = 0.0) -> np.ndarray:
+        """Return positions of features intersecting any box with ``weight >= min_weight``, heaviest first."""
+
+        if not self.features:
+            return np.empty(0, dtype=np.int64)
+        import shapely  # noqa: PLC0415
+        _, hits = self.tree.query(shapely.box(*np.asarray(boxes, dtype=np.float64).T), predicate="intersects")
+        positions = np.unique(hits)
+        return positions[self.weights[positions] >= min_weight]
+
+
+def _feature_weight(properties: dict[str, Any]) -> float:
+    if "weight" in properties:
+        return float(properties.get("weight") or 0.0)
+    return float(properties.get("ancestral_weight") or 0.0) + float(properties.get("tip_weight") or 0.0)
+
+
+def _geometries(features: list[dict[str, Any]]) -> np.ndarray:
+    """Build shapely geometries, constructing points and lines from coordinate arrays in bulk."""
+
+    # shapely is only needed once a map is queried, so it is imported on first use rather than at startup.
+    import shapely  # noqa: PLC0415
+
+    geometries = np.empty(len(features), dtype=object)
+    kinds = [feature["geometry"].get("type") for feature in features]
+    points = [position for position, kind in enumerate(kinds) if kind == "Point"]
+    if points:
+        coordinates = np.asarray(
+            [features[position]["geometry"]["coordinates"][:2] for position in points], dtype=np.float64
+        )
+        geometries[points] = shapely.points(coordinates)
+    lines = [position for position, kind in enumerate(kinds) if kind == "LineString"]
+    if lines:
+        rings = [
+            np.asarray(features[position]["geometry"]["coordinates"], dtype=np.float64)[:, :2] for position in lines
+        ]
+        sizes = np.fromiter((ring.shape[0] for ring in rings), dtype=np.int64, count=len(rings))
+        geometries[lines] = shapely.linestrings(np.concatenate(rings), indices=np.repeat(np.arange(len(rings)), sizes))
+    others = [position for position, kind in enumerate(kinds) if kind not in {"Point", "LineString"}]
+    if others:
+        geometries[others] = shapely.from_geojson([json.dumps(features[position]["geometry"]) for position in others])
+    return geometries
+
+
+def build_map_feature_index(path: Path) -> MapFeatureIndex:
+    """Load a FeatureCollection and index its geometries."""
+
+    from shapely import STRtree  # noqa: PLC0415
+
+    signature = file_signature(path)
+    with path.open("r", encoding="utf-8") as handle:
+        collection = json.load(handle)
+
+    features = [feature for feature in collection.get("features") or [] if feature.get("geometry")]
+    weights = np.fromiter(
+        (_feature_weight(feature.get("properties") or {}) for feature in features),
+        dtype=np.float64,
+        count=len(features),
+    )
+    order = np.argsort(-weights, kind="stable")
+    features = [features[position] for position in order.tolist()]
+    weights = weights[order]
+    geometries = _geometries(features)
+    return MapFeatureIndex(
+        signature=signature,
+        features=features,
+        geometries=geometries,
+        weights=weights,
+        tree=STRtree(geometries),
+    )
+
+
+def parse_bbox(bbox: str) -> list[tuple[float, float, float, float]]:
+    """Parse ``west,south,east,north`` into one or two boxes within [-180, 180].
+
+    Leaflet's ``toBBoxString()`` yields this order. Longitudes outside the
+    range (wrapped world copies) are shifted back, and a box crossing the
+    antimeridian (``west > east`` or past 180) is split in two.
+
+    Raises:
+        ValueError: If the string is not four finite numbers with south <= north.
+    """
+
+    try:
+        west, south, east, north = (float(part) for part in bbox.split(","))
+    except ValueError as exc:
+        raise ValueError("bbox must be 'west,south,east,north' in degrees.") from exc
+    if not all(math.isfinite(value) for value in (west, south, east, north)) or south > north:
+        raise ValueError("bbox must be 'west,south,east,north' in degrees.")
+
+    south, north = max(south, -90.0), min(north, 90.0)
+    width = east - west if east >= west else east + 360.0 - west
+    if width >= 360.0:
+        return [(-180.0, south, 180.0, north)]
+    west = (west + 180.0) % 360.0 - 180.0
+    east = west + width
+    if east <= 180.0:
+        return [(west, south, east, north)]
+    return [(west, south, 180.0, north), (-180.0, south, east - 360.0, north)]
+
+
+def pixel_degrees(zoom: float) -> float:
+    """Return the width of one screen pixel in degrees of longitude at ``zoom``."""
+
+    return 360.0 / (TILE_SIZE * 2.0 ** zoom)
+
+
+class MapFeatureService:
+    """Serve bbox-filtered features of stored analyses from cached spatial indexes."""
+
+    def __init__(self) -> None:
+        self.analysis_dir = get_settings().data_dir / "analysis"
+        self._indexes: OrderedDict[str, MapFeatureIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve_path(self, analysis_id: str, artifact: str = "map.geojson") -> Path:
+        if not analysis_id or Path(analysis_id).name != analysis_id or analysis_id in {".", ".."}:
+            raise ValueError("Invalid analysis id.")
+        path = self.analysis_dir / analysis_id / artifact
+        if not path.is_file():
+            raise FileNotFoundError(f"No {artifact} for analysis '{analysis_id}'.")
+        return path
+
+    def get_index(self, analysis_id: str) -> MapFeatureIndex:
+        """Return the index for ``analysis_id``, rebuilding it if the file changed.
+
+        Raises:
+            ValueError: For a malformed analysis id.
+            FileNotFoundError: If the analysis has no ``map.geojson``.
+        """
+
+        path = self.resolve_path(analysis_id)
+        signature = file_signature(path)
+        with self._lock:
+            index = self._indexes.get(analysis_id)
+            if index is not None and index.signature == signature:
+                self._indexes.move_to_end(analysis_id)
+                CACHE_HITS.inc(cache="map_feature_index")
+                return index
+        CACHE_MISSES.inc(cache="map_feature_index")
+
+        index = get_single_flight("map_feature_index").do(signature, lambda: build_map_feature_index(path))
+        with self._lock:
+            self._indexes[analysis_id] = index
+            self._indexes.move_to_end(analysis_id)
+            while len(self._indexes) > MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache="map_feature_index")
+        return index
+
+    def features(
+        self,
+        analysis_id: str,
+        bbox: Optional[str] = None,
+        zoom: Optional[float] = None,
+        min_weight: float = 0.0,
+        limit: Optional[int] = DEFAULT_FEATURE_LIMIT,
+    ) -> dict[str, Any]:
+        """Return a FeatureCollection of the features visible in ``bbox``.
+
+        With ``zoom`` set, lines shorter than a pixel are dropped and
+        coordinates are rounded to the pixel size. At most ``limit`` features
+        are returned, heaviest first.
+
+        Raises:
+            ValueError: For a malformed id, bbox, zoom or limit.
+            FileNotFoundError: If the analysis has no ``map.geojson``.
+        """
+
+        if zoom is not None and not 0 <= zoom <= 30:
+            raise ValueError("zoom must be between 0 and 30.")
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative.")
+        boxes = parse_bbox(bbox) if bbox else [(-180.0, -90.0, 180.0, 90.0)]
+        index = self.get_index(analysis_id)
+        positions = index.query(boxes, min_weight=min_weight)
+
+        digits: Optional[int] = None
+        if zoom is not None and positions.size:
+            import shapely  # noqa: PLC0415
+
+            pixel = pixel_degrees(zoom)
+            geometries = index.geometries[positions]
+            is_line = shapely.get_type_id(geometries) != 0
+            bounds = shapely.bounds(geometries[is_line])
+            extent = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+            visible = np.ones(positions.size, dtype=bool)
+            visible[is_line] = extent >= pixel
+            positions = positions[visible]
+            digits = max(0, math.ceil(-math.log10(pixel)) + 1)
+
+        matched = int(positions.size)
+        if limit is not None:
+            positions = positions[:limit]
+        features = [
+            _rounded(index.features[position], digits) if digits is not None else index.features[position]
+            for position in positions.tolist()
+        ]
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "properties": {
+                "analysis_id": analysis_id,
+                "total_features": len(index.features),
+                "matched": matched,
+                "returned": len(features),
+                "truncated": len(features) < matched,
+            },
+        }
+
+
+def _round_coordinates(coordinates: Any, digits: int) -> Any:
+    if coordinates and isinstance(coordinates[0], (list, tuple)):
+        return [_round_coordinates(item, digits) for item in coordinates]
+    return [round(float(value), digits) for value in coordinates]
+
+
+def _rounded(feature: dict[str, Any], digits: int) -> dict[str, Any]:
+    geometry = feature["geometry"]
+    coordinates = _round_coordinates(geometry["coordinates"], digits)
+    return {**feature, "geometry": {"type": geometry["type"], "coordinates": coordinates}}
+
+
+@lru_cache(maxsize=1)
+def get_map_feature_service() -> MapFeatureService:
+    """Return a cached service instance."""
+
+    return MapFeatureService()
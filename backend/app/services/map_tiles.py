@@ -0,0 +1,298 @@
+"""Mapbox Vector Tiles (z/x/y) rendered lazily from analysis map features and cached on disk."""
+
+from __future__ import annotations
+
+import math
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+import numpy as np
+
+from ..core.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+from .map_features import MAX_CACHED_INDEXES, MapFeatureIndex, get_map_feature_service
+
+if TYPE_CHECKING:
+    from shapely import STRtree
+
+TILE_EXTENT = 4096
+# Extra margin around each tile (in tile units) so strokes are not cut at tile edges.
+TILE_BUFFER = 64
+MAX_TILE_ZOOM = 22
+# Weight-based thinning: zoom z keeps the heaviest BASE_FEATURES * 4**z features
+# of each layer, i.e. roughly BASE_FEATURES per tile however dense the data.
+BASE_FEATURES = 512
+MAX_TILE_FEATURES = 4096
+# Per-zoom simplification tolerance, in tile units.
+SIMPLIFY_UNITS = 1.0
+MAX_LATITUDE = 85.0511287798066
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+LAYER_POINTS = "locations"
+LAYER_LINES = "paths"
+
+
+def project_mercator(coordinates: np.ndarray) -> np.ndarray:
+    """Project ``(lon, lat)`` rows to Web Mercator world units in ``[0, 1]`` (y down)."""
+
+    longitudes = coordinates[:, 0]
+    latitudes = np.radians(np.clip(coordinates[:, 1], -MAX_LATITUDE, MAX_LATITUDE))
+    x = (longitudes + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(latitudes) + 1.0 / np.cos(latitudes)) / math.pi) / 2.0
+    return np.column_stack([x, y])
+
+
+@dataclass(frozen=True)
+class TileLayerIndex:
+    """Projected geometries of one layer, heaviest first, with their STRtree."""
+
+    name: str
+    geometries: np.ndarray
+    properties: list[dict[str, Any]]
+    tree: STRtree
+
+    def visible(self, zoom: int, bounds: tuple[float, float, float, float]) -> np.ndarray:
+        """Positions intersecting ``bounds`` among the features kept at ``zoom``, heaviest first."""
+
+        if not self.properties:
+            return np.empty(0, dtype=np.int64)
+        import shapely  # noqa: PLC0415
+        positions = np.sort(self.tree.query(shapely.box(*bounds), predicate="intersects"))
+        positions = positions[positions < BASE_FEATURES * 4**zoom]
+        return positions[:MAX_TILE_FEATURES]
+
+
+@dataclass(frozen=True)
+class TileIndex:
+    signature: tuple[str, int, int]
+    layers: list[TileLayerIndex]
+
+
+def build_tile_index(index: MapFeatureIndex) -> TileIndex:
+    """Split the features into point and line layers and project them once."""
+
+    # shapely is only needed once tiles are served, so it is imported on first use rather than at startup.
+    import shapely  # noqa: PLC0415
+    from shapely import STRtree  # noqa: PLC0415
+
+    type_ids = shapely.get_type_id(index.geometries) if index.features else np.empty(0, dtype=np.int64)
+    layers = []
+    for name, kinds in ((LAYER_LINES, (1, 5)), (LAYER_POINTS, (0, 4))):
+        # ``index`` is sorted by descending weight, so the selection stays heaviest first.
+        positions = np.flatnonzero(np.isin(type_ids, kinds))
+        geometries = shapely.transform(index.geometries[positions], project_mercator)
+        layers.append(
+            TileLayerIndex(
+                name=name,
+                geometries=geometries,
+                properties=[index.features[position].get("properties") or {} for position in positions.tolist()],
+                tree=STRtree(geometries),
+            )
+        )
+    return TileIndex(signature=index.signature, layers=layers)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited protobuf field."""
+
+    return _varint((number << 3) | 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def _packed(number: int, values: Iterable[int]) -> bytes:
+    return _field(number, b"".join(_varint(value) for value in values))
+
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int) and -(2**63) <= value < 2**63:
+        return _uint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _varint((3 << 3) | 1) + struct.pack("<d", value)
+    return _field(1, str(value).encode("utf-8"))
+
+
+def _geometry_commands(parts: list[np.ndarray]) -> list[int]:
+    """Encode integer tile-coordinate parts as MVT MoveTo/LineTo commands."""
+
+    commands: list[int] = []
+    cursor_x = cursor_y = 0
+    if parts and parts[0].shape[0] == 1 and all(part.shape[0] == 1 for part in parts):
+        commands.append(1 | (len(parts) << 3))
+        for part in parts:
+            x, y = int(part[0, 0]), int(part[0, 1])
+            commands.extend((_zigzag(x - cursor_x), _zigzag(y - cursor_y)))
+            cursor_x, cursor_y = x, y
+        return commands
+    for part in parts:
+        x, y = int(part[0, 0]), int(part[0, 1])
+        commands.extend((1 | (1 << 3), _zigzag(x - cursor_x), _zigzag(y - cursor_y)))
+        cursor_x, cursor_y = x, y
+        commands.append(2 | ((part.shape[0] - 1) << 3))
+        for x, y in part[1:].tolist():
+            commands.extend((_zigzag(x - cursor_x), _zigzag(y - cursor_y)))
+            cursor_x, cursor_y = x, y
+    return commands
+
+
+def _encode_layer(layer: TileLayerIndex, zoom: int, x: int, y: int) -> bytes:
+    scale = float(2**zoom)
+    margin = TILE_BUFFER / TILE_EXTENT
+    bounds = ((x - margin) / scale, (y - margin) / scale, (x + 1 + margin) / scale, (y + 1 + margin) / scale)
+    positions = layer.visible(zoom, bounds)
+    if not positions.size:
+        return b""
+
+    import shapely  # noqa: PLC0415
+    geometries = shapely.clip_by_rect(layer.geometries[positions], *bounds)
+    tolerance = SIMPLIFY_UNITS / (scale * TILE_EXTENT)
+    geometries = shapely.simplify(geometries, tolerance, preserve_topology=False)
+
+    keys: dict[str, int] = {}
+    values: dict[tuple[type, Any], int] = {}
+    encoded_features = []
+    is_point_layer = layer.name == LAYER_POINTS
+    for position, geometry in zip(positions.tolist(), geometries):
+        if geometry is None or shapely.is_empty(geometry):
+            continue
+        parts = []
+        for part in shapely.get_parts(geometry):
+            local = shapely.get_coordinates(part)
+            local = np.rint((local * scale - (x, y)) * TILE_EXTENT).astype(np.int64)
+            if not is_point_layer:
+                keep = np.ones(local.shape[0], dtype=bool)
+                keep[1:] = np.any(local[1:] != local[:-1], axis=1)
+                local = local[keep]
+                if local.shape[0] < 2:
+                    continue
+            parts.append(local)
+        if not parts:
+            continue
+
+        tags: list[int] = []
+        for key, value in layer.properties[position].items():
+            if value is None or isinstance(value, (list, dict)):
+                continue
+            if isinstance(value, float) and not math.isfinite(value):
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        encoded_features.append(
+            _uint_field(1, position + 1)
+            + _packed(2, tags)
+            + _uint_field(3, 1 if is_point_layer else 2)
+            + _packed(4, _geometry_commands(parts))
+        )
+
+    if not encoded_features:
+        return b""
+    body = [_uint_field(15, 2), _field(1, layer.name.encode("utf-8"))]
+    body.extend(_field(2, feature) for feature in encoded_features)
+    body.extend(_field(3, key.encode("utf-8")) for key in keys)
+    body.extend(_field(4, _encode_value(value)) for _, value in values)
+    body.append(_uint_field(5, TILE_EXTENT))
+    return _field(3, b"".join(body))
+
+
+def encode_tile(index: TileIndex, zoom: int, x: int, y: int) -> bytes:
+    """Encode the ``locations`` and ``paths`` layers of tile ``z/x/y`` (empty bytes if nothing shows)."""
+
+    return b"".join(_encode_layer(layer, zoom, x, y) for layer in index.layers)
+
+
+class MapTileService:
+    """Render vector tiles on first request and serve them from ``<analysis>/tiles`` afterwards."""
+
+    def __init__(self) -> None:
+        self._indexes: OrderedDict[str, TileIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tile_index(self, analysis_id: str) -> TileIndex:
+        features = get_map_feature_service().get_index(analysis_id)
+        with self._lock:
+            cached = self._indexes.get(analysis_id)
+            if cached is not None and cached.signature == features.signature:
+                self._indexes.move_to_end(analysis_id)
+                CACHE_HITS.inc(cache="map_tile_index")
+                return cached
+        CACHE_MISSES.inc(cache="map_tile_index")
+        built = build_tile_index(features)
+        with self._lock:
+            self._indexes[analysis_id] = built
+            self._indexes.move_to_end(analysis_id)
+            # Every analysis gets a new id, so unbounded indexes would leak.
+            while len(self._indexes) > MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache="map_tile_index")
+        return built
+
+    def tile(self, analysis_id: str, zoom: int, x: int, y: int) -> bytes:
+        """Return the encoded tile, generating and caching it on disk if needed.
+
+        Raises:
+            ValueError: For a malformed analysis id or tile address.
+            FileNotFoundError: If the analysis has no ``map.geojson``.
+        """
+
+        if not 0 <= zoom <= MAX_TILE_ZOOM:
+            raise ValueError(f"zoom must be between 0 and {MAX_TILE_ZOOM}.")
+        if not (0 <= x < 2**zoom and 0 <= y < 2**zoom):
+            raise ValueError(f"Tile {zoom}/{x}/{y} is outside the tile grid.")
+
+        source = get_map_feature_service().resolve_path(analysis_id)
+        index = self._tile_index(analysis_id)
+        root = source.parent / "tiles"
+        # Tiles are keyed by the source file version; stale versions are dropped.
+        version = f"{index.signature[1]}-{index.signature[2]}"
+        path = root / version / str(zoom) / str(x) / f"{y}.mvt"
+        if path.is_file():
+            return path.read_bytes()
+
+        data = encode_tile(index, zoom, x, y)
+        _prune_versions(root, keep=version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        return data
+
+
+def _prune_versions(root: Path, keep: str) -> None:
+    if not root.is_dir():
+        return
+    for entry in root.iterdir():
+        if entry.name != keep and entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+@lru_cache(maxsize=1)
+def get_map_tile_service() -> MapTileService:
+    """Return a cached service instance."""
+
+    return MapTileService()
@@ -1,42 +1,30 @@
-"""Build state-transition matrices directly from MCC tree payloads."""
+"""Build state-transition matrices from the inferred best state of every node."""
 
 from __future__ import annotations
 
 from collections import Counter
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import pandas as pd
+import numpy as np
 
-from ..models.tree import TreePayload
-from .discrete_analysis import DiscreteAnalysisService, get_discrete_analysis_service
-from .tree_service import get_tree_service
+from .columnar import ColumnarTree, get_columnar_tree
+from .node_states import NodeStates, get_node_states
+from .tree_service import CachedTree, get_tree_service
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def _infer_best_states(payload: TreePayload) -> dict[str, str]:
-    """Infer the most likely discrete state for every node in the tree."""
 
-    analysis_service = get_discrete_analysis_service()
-    best_states: dict[str, str] = {}
-
-    for node in payload.nodes:
-        distribution = analysis_service._extract_location_distribution(node.traits)
-        normalised = DiscreteAnalysisService._normalise_distribution(distribution)
-        state, _ = DiscreteAnalysisService._best_state(normalised)
-        best_states[node.id] = state
-
-    return best_states
-
-
-def _count_transitions(payload: TreePayload, states: dict[str, str]) -> Counter[tuple[str, str]]:
+def _count_transitions(tree: ColumnarTree, states: NodeStates) -> Counter[tuple[str, str]]:
     """Count transitions between inferred parent/child states across the tree."""
 
     transitions: Counter[tuple[str, str]] = Counter()
+    children = np.flatnonzero(tree.parent >= 0)
+    parent_codes = states.codes[tree.parent[children]].tolist()
+    child_codes = states.codes[children].tolist()
 
-    for edge in payload.edges:
-        src = states.get(edge.parent_id)
-        dst = states.get(edge.child_id)
-        if not src or not dst:
-            continue
+    for parent_code, child_code in zip(parent_codes, child_codes):
+        src, dst = states.states[parent_code], states.states[child_code]
         if src == dst or src == "Unknown" or dst == "Unknown":
             continue
         transitions[(src, dst)] += 1
@@ -44,13 +32,15 @@ def _count_transitions(payload: TreePayload, states: dict[str, str]) -> Counter[
     return transitions
 
 
-def build_migration_matrix(filename: Optional[str] = None) -> pd.DataFrame:
+def build_migration_matrix(filename: Optional[str] = None, reconstruction: Optional[str] = None) -> pd.DataFrame:
     """Compute a migration matrix for the requested MCC tree file.
 
     Args:
         filename: Optional MCC tree filename previously stored server-side. When
             omitted, the default tree configured via ``LOCALPHYLOGEO_TREE_PATH``
             is used.
+        reconstruction: Optional ``"parsimony"`` or ``"ml"`` to reconstruct the
+            states of nodes lacking location annotations instead of dropping them.
 
     Returns:
         A pandas ``DataFrame`` whose rows denote source states and columns denote
@@ -58,10 +48,26 @@ def build_migration_matrix(filename: Optional[str] = None) -> pd.DataFrame:
     """
 
     tree_service = get_tree_service()
-    payload = tree_service.load_tree(filename)
+    return get_migration_matrix(tree_service.load_cached(filename), reconstruction).copy()
+
+
+def get_migration_matrix(cached: CachedTree, reconstruction: Optional[str] = None) -> pd.DataFrame:
+    """Return the migration matrix of ``cached``, built once per parsed tree and reconstruction.
+
+    The cached frame is shared; callers that modify it must copy it first.
+    """
+
+    return cached.derived(
+        f"migration_matrix:{reconstruction or 'annotated'}",
+        lambda: _matrix_from_states(get_columnar_tree(cached), get_node_states(cached, reconstruction)),
+    )
+
+
+def _matrix_from_states(tree: ColumnarTree, states: NodeStates) -> pd.DataFrame:
+    # pandas is only needed here, so it is imported on first use rather than at startup.
+    import pandas as pd  # noqa: PLC0415
 
-    best_states = _infer_best_states(payload)
-    transition_counts = _count_transitions(payload, best_states)
+    transition_counts = _count_transitions(tree, states)
 
     if not transition_counts:
         return pd.DataFrame()
@@ -0,0 +1,69 @@
+"""Best discrete state of every node, encoded as integer codes."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .columnar import ColumnarTree, TraitColumns, get_columnar_tree, get_trait_columns
+from .discrete_analysis import DiscreteAnalysisService, get_discrete_analysis_service
+from .reconstruction import reconstruct_states
+from .tree_service import CachedTree
+
+
+@dataclass(frozen=True)
+class NodeStates:
+    """Per-node best state aligned with the columns of a :class:`ColumnarTree`.
+
+    ``codes[i]`` indexes into ``states`` and ``probabilities[i]`` is the
+    posterior of that state; nodes without annotations get ``"Unknown"``.
+    """
+
+    states: list[str]
+    codes: np.ndarray
+    probabilities: np.ndarray
+
+    def code_of(self, state: str) -> Optional[int]:
+        try:
+            return self.states.index(state)
+        except ValueError:
+            return None
+
+
+def build_node_states(
+    tree: ColumnarTree, traits: TraitColumns, reconstruction: Optional[str] = None
+) -> NodeStates:
+    """Pick the most probable state per node, as the discrete analysis does.
+
+    With ``reconstruction`` (``"parsimony"`` or ``"ml"``), nodes without a
+    location annotation get a reconstructed distribution instead of ``"Unknown"``,
+    exactly as :meth:`DiscreteAnalysisService.reconstruct_distributions` infers it.
+    """
+
+    analysis_service = get_discrete_analysis_service()
+    distributions = [analysis_service._extract_location_distribution(row) for row in traits.rows()]
+    if reconstruction:
+        normalised = [DiscreteAnalysisService._normalise_distribution(distribution) for distribution in distributions]
+        distributions = reconstruct_states(tree, normalised, method=reconstruction).distributions
+    lookup: dict[str, int] = {}
+    codes = np.empty(tree.size, dtype=np.int32)
+    probabilities = np.empty(tree.size, dtype=np.float64)
+
+    for position, distribution in enumerate(distributions):
+        normalised = DiscreteAnalysisService._normalise_distribution(distribution)
+        state, probability = DiscreteAnalysisService._best_state(normalised)
+        codes[position] = lookup.setdefault(state, len(lookup))
+        probabilities[position] = probability
+
+    return NodeStates(states=list(lookup), codes=codes, probabilities=probabilities)
+
+
+def get_node_states(cached: CachedTree, reconstruction: Optional[str] = None) -> NodeStates:
+    """Return the best states of ``cached``, inferring them once per parsed tree."""
+
+    key = f"node_states:{reconstruction}" if reconstruction else "node_states"
+    return cached.derived(
+        key, lambda: build_node_states(get_columnar_tree(cached), get_trait_columns(cached), reconstruction)
+    )
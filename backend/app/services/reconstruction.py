@@ -0,0 +1,263 @@
+"""Ancestral location reconstruction (Fitch parsimony and ML under symmetric Mk)."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .columnar import ColumnarTree
+
+RECONSTRUCTION_METHODS = ("parsimony", "ml")
+# Marginal probabilities below this are dropped from reconstructed distributions.
+MIN_PROBABILITY = 1e-3
+# Zero-length branches are floored so every transition stays strictly positive.
+MIN_BRANCH_FRACTION = 1e-9
+
+
+@dataclass(frozen=True)
+class Reconstruction:
+    """Per-node state distributions aligned with the columnar tree.
+
+    Annotated nodes keep their original distribution; ``inferred`` marks the
+    nodes whose distribution was reconstructed.
+    """
+
+    method: str
+    states: list[str]
+    distributions: list[dict[str, float]]
+    inferred: np.ndarray
+    parsimony_score: int
+    rate: Optional[float] = None
+    log_likelihood: Optional[float] = None
+
+
+def _children_of(tree: ColumnarTree, parents: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Gather the children of ``parents`` grouped by parent, with per-parent counts."""
+
+    starts = tree.child_start[parents]
+    counts = tree.child_start[parents + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), counts
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return tree.child_index[offsets].astype(np.int64), counts
+
+
+def _depth_levels(tree: ColumnarTree) -> list[np.ndarray]:
+    """Return nodes grouped by depth; every child sits exactly one level below its parent."""
+
+    levels = []
+    frontier = np.asarray([tree.root], dtype=np.int64)
+    while frontier.size:
+        levels.append(frontier)
+        frontier, _ = _children_of(tree, frontier)
+    return levels
+
+
+def _reduce_groups(ufunc: np.ufunc, rows: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Reduce consecutive row groups of sizes ``counts`` with ``ufunc``."""
+
+    if rows.shape[0] == 2 * counts.size and np.all(counts == 2):
+        # Bifurcating levels (the common case) pair up rows without reduceat.
+        return ufunc(rows[0::2], rows[1::2])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    return ufunc.reduceat(rows, offsets, axis=0)
+
+
+def _transition(vectors: np.ndarray, lengths: np.ndarray, decay: float, state_count: int) -> np.ndarray:
+    """Apply symmetric-Mk transition matrices to row vectors in O(S) per row.
+
+    ``P(t) = e^{-decay t} I + (1 - e^{-decay t}) / S * 11^T``, so ``P(t) v``
+    only needs the row sum of ``v``.
+    """
+
+    keep = np.exp(-decay * lengths)[:, None]
+    return keep * vectors + (1.0 - keep) / state_count * vectors.sum(axis=1, keepdims=True)
+
+
+def _fitch(
+    tree: ColumnarTree,
+    levels: list[np.ndarray],
+    support: np.ndarray,
+    observed: np.ndarray,
+) -> tuple[np.ndarray, int]:
+    """Hartigan's generalisation of Fitch: return the MPR state codes and the score."""
+
+    is_tip = tree.is_tip
+    sets = support.copy()
+    sets[~observed] = True
+    score = 0
+    for level in reversed(levels):
+        internal = level[~is_tip[level]]
+        if not internal.size:
+            continue
+        children, counts = _children_of(tree, internal)
+        tally = _reduce_groups(np.add, sets[children].astype(np.int32), counts)
+        best = tally.max(axis=1)
+        consensus = tally == best[:, None]
+        score += int((counts - best).sum())
+
+        annotated = observed[internal]
+        if annotated.any():
+            # An annotated node may only take its supported states; every child
+            # outside the chosen state's tally costs a change.
+            allowed = np.where(support[internal[annotated]], tally[annotated], -1)
+            top = allowed.max(axis=1)
+            score += int((best[annotated] - top).sum())
+            consensus[annotated] = allowed == top[:, None]
+        sets[internal] = consensus
+
+    choice = np.empty(tree.size, dtype=np.int64)
+    choice[tree.root] = int(np.argmax(sets[tree.root]))
+    for level in levels[1:]:
+        inherited = choice[tree.parent[level]]
+        compatible = sets[level, inherited]
+        choice[level] = np.where(compatible, inherited, np.argmax(sets[level], axis=1))
+    return choice, score
+
+
+def _marginals(
+    tree: ColumnarTree,
+    levels: list[np.ndarray],
+    likelihoods: np.ndarray,
+    observed: np.ndarray,
+    lengths: np.ndarray,
+    decay: float,
+) -> tuple[np.ndarray, float]:
+    """Felsenstein pruning plus a top-down pass; return marginals and log-likelihood.
+
+    The down pass fills ``partial`` level by level with rescaled conditional
+    likelihoods. The top-down pass overwrites each row with the node's
+    marginal in place, dividing the parent's marginal by the child's own
+    message to get the likelihood of everything outside the child's subtree.
+    """
+
+    state_count = likelihoods.shape[1]
+    is_tip = tree.is_tip
+    partial = np.ones_like(likelihoods)
+    partial[observed] = likelihoods[observed]
+    log_scale = 0.0
+    for level in reversed(levels):
+        internal = level[~is_tip[level]]
+        if not internal.size:
+            continue
+        children, counts = _children_of(tree, internal)
+        messages = _transition(partial[children], lengths[children], decay, state_count)
+        product = _reduce_groups(np.multiply, messages, counts)
+        annotated = observed[internal]
+        product[annotated] *= likelihoods[internal[annotated]]
+        scale = product.max(axis=1)
+        scale[scale <= 0] = 1.0
+        product /= scale[:, None]
+        log_scale += float(np.log(scale).sum())
+        partial[internal] = product
+
+    root = tree.root
+    log_likelihood = float(np.log(partial[root].mean())) + log_scale
+
+    # Rows of a level still hold their downward partials until the level is
+    # rewritten, while the parents' rows already hold marginals.
+    marginal = partial
+    marginal[root] /= marginal[root].sum()
+    for level in levels[1:]:
+        parents = tree.parent[level]
+        own = _transition(marginal[level], lengths[level], decay, state_count)
+        outside = _transition(marginal[parents] / own, lengths[level], decay, state_count)
+        rows = marginal[level] * outside
+        totals = rows.sum(axis=1, keepdims=True)
+        totals[totals <= 0] = 1.0
+        marginal[level] = rows / totals
+    return marginal, log_likelihood
+
+
+def reconstruct_states(
+    tree: ColumnarTree,
+    observations: Sequence[Optional[dict[str, float]]],
+    method: str = "parsimony",
+    rate: Optional[float] = None,
+    min_probability: float = MIN_PROBABILITY,
+) -> Reconstruction:
+    """Infer location distributions for nodes without annotations.
+
+    Args:
+        tree: Columnar tree whose positions align with ``observations``.
+        observations: Normalised state distribution per node; empty or ``None``
+            for unannotated nodes. Annotated internal nodes constrain the result.
+        method: ``"parsimony"`` (one MPR state per node) or ``"ml"`` (marginal
+            posteriors under a symmetric Mk model with a uniform root prior).
+        rate: Substitution rate for ``"ml"``; defaults to the parsimony score
+            divided by the total tree length.
+        min_probability: Drop ML marginals below this value.
+
+    Raises:
+        ValueError: For an unknown method or a non-positive rate.
+    """
+
+    if method not in RECONSTRUCTION_METHODS:
+        raise ValueError(f"reconstruction must be one of {', '.join(RECONSTRUCTION_METHODS)}.")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive.")
+
+    states = sorted({state for item in observations if item for state in item if state != "Unknown"})
+    lookup = {state: code for code, state in enumerate(states)}
+    size = tree.size
+    observed = np.zeros(size, dtype=bool)
+    likelihoods = np.zeros((size, max(len(states), 1)), dtype=np.float64)
+    for position, distribution in enumerate(observations):
+        for state, probability in (distribution or {}).items():
+            code = lookup.get(state)
+            if code is not None and probability > 0:
+                likelihoods[position, code] = probability
+                observed[position] = True
+
+    distributions = [dict(item) if observed[position] else {} for position, item in enumerate(observations)]
+    inferred = ~observed
+    if len(states) <= 1:
+        fill = {states[0]: 1.0} if states else {}
+        for position in np.flatnonzero(inferred).tolist():
+            distributions[position] = dict(fill)
+        return Reconstruction(method=method, states=states, distributions=distributions, inferred=inferred, parsimony_score=0)
+
+    levels = _depth_levels(tree)
+    choice, score = _fitch(tree, levels, likelihoods > 0, observed)
+    if method == "parsimony":
+        for position in np.flatnonzero(inferred).tolist():
+            distributions[position] = {states[choice[position]]: 1.0}
+        return Reconstruction(
+            method=method, states=states, distributions=distributions, inferred=inferred, parsimony_score=score
+        )
+
+    has_parent = tree.parent >= 0
+    lengths = np.zeros(size, dtype=np.float64)
+    lengths[has_parent] = tree.time_from_root[has_parent] - tree.time_from_root[tree.parent[has_parent]]
+    total_length = float(np.clip(lengths, 0.0, None).sum())
+    lengths = np.maximum(lengths, MIN_BRANCH_FRACTION * max(total_length, 1.0))
+    if rate is None:
+        rate = score / total_length if total_length > 0 and score > 0 else 1.0 / max(total_length, 1.0)
+    state_count = len(states)
+    decay = rate * state_count / (state_count - 1)
+
+    marginal, log_likelihood = _marginals(tree, levels, likelihoods, observed, lengths, decay)
+    positions = np.flatnonzero(inferred)
+    block = marginal[positions]
+    keep = block >= min_probability
+    keep[np.arange(positions.size), np.argmax(block, axis=1)] = True
+    rows, codes = np.nonzero(keep)
+    bounds = np.concatenate(([0], np.cumsum(keep.sum(axis=1)))).tolist()
+    labels = [states[code] for code in codes.tolist()]
+    values = block[rows, codes].tolist()
+    for row, position in enumerate(positions.tolist()):
+        start, stop = bounds[row], bounds[row + 1]
+        distributions[position] = dict(zip(labels[start:stop], values[start:stop]))
+
+    return Reconstruction(
+        method=method,
+        states=states,
+        distributions=distributions,
+        inferred=inferred,
+        parsimony_score=score,
+        rate=float(rate),
+        log_likelihood=log_likelihood,
+    )
@@ -0,0 +1,95 @@
+"""Gauges read from live service state when ``/metrics`` is scraped.
+
+Importing this module registers them; nothing here runs between scrapes.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from ..core.config import get_settings
+from ..core.metrics import LabelValues, counter, gauge
+from .admission import get_admission_controller
+from .shared_cache import shared_cache_root
+from .single_flight import single_flight_stats
+from .tree_service import get_tree_cache
+
+# Walking the analysis directory is the only costly collector; reuse its result.
+DISK_USAGE_TTL = 30.0
+
+_disk_lock = threading.Lock()
+_disk_usage: dict[LabelValues, float] = {}
+_disk_measured = 0.0
+
+
+def _directory_bytes(root: Path) -> int:
+    total = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(directory, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _disk_bytes() -> dict[LabelValues, float]:
+    global _disk_measured
+    with _disk_lock:
+        if time.monotonic() - _disk_measured >= DISK_USAGE_TTL:
+            settings = get_settings()
+            _disk_usage.clear()
+            _disk_usage[("analysis",)] = float(_directory_bytes(settings.data_dir / "analysis"))
+            _disk_usage[("shared_cache",)] = float(_directory_bytes(shared_cache_root()))
+            _disk_measured = time.monotonic()
+        return dict(_disk_usage)
+
+
+def _admission(field: str) -> dict[LabelValues, float]:
+    return {(): float(get_admission_controller().stats()[field])}
+
+
+def _single_flight(field: str) -> dict[LabelValues, float]:
+    return {(group,): float(stats[field]) for group, stats in single_flight_stats().items()}
+
+
+gauge("maple_jobs_running", "Admitted parses and analyses currently running.", callback=lambda: _admission("running"))
+gauge("maple_jobs_queued", "Parses and analyses waiting for admission.", callback=lambda: _admission("queued"))
+gauge(
+    "maple_jobs_reserved_bytes",
+    "Estimated memory reserved by running jobs.",
+    callback=lambda: _admission("reserved_bytes"),
+)
+counter(
+    "maple_admission_rejected_total",
+    "Jobs rejected for exceeding the memory budget.",
+    callback=lambda: _admission("rejected"),
+)
+counter(
+    "maple_admission_timed_out_total",
+    "Jobs that timed out waiting for admission.",
+    callback=lambda: _admission("timed_out"),
+)
+gauge(
+    "maple_single_flight_in_flight",
+    "Coalesced computations currently running.",
+    ("group",),
+    callback=lambda: _single_flight("in_flight"),
+)
+counter(
+    "maple_single_flight_executed_total",
+    "Computations run by a single-flight group.",
+    ("group",),
+    callback=lambda: _single_flight("executed"),
+)
+counter(
+    "maple_single_flight_coalesced_total",
+    "Callers that shared another caller's computation.",
+    ("group",),
+    callback=lambda: _single_flight("coalesced"),
+)
+gauge("maple_tree_cache_entries", "Parsed trees held in memory.", callback=lambda: {(): float(len(get_tree_cache()))})
+gauge("maple_disk_bytes", "Bytes on disk under analysis artefacts and the shared cache.", ("store",), callback=_disk_bytes)
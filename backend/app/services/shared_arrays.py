@@ -0,0 +1,148 @@
+"""NumPy arrays in ``multiprocessing.shared_memory`` for process-pool hand-offs.
+
+Submitting arrays to a ``ProcessPoolExecutor`` pickles them into every task
+and pickles results back. Instead the parent copies inputs once into shared
+memory blocks, allocates output blocks there too, and sends workers only a
+:class:`SharedArrayDescriptor` (block name, shape, dtype). Workers attach,
+read or write in place and detach.
+
+Lifetime: the parent owns every block through a :class:`SharedArrays`
+context and unlinks them on exit, including when a worker crashed. If the
+parent itself dies, the multiprocessing resource tracker unlinks leftovers,
+and :func:`sweep_stale_blocks` removes blocks of dead processes on startup.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BLOCK_PREFIX = "maple"
+_SHM_DIR = Path("/dev/shm")
+
+
+@dataclass(frozen=True)
+class SharedArrayDescriptor:
+    """Everything a worker needs to map a shared block as an array."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _block_name() -> str:
+    # The owner's pid lets sweep_stale_blocks tell orphaned blocks apart.
+    return f"{BLOCK_PREFIX}_{os.getpid()}_{secrets.token_hex(6)}"
+
+
+def _view(block: shared_memory.SharedMemory, descriptor: SharedArrayDescriptor) -> np.ndarray:
+    return np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=block.buf)
+
+
+class SharedArrays:
+    """Owner of a set of shared blocks; use as a context manager.
+
+    Arrays returned by :meth:`share` and :meth:`allocate` are views on the
+    blocks and become invalid on exit, so copy what must outlive the context.
+    """
+
+    def __init__(self) -> None:
+        self._blocks: list[shared_memory.SharedMemory] = []
+
+    def allocate(self, shape: tuple[int, ...], dtype: np.dtype | str) -> tuple[SharedArrayDescriptor, np.ndarray]:
+        """Create a zeroed block for an array of ``shape`` and return its descriptor and view."""
+
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        # Zero-size blocks are not allowed; empty arrays still get one byte.
+        block = shared_memory.SharedMemory(name=_block_name(), create=True, size=max(nbytes, 1))
+        self._blocks.append(block)
+        descriptor = SharedArrayDescriptor(name=block.name, shape=tuple(int(n) for n in shape), dtype=dtype.str)
+        view = _view(block, descriptor)
+        view.fill(0)
+        return descriptor, view
+
+    def share(self, array: np.ndarray) -> SharedArrayDescriptor:
+        """Copy ``array`` into a new block and return its descriptor."""
+
+        descriptor, view = self.allocate(array.shape, array.dtype)
+        view[...] = array
+        return descriptor
+
+    def close(self) -> None:
+        blocks, self._blocks = self._blocks, []
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # A view is still alive; unlinking below still frees the name.
+                logger.debug("Shared block %s closed with live views", block.name)
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+@contextmanager
+def attach(descriptor: SharedArrayDescriptor) -> Iterator[np.ndarray]:
+    """Map the block of ``descriptor`` in a worker for the duration of the block.
+
+    The worker never unlinks: ownership stays with the parent's
+    :class:`SharedArrays`.
+    """
+
+    block = shared_memory.SharedMemory(name=descriptor.name)
+    try:
+        yield _view(block, descriptor)
+    finally:
+        try:
+            block.close()
+        except BufferError:
+            logger.debug("Shared block %s detached with live views", descriptor.name)
+
+
+def sweep_stale_blocks() -> int:
+    """Unlink blocks left behind by processes that no longer exist; return the count.
+
+    Only POSIX systems exposing ``/dev/shm`` are swept.
+    """
+
+    if not _SHM_DIR.is_dir():
+        return 0
+    removed = 0
+    for entry in _SHM_DIR.glob(f"{BLOCK_PREFIX}_*"):
+        try:
+            pid = int(entry.name.split("_")[1])
+        except (IndexError, ValueError):
+            continue
+        try:
+            os.kill(pid, 0)
+            continue
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            continue
+        try:
+            entry.unlink()
+            removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info("Removed stale shared memory blocks", extra={"count": removed})
+    return removed
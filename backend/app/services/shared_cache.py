@@ -0,0 +1,232 @@
+"""On-disk cache shared by every worker process serving the same data directory.
+
+In-process caches (``TreeCache``, ``CachedTree.derived``) are per worker, so
+``uvicorn --workers N`` would parse every tree N times. This tier lets one
+worker do the work and the others attach to the result:
+
+- parsed payloads are pickled, which loads an order of magnitude faster than
+  re-parsing NEXUS;
+- NumPy columns are written as ``.npy`` files and opened with
+  ``mmap_mode="r"``, so all workers read the same page-cache pages and the
+  arrays do not count once per worker. This covers the topology, times, node
+  ids and labels and every trait (see :mod:`.columnar`), which is what the
+  indexes, summaries, lineages, animation, HPD and cluster endpoints are
+  built from;
+- encoded trees (``GET /api/tree`` JSON and binary) are served straight from
+  disk, and a worker that finds them never loads the tree.
+
+A worker attaching to a tree another worker parsed does not unpickle its
+``TreePayload`` (roughly 14x the file size) until an endpoint needs the node
+objects themselves: the discrete analysis and comparison endpoints still do,
+so their memory grows with the worker count; there the pickle only saves the
+parse time. The structures built from the columns (postings, sorted values,
+geometries) are still per worker.
+
+The cache is unpickled, so it must never live where clients can write: by
+default it sits in the user's cache directory (``$XDG_CACHE_HOME`` or
+``~/.cache``), in a private per-data-directory folder, not under ``data_dir``.
+
+Entries are keyed by the tree's ``file_signature`` plus a name and recorded in
+a SQLite index (WAL mode, safe for concurrent processes). Files are written
+to a temporary name and renamed into place, so readers never see a partial
+entry. The least recently used entries are pruned once the total size
+exceeds the configured budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.sqlite"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def signature_digest(signature: tuple[str, int, int]) -> str:
+    """Stable short name for a ``file_signature`` that is safe to use as a directory."""
+
+    return hashlib.sha1(repr(tuple(signature)).encode("utf-8")).hexdigest()[:20]
+
+
+def default_cache_root(data_dir: Path) -> Path:
+    """Private cache directory of ``data_dir`` outside any client-writable directory."""
+
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    digest = hashlib.sha1(str(Path(data_dir).resolve()).encode("utf-8")).hexdigest()[:12]
+    return base / "maple" / digest
+
+
+def shared_cache_root() -> Path:
+    settings = get_settings()
+    return Path(settings.shared_cache_dir or default_cache_root(settings.data_dir))
+
+
+class SharedCache:
+    """SQLite-indexed store of pickles, ``.npy`` arrays and blobs under ``root``."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.root / INDEX_FILENAME, timeout=30.0)
+
+    def _entry_dir(self, signature: tuple[str, int, int]) -> Path:
+        return self.root / signature_digest(signature)
+
+    def lookup(self, signature: tuple[str, int, int], name: str) -> Optional[Path]:
+        """Return the stored file for ``name`` of this tree version, or ``None``."""
+
+        key = f"{signature_digest(signature)}/{name}"
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            path = self.root / row[0]
+            if not path.is_file():
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return path
+
+    def store(
+        self,
+        signature: tuple[str, int, int],
+        name: str,
+        suffix: str,
+        write: Callable[[Any], None],
+    ) -> Path:
+        """Write an entry with ``write(file_object)`` and register it atomically."""
+
+        directory = self._entry_dir(signature)
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / f"{name.replace(':', '_').replace('/', '_')}{suffix}"
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=suffix)
+        try:
+            with os.fdopen(handle, "wb") as stream:
+                write(stream)
+            os.replace(temporary, target)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+
+        now = time.time()
+        key = f"{signature_digest(signature)}/{name}"
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, path, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, target.relative_to(self.root).as_posix(), target.stat().st_size, now, now),
+            )
+        self.prune()
+        return target
+
+    def load_object(self, signature: tuple[str, int, int], name: str) -> Optional[Any]:
+        path = self.lookup(signature, name)
+        if path is None:
+            return None
+        try:
+            with path.open("rb") as stream:
+                return pickle.load(stream)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            logger.warning("Discarding unreadable shared cache entry", exc_info=True, extra={"path": str(path)})
+            return None
+
+    def store_object(self, signature: tuple[str, int, int], name: str, value: Any) -> Path:
+        return self.store(
+            signature, name, ".pickle", lambda stream: pickle.dump(value, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+
+    def load_arrays(self, signature: tuple[str, int, int], name: str, fields: list[str]) -> Optional[dict[str, np.ndarray]]:
+        """Memory-map every ``fields`` array stored under ``name``; ``None`` if any is missing."""
+
+        arrays: dict[str, np.ndarray] = {}
+        for field_name in fields:
+            path = self.lookup(signature, f"{name}.{field_name}")
+            if path is None:
+                return None
+            try:
+                arrays[field_name] = np.load(path, mmap_mode="r", allow_pickle=False)
+            except (OSError, ValueError):
+                return None
+        return arrays
+
+    def store_arrays(self, signature: tuple[str, int, int], name: str, arrays: dict[str, np.ndarray]) -> None:
+        for field_name, array in arrays.items():
+            self.store(
+                signature,
+                f"{name}.{field_name}",
+                ".npy",
+                lambda stream, array=array: np.save(stream, np.ascontiguousarray(array), allow_pickle=False),
+            )
+
+    def store_bytes(self, signature: tuple[str, int, int], name: str, data: bytes) -> Path:
+        return self.store(signature, name, ".bin", lambda stream: stream.write(data))
+
+    def prune(self) -> None:
+        """Delete least recently used entries until the total size fits the budget."""
+
+        with closing(self._connect()) as connection, connection:
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = connection.execute("SELECT key, path, size FROM entries ORDER BY accessed").fetchall()
+            for key, relative, size in rows:
+                if total <= self.max_bytes:
+                    break
+                # Workers holding an mmap keep reading the unlinked file until they drop it.
+                (self.root / relative).unlink(missing_ok=True)
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+
+    def clear(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute("SELECT path FROM entries").fetchall()
+            connection.execute("DELETE FROM entries")
+        for (relative,) in rows:
+            (self.root / relative).unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=1)
+def get_shared_cache() -> Optional[SharedCache]:
+    """Return the shared cache, or ``None`` when ``LOCALPHYLOGEO_SHARED_CACHE`` is off."""
+
+    settings = get_settings()
+    if not settings.shared_cache:
+        return None
+    root = shared_cache_root()
+    if root.resolve().is_relative_to(Path(settings.data_dir).resolve()):
+        # Uploads are written into data_dir; a pickle store there could be planted.
+        logger.warning("Shared cache disabled: it must not live inside the data directory", extra={"path": str(root)})
+        return None
+    try:
+        return SharedCache(root, max_bytes=int(settings.shared_cache_max_mb * 1024 * 1024))
+    except (OSError, sqlite3.Error):
+        logger.warning("Shared cache disabled: cannot open it", exc_info=True, extra={"path": str(root)})
+        return None
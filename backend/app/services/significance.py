@@ -0,0 +1,358 @@
+"""Resampling tests that attach significance to comparison path differences."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..core.config import get_settings
+from ..models.discrete import DiscreteComparisonResult, SignificanceSummary
+from .shared_arrays import SharedArrayDescriptor, SharedArrays, attach, sweep_stale_blocks
+
+logger = logging.getLogger(__name__)
+
+SIGNIFICANCE_METHODS = ("permutation", "bootstrap")
+
+# Upper bound on resamples x branches held in memory by a single batch.
+BATCH_ELEMENTS = 2_000_000
+# Below this many resamples x branches a process pool costs more than it saves.
+INLINE_WORK_LIMIT = 20_000_000
+
+
+@dataclass
+class ContributionTable:
+    """Per-branch contributions of every tested path, pooled across trees.
+
+    Only branches that contribute to at least one tested path get a row in
+    ``matrix``; ``rows`` maps those rows back onto the pooled branch axis so
+    resampling still sees every branch of every tree.
+    """
+
+    matrix: np.ndarray
+    rows: np.ndarray
+    groups: np.ndarray
+    group_count: int
+
+    def group_sums(self) -> np.ndarray:
+        """Return the observed ``(group_count, paths)`` path weights per tree."""
+
+        sums = np.zeros((self.group_count, self.matrix.shape[1]), dtype=np.float64)
+        np.add.at(sums, self.groups[self.rows], self.matrix)
+        return sums
+
+
+def build_contribution_table(
+    branch_weights: Sequence[Sequence[dict[tuple[str, str], float]]],
+    paths: Sequence[tuple[str, str]],
+) -> ContributionTable:
+    """Pool per-branch path weights of several trees into a dense table.
+
+    Args:
+        branch_weights: One sequence per tree, as returned by
+            :meth:`DiscreteAnalysisService.branch_transition_weights`.
+        paths: ``(src, dst)`` pairs to test; they become the table columns.
+    """
+
+    column_lookup = {path: index for index, path in enumerate(paths)}
+    groups: list[int] = []
+    rows: list[int] = []
+    values: list[list[float]] = []
+    branch_index = 0
+    for tree_index, weights in enumerate(branch_weights):
+        for branch in weights:
+            row: Optional[list[float]] = None
+            for path, weight in branch.items():
+                column = column_lookup.get(path)
+                if column is None:
+                    continue
+                if row is None:
+                    row = [0.0] * len(paths)
+                row[column] += weight
+            if row is not None:
+                rows.append(branch_index)
+                values.append(row)
+            groups.append(tree_index)
+            branch_index += 1
+
+    matrix = np.asarray(values, dtype=np.float64).reshape(len(values), len(paths))
+    return ContributionTable(
+        matrix=matrix,
+        rows=np.asarray(rows, dtype=np.int64),
+        groups=np.asarray(groups, dtype=np.int32),
+        group_count=len(branch_weights),
+    )
+
+
+def _resample_deltas(
+    method: str,
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    groups: np.ndarray,
+    group_count: int,
+    size: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """Evaluate ``size`` resamples and return their ``(size, paths)`` deltas.
+
+    Kept at module level so process-pool workers can unpickle it.
+    """
+
+    rng = np.random.default_rng(seed)
+    sums = np.empty((size, group_count, matrix.shape[1]), dtype=np.float64)
+
+    if method == "permutation":
+        # Shuffle tree labels across the pooled branches, keeping tree sizes fixed.
+        labels = rng.permuted(np.broadcast_to(groups, (size, groups.size)), axis=1)[:, rows]
+        for group in range(group_count):
+            sums[:, group, :] = (labels == group).astype(np.float64) @ matrix
+    else:
+        # Resample branches with replacement within each tree.
+        row_groups = groups[rows]
+        for group in range(group_count):
+            members = np.flatnonzero(groups == group)
+            mask = row_groups == group
+            if members.size == 0 or not mask.any():
+                sums[:, group, :] = 0.0
+                continue
+            counts = rng.multinomial(
+                members.size, np.full(members.size, 1.0 / members.size), size=size
+            )
+            positions = np.searchsorted(members, rows[mask])
+            sums[:, group, :] = counts[:, positions].astype(np.float64) @ matrix[mask]
+
+    return sums.max(axis=1) - sums.min(axis=1)
+
+
+def _resample_shared(
+    method: str,
+    matrix: SharedArrayDescriptor,
+    rows: SharedArrayDescriptor,
+    groups: SharedArrayDescriptor,
+    group_count: int,
+    size: int,
+    seed: np.random.SeedSequence,
+    out: SharedArrayDescriptor,
+    offset: int,
+) -> int:
+    """Pool-worker entry point: resample from shared inputs into ``out[offset:offset + size]``.
+
+    Only descriptors cross the process boundary; the return value is the
+    number of rows written.
+    """
+
+    with attach(matrix) as matrix_view, attach(rows) as rows_view, attach(groups) as groups_view:
+        deltas = _resample_deltas(method, matrix_view, rows_view, groups_view, group_count, size, seed)
+    with attach(out) as out_view:
+        out_view[offset : offset + size] = deltas
+    return size
+
+
+class PathSignificanceService:
+    """Attach permutation p-values or bootstrap intervals to path differences."""
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.max_workers = max(1, max_workers or settings.significance_workers or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        sweep_stale_blocks()
+
+    def annotate(
+        self,
+        result: DiscreteComparisonResult,
+        branch_weights: Sequence[Sequence[dict[tuple[str, str], float]]],
+        method: str = "permutation",
+        resamples: int = 1000,
+        seed: int = 0,
+        time_budget: float = 10.0,
+        confidence: float = 0.95,
+    ) -> DiscreteComparisonResult:
+        """Resample per-branch contributions and annotate ``result`` in place.
+
+        Args:
+            result: Comparison whose ``path_differences`` should be tested.
+            branch_weights: Per-tree branch contributions in the same order as
+                ``result.trees``.
+            method: ``"permutation"`` (p-values) or ``"bootstrap"`` (intervals).
+            resamples: Number of resamples to draw.
+            seed: Seed for reproducible resampling.
+            time_budget: Wall-clock seconds after which remaining resamples are
+                abandoned; the summary reports how many were evaluated.
+            confidence: Confidence level of bootstrap intervals.
+        """
+
+        if method not in SIGNIFICANCE_METHODS:
+            raise ValueError(
+                f"Unknown significance method '{method}'; expected one of {', '.join(SIGNIFICANCE_METHODS)}."
+            )
+        if resamples <= 0:
+            raise ValueError("resamples must be positive.")
+        if not 0.0 < confidence < 1.0:
+            raise ValueError("confidence must lie strictly between 0 and 1.")
+        if len(branch_weights) != len(result.trees):
+            raise ValueError("branch_weights must be supplied for every compared tree.")
+
+        paths = [(difference.src, difference.dst) for difference in result.path_differences]
+        started = time.perf_counter()
+        deltas = np.empty((0, len(paths)))
+        truncated = False
+
+        if paths:
+            table = build_contribution_table(branch_weights, paths)
+            deltas, truncated = self._run(method, table, resamples, seed, time_budget)
+            completed = deltas.shape[0]
+            if method == "permutation":
+                observed = np.ptp(table.group_sums(), axis=0)
+                tolerance = 1e-12 * np.maximum(observed, 1.0)
+                exceed = (deltas >= observed - tolerance).sum(axis=0)
+                p_values = (exceed + 1.0) / (completed + 1.0)
+                for difference, p_value in zip(result.path_differences, p_values):
+                    difference.p_value = float(p_value)
+            else:
+                alpha = (1.0 - confidence) / 2.0
+                low, high = np.quantile(deltas, [alpha, 1.0 - alpha], axis=0)
+                for difference, ci_low, ci_high in zip(result.path_differences, low, high):
+                    difference.ci_low = float(ci_low)
+                    difference.ci_high = float(ci_high)
+
+        result.significance = SignificanceSummary(
+            method=method,
+            resamples_requested=resamples,
+            resamples_completed=int(deltas.shape[0]),
+            seed=seed,
+            confidence=confidence,
+            elapsed_seconds=time.perf_counter() - started,
+            truncated=truncated,
+        )
+        return result
+
+    def _run(
+        self,
+        method: str,
+        table: ContributionTable,
+        resamples: int,
+        seed: int,
+        time_budget: float,
+    ) -> tuple[np.ndarray, bool]:
+        branch_count = max(int(table.groups.size), 1)
+        batch_size = max(1, min(resamples, BATCH_ELEMENTS // branch_count))
+        sizes = [batch_size] * (resamples // batch_size)
+        if resamples % batch_size:
+            sizes.append(resamples % batch_size)
+        # One child seed per batch keeps results independent of worker scheduling.
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        deadline = time.perf_counter() + max(time_budget, 0.0)
+
+        def batch_args(index: int) -> tuple:
+            return (method, table.matrix, table.rows, table.groups, table.group_count, sizes[index], seeds[index])
+
+        results: list[np.ndarray] = []
+        if self.max_workers > 1 and len(sizes) > 1 and resamples * branch_count > INLINE_WORK_LIMIT:
+            try:
+                results = self._run_pooled(method, table, sizes, seeds, deadline)
+            except BrokenProcessPool:
+                logger.warning("Significance worker pool broke; resampling inline instead")
+                self._discard_executor()
+                results = []
+
+        if not results:
+            for index in range(len(sizes)):
+                if index and time.perf_counter() >= deadline:
+                    break
+                results.append(_resample_deltas(*batch_args(index)))
+
+        deltas = np.concatenate(results, axis=0)
+        return deltas, deltas.shape[0] < resamples
+
+    def _run_pooled(
+        self,
+        method: str,
+        table: ContributionTable,
+        sizes: list[int],
+        seeds: list[np.random.SeedSequence],
+        deadline: float,
+    ) -> list[np.ndarray]:
+        executor = self._get_executor()
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).tolist()
+        # Inputs are copied into shared memory once and batches write their deltas
+        # straight into a shared output, so tasks carry descriptors, not arrays.
+        with SharedArrays() as shared:
+            matrix = shared.share(table.matrix)
+            rows = shared.share(table.rows)
+            groups = shared.share(table.groups)
+            out, out_view = shared.allocate((sum(sizes), table.matrix.shape[1]), np.float64)
+            futures: list[Future] = [
+                executor.submit(
+                    _resample_shared,
+                    method,
+                    matrix,
+                    rows,
+                    groups,
+                    table.group_count,
+                    size,
+                    seed,
+                    out,
+                    offset,
+                )
+                for size, seed, offset in zip(sizes, seeds, offsets)
+            ]
+            try:
+                # Always wait for the first batch so every request gets some resamples.
+                futures[0].result()
+                pending = {future for future in futures if not future.done()}
+                while pending:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            finally:
+                for future in futures:
+                    future.cancel()
+                # Batches already running still write into the blocks; let them
+                # finish before the blocks are unlinked.
+                wait([future for future in futures if not future.cancelled()])
+
+            # Keep the completed prefix only, so a truncated run with a given seed is
+            # still reproducible.
+            completed = 0
+            for future, size in zip(futures, sizes):
+                if future.cancelled() or future.exception() is not None:
+                    break
+                completed += size
+            deltas = np.array(out_view[:completed])
+            # The blocks can only be closed once no view on them is left.
+            del out_view
+        return [deltas]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _discard_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, if one was started."""
+
+        self._discard_executor()
+
+
+@lru_cache(maxsize=1)
+def get_path_significance_service() -> PathSignificanceService:
+    """Return a cached service instance."""
+
+    return PathSignificanceService()
@@ -0,0 +1,224 @@
+"""Clade-bitset topology comparisons (Robinson–Foulds distances) between trees."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..models.topology import TopologyComparisonResult
+from .columnar import ColumnarTree, get_columnar_tree
+from .tree_service import file_signature, get_tree_cache
+
+# Number of per-file clade tables indexed by file signature. Tables are far
+# smaller than parsed payloads, so they outlive the trees evicted from the
+# tree cache and posterior-sized sets of trees fit comfortably.
+CLADE_CACHE_SIZE = 4096
+# Upper bound on trees x clades held in one dense block while accumulating distances.
+BLOCK_ELEMENTS = 1 << 24
+
+
+@dataclass(frozen=True)
+class CladeTable:
+    """Clades of one tree encoded as tip bitsets.
+
+    Bit ``i`` of a clade refers to ``tips[i]``; tips are sorted by label so
+    trees over the same taxa produce directly comparable integers. Tip clades
+    are kept (for pendant branch lengths) but the root clade is not.
+    """
+
+    tips: tuple[str, ...]
+    clades: dict[int, float]
+
+    @property
+    def internal_count(self) -> int:
+        return sum(1 for bits in self.clades if bits & (bits - 1))
+
+
+def build_clade_table(tree: ColumnarTree) -> CladeTable:
+    """Encode every clade of ``tree`` as a Python-int bitset over its tips."""
+
+    starts = tree.child_start.tolist()
+    order = tree.child_index.tolist()
+    children = [order[start:stop] for start, stop in zip(starts, starts[1:])]
+
+    tip_positions = np.flatnonzero(tree.is_tip).tolist()
+    labels = [tree.labels[position] for position in tip_positions]
+    if any(not label for label in labels):
+        raise ValueError("Every tip needs a label to compare tree topologies.")
+    if len(set(labels)) != len(labels):
+        raise ValueError("Tip labels must be unique to compare tree topologies.")
+
+    ordered = sorted(zip(labels, tip_positions))
+    bits = [0] * tree.size
+    for bit, (_, position) in enumerate(ordered):
+        bits[position] = 1 << bit
+
+    # Iterative postorder so deep (caterpillar) trees do not hit the recursion limit.
+    postorder: list[int] = []
+    stack = [tree.root]
+    while stack:
+        position = stack.pop()
+        postorder.append(position)
+        stack.extend(children[position])
+    for position in reversed(postorder):
+        for child in children[position]:
+            bits[position] |= bits[child]
+
+    # Missing (NaN) branch lengths count as zero.
+    branch_lengths = np.where(np.isnan(tree.branch_length), 0.0, tree.branch_length).tolist()
+    clades: dict[int, float] = {}
+    for position in postorder:
+        if position == tree.root:
+            continue
+        length = branch_lengths[position]
+        # Unary nodes repeat their child's clade; their branches simply add up.
+        clades[bits[position]] = clades.get(bits[position], 0.0) + float(length)
+
+    return CladeTable(tips=tuple(label for label, _ in ordered), clades=clades)
+
+
+class TopologyComparisonService:
+    """Compute Robinson–Foulds distance matrices from cached clade tables."""
+
+    def __init__(self, cache_size: int = CLADE_CACHE_SIZE) -> None:
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, int, int], CladeTable] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clade_table(self, tree_path: Path) -> CladeTable:
+        """Return the clade table of ``tree_path``, parsing it only when changed.
+
+        Parses go through the shared tree cache, so they are admission
+        controlled and coalesced, and a tree already loaded is not re-parsed.
+        """
+
+        if not tree_path.exists():
+            raise FileNotFoundError(f"Tree file not found: {tree_path}")
+        key = file_signature(tree_path)
+        with self._lock:
+            table = self._cache.get(key)
+            if table is not None:
+                self._cache.move_to_end(key)
+                return table
+
+        cached = get_tree_cache().get(tree_path)
+        table = cached.derived("clade_table", lambda: build_clade_table(get_columnar_tree(cached)))
+
+        with self._lock:
+            self._cache[cached.signature] = table
+            self._cache.move_to_end(cached.signature)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return table
+
+    def compare(
+        self,
+        tables: Sequence[CladeTable],
+        labels: Optional[Sequence[str]] = None,
+    ) -> TopologyComparisonResult:
+        """Return RF, normalised RF and weighted RF matrices for ``tables``."""
+
+        if len(tables) < 2:
+            raise ValueError("At least two trees are required for comparison.")
+        if labels is None:
+            labels = [f"Tree {index + 1}" for index in range(len(tables))]
+        if len(labels) != len(tables):
+            raise ValueError("labels length must match the number of trees.")
+
+        tips = tables[0].tips
+        for label, table in zip(labels, tables):
+            if table.tips != tips:
+                raise ValueError(
+                    f"'{label}' does not share the tip set of '{labels[0]}'; "
+                    "Robinson–Foulds distances need identical taxa."
+                )
+
+        # Hash every distinct clade once and give it a dense column id.
+        column_ids: dict[int, int] = {}
+        columns: list[np.ndarray] = []
+        lengths: list[np.ndarray] = []
+        for table in tables:
+            columns.append(
+                np.fromiter(
+                    (column_ids.setdefault(bits, len(column_ids)) for bits in table.clades),
+                    dtype=np.int64,
+                    count=len(table.clades),
+                )
+            )
+            lengths.append(np.fromiter(table.clades.values(), dtype=np.float64, count=len(table.clades)))
+        nontrivial = np.fromiter(
+            (bool(bits & (bits - 1)) for bits in column_ids), dtype=bool, count=len(column_ids)
+        )
+
+        tree_count = len(tables)
+        rows = np.repeat(np.arange(tree_count), [cols.size for cols in columns])
+        flat_columns = np.concatenate(columns)
+        flat_lengths = np.concatenate(lengths)
+        occurrences = np.bincount(flat_columns, minlength=len(column_ids))
+
+        # Clades seen in a single tree only add to that tree's own count, so
+        # the pairwise products only need the clades shared by two or more trees.
+        counts = np.bincount(rows, weights=nontrivial[flat_columns], minlength=tree_count)
+        shared_columns = np.flatnonzero((occurrences > 1) & nontrivial)
+        dense_ids = np.full(len(column_ids), -1, dtype=np.int64)
+        dense_ids[shared_columns] = np.arange(shared_columns.size)
+        shared = np.zeros((tree_count, tree_count), dtype=np.float64)
+        block = max(1, BLOCK_ELEMENTS // tree_count)
+        for start in range(0, shared_columns.size, block):
+            stop = min(start + block, shared_columns.size)
+            selected = (dense_ids[flat_columns] >= start) & (dense_ids[flat_columns] < stop)
+            presence = np.zeros((tree_count, stop - start), dtype=np.float32)
+            presence[rows[selected], dense_ids[flat_columns[selected]] - start] = 1.0
+            shared += presence @ presence.T
+        np.fill_diagonal(shared, counts)
+
+        # |a - b| = a + b - 2 min(a, b), so weighted RF only needs the pairwise
+        # minimum of lengths over clades that two trees actually share.
+        totals = np.array([values.sum() for values in lengths])
+        overlap = np.zeros((tree_count, tree_count), dtype=np.float64)
+        repeated = occurrences[flat_columns] > 1
+        order = np.flatnonzero(repeated)[np.argsort(flat_columns[repeated], kind="stable")]
+        boundaries = np.flatnonzero(np.diff(flat_columns[order])) + 1
+        for group in np.split(order, boundaries) if order.size else []:
+            minimum = np.minimum.outer(flat_lengths[group], flat_lengths[group])
+            if group.size == tree_count:
+                # Stable sorting keeps tree order, so a clade in every tree maps 1:1.
+                overlap += minimum
+            else:
+                members = rows[group]
+                overlap[np.ix_(members, members)] += minimum
+        weighted = np.maximum(totals[:, None] + totals[None, :] - 2.0 * overlap, 0.0)
+        np.fill_diagonal(weighted, 0.0)
+
+        robinson_foulds = counts[:, None] + counts[None, :] - 2.0 * shared
+        denominator = counts[:, None] + counts[None, :]
+        normalized = np.divide(
+            robinson_foulds,
+            denominator,
+            out=np.zeros_like(robinson_foulds),
+            where=denominator > 0,
+        )
+
+        # The matrices are built from validated numbers already; skipping
+        # per-element validation matters for thousands of trees.
+        return TopologyComparisonResult.construct(
+            labels=list(labels),
+            tip_count=len(tips),
+            clade_counts=[int(count) for count in counts],
+            robinson_foulds=np.rint(robinson_foulds).astype(int).tolist(),
+            normalized_robinson_foulds=normalized.tolist(),
+            weighted_robinson_foulds=weighted.tolist(),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_topology_comparison_service() -> TopologyComparisonService:
+    """Return a cached service instance."""
+
+    return TopologyComparisonService()
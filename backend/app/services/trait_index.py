@@ -0,0 +1,202 @@
+"""Per-tree trait indexes backing server-side node filtering."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+from ..models.traits import TraitPredicate
+from .columnar import TraitColumns, get_trait_columns
+from .tree_service import CachedTree
+
+CATEGORICAL_OPS = {"eq", "ne", "in", "not_in", "exists"}
+NUMERIC_OPS = {"eq", "ne", "lt", "le", "gt", "ge", "between", "in", "not_in", "exists"}
+COMBINE_MODES = ("all", "any")
+
+
+@dataclass(frozen=True)
+class CategoricalColumn:
+    """Inverted lists: each value maps to the sorted positions of nodes carrying it.
+
+    List-valued traits (e.g. ``location.set``) post a node under every element,
+    so equality reads as membership.
+    """
+
+    postings: dict[str, np.ndarray]
+    present: np.ndarray
+
+
+@dataclass(frozen=True)
+class NumericColumn:
+    """Trait values sorted ascending, with the node position of each value."""
+
+    values: np.ndarray
+    positions: np.ndarray
+
+    def range(self, low: float, high: float, include_low: bool = True, include_high: bool = True) -> np.ndarray:
+        start = np.searchsorted(self.values, low, side="left" if include_low else "right")
+        stop = np.searchsorted(self.values, high, side="right" if include_high else "left")
+        if stop <= start:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(self.positions[start:stop])
+
+
+@dataclass(frozen=True)
+class TraitIndex:
+    size: int
+    categorical: dict[str, CategoricalColumn]
+    numeric: dict[str, NumericColumn]
+
+    @property
+    def traits(self) -> list[str]:
+        return sorted(set(self.categorical) | set(self.numeric))
+
+    def query(self, predicates: Sequence[TraitPredicate], combine: str = "all") -> np.ndarray:
+        """Return sorted node positions matching the predicates.
+
+        Raises:
+            ValueError: For unknown operators, combine modes or malformed values.
+        """
+
+        if combine not in COMBINE_MODES:
+            raise ValueError(f"combine must be one of {', '.join(COMBINE_MODES)}.")
+        if not predicates:
+            raise ValueError("Provide at least one predicate.")
+
+        matches = [self._evaluate(predicate) for predicate in predicates]
+        if combine == "all":
+            # Intersect smallest-first so the working set shrinks quickly.
+            matches.sort(key=lambda positions: positions.size)
+            return reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), matches)
+        return reduce(np.union1d, matches)
+
+    def _evaluate(self, predicate: TraitPredicate) -> np.ndarray:
+        op = predicate.op
+        if op not in NUMERIC_OPS | CATEGORICAL_OPS:
+            raise ValueError(f"Unknown operator '{op}' for trait '{predicate.trait}'.")
+
+        numeric = self.numeric.get(predicate.trait)
+        categorical = self.categorical.get(predicate.trait)
+        if numeric is None and categorical is None:
+            return np.empty(0, dtype=np.int32)
+
+        if op == "exists":
+            return self._present(numeric, categorical)
+
+        if op in {"lt", "le", "gt", "ge", "between"}:
+            if numeric is None:
+                raise ValueError(f"Trait '{predicate.trait}' is not numeric; '{op}' needs numbers.")
+            return self._numeric_range(numeric, op, predicate.value, predicate.trait)
+
+        values = predicate.value if op in {"in", "not_in"} else [predicate.value]
+        if not isinstance(values, (list, tuple)):
+            raise ValueError(f"'{op}' on trait '{predicate.trait}' expects a list of values.")
+        selected = [np.empty(0, dtype=np.int32)]
+        for value in values:
+            if numeric is not None and _is_number(value):
+                selected.append(numeric.range(float(value), float(value)))
+            if categorical is not None:
+                posting = categorical.postings.get(_normalise_category(value))
+                if posting is not None:
+                    selected.append(posting)
+        matched = reduce(np.union1d, selected)
+
+        if op in {"ne", "not_in"}:
+            return np.setdiff1d(self._present(numeric, categorical), matched, assume_unique=True)
+        return matched
+
+    @staticmethod
+    def _present(numeric: NumericColumn | None, categorical: CategoricalColumn | None) -> np.ndarray:
+        columns = [np.empty(0, dtype=np.int32)]
+        if numeric is not None:
+            columns.append(np.unique(numeric.positions))
+        if categorical is not None:
+            columns.append(categorical.present)
+        return reduce(np.union1d, columns)
+
+    @staticmethod
+    def _numeric_range(column: NumericColumn, op: str, value: Any, trait: str) -> np.ndarray:
+        if op == "between":
+            if not isinstance(value, (list, tuple)) or len(value) != 2 or not all(_is_number(item) for item in value):
+                raise ValueError(f"'between' on trait '{trait}' expects [low, high].")
+            low, high = sorted(float(item) for item in value)
+            return column.range(low, high)
+        if not _is_number(value):
+            raise ValueError(f"'{op}' on trait '{trait}' expects a number.")
+        bound = float(value)
+        if op == "lt":
+            return column.range(-np.inf, bound, include_high=False)
+        if op == "le":
+            return column.range(-np.inf, bound)
+        if op == "gt":
+            return column.range(bound, np.inf, include_low=False)
+        return column.range(bound, np.inf)
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _normalise_category(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).strip().strip('"').strip("'")
+
+
+def _postings(positions: Iterable[int]) -> np.ndarray:
+    return np.unique(np.fromiter(positions, dtype=np.int32))
+
+
+def build_trait_index(traits: TraitColumns) -> TraitIndex:
+    """Scan every trait column once and build inverted lists and sorted arrays."""
+
+    categorical: dict[str, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+    numeric_values: dict[str, list[float]] = defaultdict(list)
+    numeric_positions: dict[str, list[int]] = defaultdict(list)
+
+    for key in traits.names:
+        for position, value in enumerate(traits.decode(key)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                # Numeric sequences (HPD bounds, polygons) are not filterable values.
+                for item in value:
+                    if isinstance(item, str):
+                        categorical[key][_normalise_category(item)].append(position)
+            elif _is_number(value):
+                numeric_values[key].append(float(value))
+                numeric_positions[key].append(position)
+            else:
+                categorical[key][_normalise_category(value)].append(position)
+
+    categorical_columns: dict[str, CategoricalColumn] = {}
+    for key, postings in categorical.items():
+        arrays = {value: _postings(positions) for value, positions in postings.items()}
+        present = reduce(np.union1d, arrays.values())
+        categorical_columns[key] = CategoricalColumn(postings=arrays, present=present)
+
+    numeric_columns: dict[str, NumericColumn] = {}
+    for key, values in numeric_values.items():
+        array = np.asarray(values, dtype=np.float64)
+        positions = np.asarray(numeric_positions[key], dtype=np.int32)
+        finite = np.isfinite(array)
+        order = np.argsort(array[finite], kind="stable")
+        numeric_columns[key] = NumericColumn(values=array[finite][order], positions=positions[finite][order])
+
+    return TraitIndex(size=traits.size, categorical=categorical_columns, numeric=numeric_columns)
+
+
+def get_trait_index(cached: CachedTree) -> TraitIndex:
+    """Return the trait index of ``cached``, building it once per parsed tree."""
+
+    return cached.derived("trait_index", lambda: build_trait_index(get_trait_columns(cached)))
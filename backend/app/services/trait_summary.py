@@ -0,0 +1,105 @@
+"""Trait frequency tables and numeric distributions computed once per tree."""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Any
+
+import numpy as np
+
+from ..models.traits import NumericTraitSummary, TraitSummaryEntry, TraitSummaryResult
+from .columnar import TraitColumns, get_trait_columns
+from .tree_service import CachedTree
+
+HISTOGRAM_BINS = 10
+SUMMARY_QUANTILES = (0.0, 0.025, 0.25, 0.5, 0.75, 0.975, 1.0)
+
+
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _stringify(value: Any) -> str:
+    """Format a value exactly like ``stringifyValue`` in the frontend."""
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.3f}"
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _numeric_entry(trait: str, values: list[Any]) -> TraitSummaryEntry:
+    array = np.asarray(values, dtype=np.float64)
+    finite = array[np.isfinite(array)]
+    if finite.size == 0:
+        return TraitSummaryEntry(trait=trait, kind="numeric", total=len(values), distinct=0)
+
+    counts, edges = np.histogram(finite, bins=HISTOGRAM_BINS)
+    quantiles = np.quantile(finite, SUMMARY_QUANTILES)
+    bins = [
+        (f"{edges[index]:.3f} – {edges[index + 1]:.3f}", int(count))
+        for index, count in enumerate(counts)
+        if count
+    ]
+    bins.sort(key=lambda item: item[1], reverse=True)
+
+    return TraitSummaryEntry(
+        trait=trait,
+        kind="numeric",
+        total=len(values),
+        distinct=int(np.unique(finite).size),
+        values=bins,
+        numeric=NumericTraitSummary(
+            count=int(finite.size),
+            minimum=float(finite.min()),
+            maximum=float(finite.max()),
+            mean=float(finite.mean()),
+            quantiles={str(probability): float(value) for probability, value in zip(SUMMARY_QUANTILES, quantiles)},
+            histogram_edges=edges.tolist(),
+            histogram_counts=counts.tolist(),
+        ),
+    )
+
+
+def build_trait_summary(traits: TraitColumns) -> TraitSummaryResult:
+    """Summarise every trait in one pass: frequencies or histograms plus quantiles."""
+
+    observed: dict[str, list[Any]] = defaultdict(list)
+    for key in traits.names:
+        for value in traits.decode(key):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                observed[key].extend(value)
+            else:
+                observed[key].append(value)
+
+    entries: list[TraitSummaryEntry] = []
+    for trait, values in observed.items():
+        if values and all(_is_numeric(value) for value in values):
+            entries.append(_numeric_entry(trait, values))
+            continue
+        frequencies = Counter(map(_stringify, values))
+        entries.append(
+            TraitSummaryEntry(
+                trait=trait,
+                kind="categorical",
+                total=len(values),
+                distinct=len(frequencies),
+                values=frequencies.most_common(),
+            )
+        )
+
+    entries.sort(key=lambda entry: entry.total, reverse=True)
+    return TraitSummaryResult(node_count=traits.size, traits=entries)
+
+
+def get_trait_summary(cached: CachedTree) -> TraitSummaryResult:
+    """Return the trait summary of ``cached``, building it once per parsed tree."""
+
+    return cached.derived("trait_summary", lambda: build_trait_summary(get_trait_columns(cached)))
@@ -0,0 +1,169 @@
+"""Euler-tour index answering ancestry, MRCA and distance queries in O(1)/O(log n)."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from .columnar import ColumnarTree, get_columnar_tree
+from .tree_service import CachedTree
+
+
+@dataclass(frozen=True)
+class TreeIndex:
+    """Preorder intervals, depths and a sparse table for LCA queries.
+
+    Every node ``v`` owns the preorder interval ``[tin[v], tout[v])``; its
+    descendants are exactly the nodes whose ``tin`` falls inside it. LCAs use a
+    range-minimum sparse table over depths in preorder (the compact form of the
+    classic Euler-tour RMQ): for ``tin[u] < tin[v]`` the LCA is the parent of
+    the shallowest node in ``(tin[u], tin[v]]``.
+    """
+
+    tree: ColumnarTree
+    preorder: np.ndarray
+    tin: np.ndarray
+    tout: np.ndarray
+    postorder_rank: np.ndarray
+    depth: np.ndarray
+    tip_ranks: np.ndarray
+    tips_by_rank: np.ndarray
+    sparse: list[np.ndarray]
+    label_index: dict[str, int]
+
+    def resolve(self, reference: str) -> int:
+        """Map a node id or node label to its position; raise ``KeyError`` if unknown."""
+
+        position = self.tree.index.get(reference)
+        if position is None:
+            position = self.label_index.get(reference)
+        if position is None:
+            raise KeyError(f"Unknown node '{reference}'.")
+        return position
+
+    def is_ancestor(self, ancestor: int, descendant: int) -> bool:
+        """Return True when ``ancestor`` is a strict ancestor of ``descendant``."""
+
+        return bool(
+            ancestor != descendant
+            and self.tin[ancestor] <= self.tin[descendant] < self.tout[ancestor]
+        )
+
+    def descendant_tips(self, position: int) -> np.ndarray:
+        """Return tip positions below ``position`` in preorder (O(log n) + output)."""
+
+        start, stop = self._tip_slice(position)
+        return self.tips_by_rank[start:stop]
+
+    def descendant_tip_count(self, position: int) -> int:
+        start, stop = self._tip_slice(position)
+        return int(stop - start)
+
+    def lca(self, first: int, second: int) -> int:
+        """Return the lowest common ancestor of two nodes in O(1)."""
+
+        if first == second:
+            return first
+        low, high = sorted((int(self.tin[first]), int(self.tin[second])))
+        low += 1
+        level = (high - low + 1).bit_length() - 1
+        left = self.sparse[level][low]
+        right = self.sparse[level][high - (1 << level) + 1]
+        shallowest = left if self.depth[self.preorder[left]] <= self.depth[self.preorder[right]] else right
+        return int(self.tree.parent[self.preorder[shallowest]])
+
+    def mrca(self, positions: Iterable[int]) -> int:
+        """Return the MRCA of several nodes: the LCA of the first and last in preorder."""
+
+        candidates = np.fromiter(positions, dtype=np.int64)
+        if candidates.size == 0:
+            raise ValueError("At least one node is required to find an MRCA.")
+        ranks = self.tin[candidates]
+        return self.lca(int(candidates[np.argmin(ranks)]), int(candidates[np.argmax(ranks)]))
+
+    def patristic_distance(self, first: int, second: int) -> float:
+        """Return the summed branch length on the path between two nodes."""
+
+        ancestor = self.lca(first, second)
+        times = self.tree.time_from_root
+        return float(times[first] + times[second] - 2.0 * times[ancestor])
+
+    def _tip_slice(self, position: int) -> tuple[int, int]:
+        start = int(np.searchsorted(self.tip_ranks, self.tin[position], side="left"))
+        stop = int(np.searchsorted(self.tip_ranks, self.tout[position], side="left"))
+        return start, stop
+
+
+def build_tree_index(tree: ColumnarTree) -> TreeIndex:
+    """Number ``tree`` in preorder and build the LCA sparse table."""
+
+    size = tree.size
+    starts = tree.child_start.tolist()
+    children = tree.child_index.tolist()
+    parents = tree.parent.tolist()
+
+    # Iterative DFS; children are pushed in reverse so they are visited in file order.
+    order: list[int] = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(reversed(children[starts[node] : starts[node + 1]]))
+
+    depth_list = [0] * size
+    for node in order[1:]:
+        depth_list[node] = depth_list[parents[node]] + 1
+    subtree_size = [1] * size
+    for node in reversed(order[1:]):
+        subtree_size[parents[node]] += subtree_size[node]
+
+    preorder = np.asarray(order, dtype=np.int32)
+    tin = np.empty(size, dtype=np.int32)
+    tin[preorder] = np.arange(size, dtype=np.int32)
+    depth = np.asarray(depth_list, dtype=np.int32)
+    tout = tin + np.asarray(subtree_size, dtype=np.int32)
+    # Nodes preceding v in postorder: earlier preorder nodes minus v's ancestors,
+    # plus v's own descendants.
+    postorder_rank = tin - depth + (tout - tin) - 1
+
+    tip_mask = tree.is_tip
+    tips_by_rank = preorder[tip_mask[preorder]]
+    tip_ranks = tin[tips_by_rank]
+
+    sequence_depth = depth[preorder]
+    sparse = [np.arange(size, dtype=np.int32)]
+    span = 1
+    while span * 2 <= size:
+        previous = sparse[-1]
+        left = previous[: size - 2 * span + 1]
+        right = previous[span : span + left.size]
+        sparse.append(np.where(sequence_depth[left] <= sequence_depth[right], left, right))
+        span *= 2
+
+    label_index: dict[str, int] = {}
+    # Tips first so a label shared with an internal node resolves to the tip.
+    for position in np.concatenate([np.flatnonzero(tip_mask), np.flatnonzero(~tip_mask)]).tolist():
+        label = tree.labels[position]
+        if label and label not in label_index:
+            label_index[label] = position
+
+    return TreeIndex(
+        tree=tree,
+        preorder=preorder,
+        tin=tin,
+        tout=tout,
+        postorder_rank=postorder_rank,
+        depth=depth,
+        tip_ranks=tip_ranks,
+        tips_by_rank=tips_by_rank,
+        sparse=sparse,
+        label_index=label_index,
+    )
+
+
+def get_tree_index(cached: CachedTree) -> TreeIndex:
+    """Return the index of ``cached``, building it once per parsed tree."""
+
+    return cached.derived("tree_index", lambda: build_tree_index(get_columnar_tree(cached)))
@@ -6,10 +6,7 @@ import re
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
-DEBUG_TRACE_FILE = Path("debug_trace.log")
-
-from Bio import Phylo
-
+from ..core.timing import span
 from ..models.tree import TreeEdge, TreeMetadata, TreeNode, TreePayload
 
 logger = logging.getLogger(__name__)
@@ -110,26 +107,28 @@ TOKEN_PATTERN = re.compile(r"([(),])\s*(\d+)(?=[:\[,)\)])")
 
 def _load_nexus_tree(tree_path: Path):
     try:
-        raw_text = tree_path.read_text(encoding="utf-8")
+        with span("file_read"):
+            raw_text = tree_path.read_text(encoding="utf-8")
     except OSError as exc:
         raise TreeParseError(f"Failed to read nexus tree file: {exc}") from exc
 
-    translate_block = _extract_translate_block(raw_text)
-    translate_map = _parse_translate_block(translate_block)
+    with span("nexus_translate"):
+        translate_block = _extract_translate_block(raw_text)
+        translate_map = _parse_translate_block(translate_block)
 
-    tree_string = _extract_tree_string(raw_text)
-    replaced_tree = _apply_translate_map(tree_string, translate_map)
+        tree_string = _extract_tree_string(raw_text)
+        replaced_tree = _apply_translate_map(tree_string, translate_map)
 
     logger.info(
         "Parsed nexus translate block",
-        extra={"tree_path": str(tree_path), "map_size": len(translate_map)},
+        extra={"tree_path": str(tree_path), "map_size": len(translate_map), "length": len(replaced_tree)},
     )
 
-    _append_debug(
-        f"prepare_nexus:complete:{tree_path}:length={len(replaced_tree)}\n"
-    )
+    # Biopython is imported on first parse; it dominates the API's import time.
+    from Bio import Phylo  # noqa: PLC0415
 
-    return Phylo.read(io.StringIO(replaced_tree), "newick")
+    with span("phylo_parse"):
+        return Phylo.read(io.StringIO(replaced_tree), "newick")
 
 
 def _extract_translate_block(raw_text: str) -> str:
@@ -193,8 +192,6 @@ def load_mcc_tree(tree_path: Path) -> TreePayload:
 
     tree_format = _ensure_tree_format(tree_path)
 
-    _append_debug(f"load_mcc_tree:start:{tree_path}:{tree_format}\n")
-
     logger.info(
         "Loading MCC tree",
         extra={"tree_path": str(tree_path), "format": tree_format},
@@ -204,8 +201,10 @@ def load_mcc_tree(tree_path: Path) -> TreePayload:
         if tree_format == "nexus":
             tree = _load_nexus_tree(tree_path)
         else:
-            tree = Phylo.read(tree_path, tree_format)
-        _append_debug(f"load_mcc_tree:parsed:{tree_path}\n")
+            from Bio import Phylo  # noqa: PLC0415
+
+            with span("phylo_parse"):
+                tree = Phylo.read(tree_path, tree_format)
         logger.info(
             "Tree parsed",
             extra={
@@ -218,6 +217,11 @@ def load_mcc_tree(tree_path: Path) -> TreePayload:
         logger.exception("Biopython failed to read MCC tree", extra={"tree_path": str(tree_path)})
         raise TreeParseError(f"Failed to parse MCC tree: {exc}") from exc
 
+    with span("tree_walk"):
+        return _build_payload(tree_path, tree)
+
+
+def _build_payload(tree_path: Path, tree) -> TreePayload:
     depths: Dict[Any, float] = tree.depths()
     if not depths:
         logger.error(
@@ -265,8 +269,6 @@ def load_mcc_tree(tree_path: Path) -> TreePayload:
 
     walk(tree.root)
 
-    _append_debug(f"load_mcc_tree:end:{tree_path}:nodes={len(nodes)}\n")
-
     metadata = TreeMetadata(
         name=getattr(tree, "name", None),
         root_height=max_depth,
@@ -274,11 +276,3 @@ def load_mcc_tree(tree_path: Path) -> TreePayload:
     )
 
     return TreePayload(nodes=list(nodes.values()), edges=edges, metadata=metadata)
-
-
-def _append_debug(message: str) -> None:
-    try:
-        with DEBUG_TRACE_FILE.open("a", encoding="utf-8") as handle:
-            handle.write(message)
-    except Exception:
-        pass
@@ -1,13 +1,165 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from ..core.config import get_settings
+from ..core.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, TREE_NODES, TREE_PARSE_SECONDS
 from ..models.tree import TreePayload
+from .admission import estimate_parse_bytes, get_admission_controller
+from .shared_cache import get_shared_cache
+from .single_flight import get_single_flight
 from .tree_parser import TreeParseError, load_mcc_tree
 
+T = TypeVar("T")
+
+
+def file_signature(path: Path) -> tuple[str, int, int]:
+    """Return a cache key that changes whenever the file is replaced or edited."""
+
+    stat = path.stat()
+    return (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass
+class CachedTree:
+    """A tree file version together with structures derived from it on demand.
+
+    The parsed ``payload`` is loaded on first access. When another worker has
+    already parsed this version, derived structures built from the shared
+    columns (see :mod:`.columnar`) never need it, so such a worker does not
+    hold its own ``TreePayload``.
+    """
+
+    path: Path
+    signature: tuple[str, int, int]
+    _payload: Optional[TreePayload] = field(default=None, repr=False)
+    _derived: dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def payload(self) -> TreePayload:
+        """The parsed tree, unpickled from the shared cache or parsed on first use."""
+
+        payload = self._payload
+        if payload is None:
+            payload = get_single_flight("tree_payload").do(
+                self.signature, lambda: self._payload or _parse_tree(self.path, self.signature)
+            )
+            self._payload = payload
+        return payload
+
+    def derived(self, key: str, factory: Callable[[], T]) -> T:
+        """Return the structure cached under ``key``, building it once if missing.
+
+        Derived structures live and die with the parsed tree, so they are
+        rebuilt automatically when the file changes. Concurrent requests for
+        the same missing key wait for a single build, while different keys
+        build in parallel.
+        """
+
+        with self._lock:
+            if key in self._derived:
+                CACHE_HITS.inc(cache="tree_derived")
+                return self._derived[key]
+        CACHE_MISSES.inc(cache="tree_derived")
+
+        def build() -> T:
+            with self._lock:
+                if key in self._derived:
+                    return self._derived[key]
+            value = factory()
+            with self._lock:
+                self._derived[key] = value
+            return value
+
+        return get_single_flight("tree_derived").do((self.signature, key), build)
+
+
+def _parse_tree(path: Path, signature: tuple[str, int, int]) -> TreePayload:
+    # Another worker process may already have parsed this file version.
+    shared = get_shared_cache()
+    if shared is not None:
+        payload = shared.load_object(signature, "payload")
+        if isinstance(payload, TreePayload):
+            CACHE_HITS.inc(cache="shared_payload")
+            return payload
+        CACHE_MISSES.inc(cache="shared_payload")
+    estimate = estimate_parse_bytes(signature[2])
+    with get_admission_controller().admit(estimate, f"Parsing {path.name}"):
+        started = time.perf_counter()
+        payload = load_mcc_tree(path)
+    TREE_PARSE_SECONDS.observe(time.perf_counter() - started)
+    TREE_NODES.observe(len(payload.nodes))
+    if shared is not None:
+        shared.store_object(signature, "payload", payload)
+    return payload
+
+
+class TreeCache:
+    """Bounded LRU of parsed trees keyed by resolved path."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, CachedTree] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> CachedTree:
+        if not path.exists():
+            raise FileNotFoundError(f"Tree file not found: {path}")
+        signature = file_signature(path)
+        key = signature[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                CACHE_HITS.inc(cache="tree")
+                return entry
+        CACHE_MISSES.inc(cache="tree")
+
+        # Concurrent misses for the same file version share one parse.
+        return get_single_flight("tree_load").do(signature, lambda: self._load(path, signature))
+
+    def _load(self, path: Path, signature: tuple[str, int, int]) -> CachedTree:
+        key = signature[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                return entry
+
+        shared = get_shared_cache()
+        if shared is not None and shared.lookup(signature, "payload") is not None:
+            # This version parsed fine in another worker; attach without unpickling it.
+            entry = CachedTree(path=path, signature=signature)
+        else:
+            entry = CachedTree(path=path, signature=signature, _payload=_parse_tree(path, signature))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache="tree")
+        return entry
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache(maxsize=1)
+def get_tree_cache() -> TreeCache:
+    return TreeCache(get_settings().tree_cache_size)
+
 
 class MCCTreeService:
     """Service layer for accessing MCC tree data."""
@@ -36,8 +188,11 @@ class MCCTreeService:
         )
 
     def load_tree(self, filename: Optional[str] = None) -> TreePayload:
+        return self.load_cached(filename).payload
+
+    def load_cached(self, filename: Optional[str] = None) -> CachedTree:
         path = self.resolve_tree_path(filename)
-        return load_mcc_tree(path)
+        return get_tree_cache().get(path)
 
 
 @lru_cache(maxsize=8)
@@ -0,0 +1,189 @@
+"""Compact binary columnar encoding of a parsed tree for the browser.
+
+Layout (all integers little-endian)::
+
+    magic          4 bytes   b"MPLT"
+    version        uint32    BINARY_TREE_VERSION
+    header_length  uint32    byte length of the JSON header
+    header         UTF-8 JSON, space-padded so the body starts 8-byte aligned
+    body           column buffers, each 8-byte aligned
+
+The header lists every buffer as ``{"name", "dtype", "offset", "length"}``
+(``offset`` in bytes from the body start, ``length`` in elements, ``dtype``
+one of ``int32``/``float64``) so the client can wrap them in ``Int32Array`` /
+``Float64Array`` views without copying. Per-node columns are:
+
+- ``parent``: parent position, ``-1`` for the root (edges are implied);
+- ``branch_length``, ``time_from_root``, ``time_before_present``: ``NaN`` when missing;
+- ``id`` and ``label``: ``int32`` codes into a header ``dictionary`` (``-1`` = null).
+
+Traits are listed under ``traits`` as ``{"name", "kind", "column",
+"dictionary"?}``: ``numeric`` traits are ``float64`` columns with ``NaN`` for
+absent values, ``categorical`` traits are ``int32`` codes into a string
+dictionary, and ``json`` traits (lists, booleans, mixed types) are codes
+into a dictionary of JSON-encoded values. Code ``-1`` marks an absent trait.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from ..models.tree import TreePayload
+from .shared_cache import get_shared_cache
+from .single_flight import get_single_flight
+from .tree_service import CachedTree, file_signature, get_tree_cache
+
+BINARY_TREE_MAGIC = b"MPLT"
+BINARY_TREE_VERSION = 1
+BINARY_TREE_MEDIA_TYPE = "application/vnd.maple.tree"
+_ALIGNMENT = 8
+
+
+def _dictionary_codes(values: list[Optional[str]]) -> tuple[np.ndarray, list[str]]:
+    lookup: dict[str, int] = {}
+    codes = np.fromiter(
+        (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(lookup)
+
+
+def _trait_kind(values: list[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "numeric"
+    if all(isinstance(value, str) for value in present):
+        return "categorical"
+    return "json"
+
+
+def encode_tree_binary(payload: TreePayload) -> bytes:
+    """Encode ``payload`` in the layout described in the module docstring."""
+
+    nodes = payload.nodes
+    size = len(nodes)
+    index = {node.id: position for position, node in enumerate(nodes)}
+    parent = np.full(size, -1, dtype=np.int32)
+    for position, node in enumerate(nodes):
+        if node.parent_id is not None and node.parent_id in index:
+            parent[position] = index[node.parent_id]
+
+    columns: list[tuple[str, np.ndarray]] = [
+        ("parent", parent),
+        (
+            "branch_length",
+            np.fromiter(
+                (math.nan if node.branch_length is None else node.branch_length for node in nodes),
+                dtype=np.float64,
+                count=size,
+            ),
+        ),
+        ("time_from_root", np.fromiter((node.time_from_root for node in nodes), dtype=np.float64, count=size)),
+        (
+            "time_before_present",
+            np.fromiter((node.time_before_present for node in nodes), dtype=np.float64, count=size),
+        ),
+    ]
+    dictionaries: dict[str, list[str]] = {}
+    for name, values in (("id", [node.id for node in nodes]), ("label", [node.label for node in nodes])):
+        codes, dictionary = _dictionary_codes(values)
+        columns.append((name, codes))
+        dictionaries[name] = dictionary
+
+    trait_names: dict[str, None] = {}
+    for node in nodes:
+        trait_names.update(dict.fromkeys(node.traits or {}))
+    traits = []
+    for trait_position, name in enumerate(trait_names):
+        values = [(node.traits or {}).get(name) for node in nodes]
+        kind = _trait_kind(values)
+        column_name = f"trait:{trait_position}"
+        entry: dict[str, Any] = {"name": name, "kind": kind, "column": column_name}
+        if kind == "numeric":
+            columns.append(
+                (
+                    column_name,
+                    np.fromiter((math.nan if value is None else value for value in values), dtype=np.float64, count=size),
+                )
+            )
+        else:
+            if kind == "json":
+                values = [None if value is None else json.dumps(value, separators=(",", ":")) for value in values]
+            codes, dictionary = _dictionary_codes(values)
+            columns.append((column_name, codes))
+            entry["dictionary"] = dictionary
+        traits.append(entry)
+
+    descriptors = []
+    body_offset = 0
+    for name, array in columns:
+        descriptors.append(
+            {"name": name, "dtype": str(array.dtype), "offset": body_offset, "length": int(array.size)}
+        )
+        body_offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    header = json.dumps(
+        {
+            "node_count": size,
+            "metadata": payload.metadata.dict(),
+            "columns": descriptors,
+            "dictionaries": dictionaries,
+            "traits": traits,
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+    prefix_length = len(BINARY_TREE_MAGIC) + 8
+    header += b" " * (-(prefix_length + len(header)) % _ALIGNMENT)
+
+    body = bytearray(body_offset)
+    for descriptor, (_, array) in zip(descriptors, columns):
+        start = descriptor["offset"]
+        body[start : start + array.nbytes] = array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes()
+    return BINARY_TREE_MAGIC + struct.pack("<II", BINARY_TREE_VERSION, len(header)) + header + bytes(body)
+
+
+def get_tree_binary(cached: CachedTree) -> bytes:
+    """Return the binary encoding of ``cached``, built once per parsed tree."""
+
+    return cached.derived("tree_binary", lambda: encode_tree_binary(cached.payload))
+
+
+def encode_tree_json(payload: TreePayload) -> bytes:
+    """Return the ``GET /api/tree`` JSON body of ``payload``."""
+
+    return payload.json(by_alias=True).encode("utf-8")
+
+
+def get_shared_tree_file(tree_path: Path, name: str, encode: Callable[[TreePayload], bytes]) -> Optional[Path]:
+    """Return an encoding of ``tree_path`` as a file in the shared cache, or ``None`` when it is off.
+
+    The file is looked up by the tree's signature before the tree is loaded,
+    so a worker that finds it serves the page-cache pages without parsing,
+    unpickling or holding the payload; only the worker that writes the file
+    loads the tree.
+    """
+
+    shared = get_shared_cache()
+    if shared is None:
+        return None
+    path = shared.lookup(file_signature(tree_path), name)
+    if path is not None:
+        return path
+
+    cached = get_tree_cache().get(tree_path)
+
+    def build() -> Path:
+        stored = shared.lookup(cached.signature, name)
+        return stored or shared.store_bytes(cached.signature, name, encode(cached.payload))
+
+    path = get_single_flight("shared_tree_file").do((cached.signature, name), build)
+    # The file may have been pruned since; the caller falls back to encoding in memory.
+    return path if path.is_file() else None
@@ -0,0 +1,150 @@
+"""Background pre-parsing of stored trees so first requests hit warm caches."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from ..core.config import get_settings
+from .migration_matrix import get_migration_matrix
+from .trait_summary import get_trait_summary
+from .tree_service import file_signature, get_tree_cache
+
+logger = logging.getLogger(__name__)
+
+TREE_SUFFIXES = {".tree", ".tre", ".trees", ".nexus", ".nex", ".nwk", ".newick"}
+
+
+class TreeWarmer:
+    """Pre-parse trees and their derived summaries in a daemon thread.
+
+    On start the default tree and the most recently modified trees in the
+    data directory are parsed, then the directory is polled for new or
+    replaced files. A file is warmed only once its signature is unchanged
+    between two scans, so uploads still being written are not parsed half-way.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        default_tree: Optional[Path] = None,
+        recent: int = 4,
+        watch_interval: float = 2.0,
+        cache_size: int = 8,
+    ) -> None:
+        self.data_dir = data_dir
+        self.default_tree = default_tree
+        # Warming more files than the cache holds would only evict them again.
+        self.recent = max(0, min(recent, cache_size - (1 if default_tree else 0)))
+        self.watch_interval = watch_interval
+        self._seen: dict[Path, tuple[str, int, int]] = {}
+        self._pending: dict[Path, tuple[str, int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tree-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def warm(self, path: Path) -> bool:
+        """Parse ``path`` and build its trait summary and migration matrix; return success."""
+
+        try:
+            signature = file_signature(path)
+        except OSError:
+            return False
+        # Failures are remembered too, so a broken file is retried only when it changes.
+        self._seen[path] = signature
+        try:
+            cached = get_tree_cache().get(path)
+            get_trait_summary(cached)
+            get_migration_matrix(cached)
+        except Exception:  # noqa: BLE001 - a bad file must not stop the warm-up thread
+            logger.warning("Tree warm-up failed", exc_info=True, extra={"tree_path": str(path)})
+            return False
+        logger.info("Tree warmed", extra={"tree_path": str(path)})
+        return True
+
+    def scan(self) -> dict[Path, tuple[str, int, int]]:
+        """Return the signature of every tree file directly inside the data directory."""
+
+        signatures: dict[Path, tuple[str, int, int]] = {}
+        if not self.data_dir.is_dir():
+            return signatures
+        for entry in self.data_dir.iterdir():
+            if entry.suffix.lower() not in TREE_SUFFIXES:
+                continue
+            try:
+                if entry.is_file():
+                    signatures[entry.resolve()] = file_signature(entry)
+            except OSError:
+                continue
+        return signatures
+
+    def poll(self) -> list[Path]:
+        """Warm files that are new or changed and were stable since the last poll."""
+
+        current = self.scan()
+        ready = [
+            path
+            for path, signature in current.items()
+            if self._seen.get(path) != signature and self._pending.get(path) == signature
+        ]
+        self._pending = {
+            path: signature for path, signature in current.items() if self._seen.get(path) != signature
+        }
+        warmed = []
+        for path in ready:
+            if self._stop.is_set():
+                break
+            self._pending.pop(path, None)
+            if self.warm(path):
+                warmed.append(path)
+        return warmed
+
+    def _initial_targets(self) -> list[Path]:
+        targets: list[Path] = []
+        if self.default_tree is not None and Path(self.default_tree).is_file():
+            targets.append(Path(self.default_tree).resolve())
+        recent = sorted(self.scan().items(), key=lambda item: item[1][1], reverse=True)
+        for path, _ in recent[: self.recent]:
+            if path not in targets:
+                targets.append(path)
+        return targets
+
+    def _run(self) -> None:
+        for path in self._initial_targets():
+            if self._stop.is_set():
+                return
+            self.warm(path)
+        # Files present at startup but not warmed count as seen; only changes trigger work.
+        for path, signature in self.scan().items():
+            self._seen.setdefault(path, signature)
+        if self.watch_interval <= 0:
+            return
+        while not self._stop.wait(self.watch_interval):
+            self.poll()
+
+
+@lru_cache(maxsize=1)
+def get_tree_warmer() -> TreeWarmer:
+    settings = get_settings()
+    return TreeWarmer(
+        data_dir=settings.data_dir,
+        default_tree=settings.default_tree_path,
+        recent=settings.warmup_recent,
+        watch_interval=settings.watch_interval,
+        cache_size=settings.tree_cache_size,
+    )
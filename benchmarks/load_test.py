@@ -0,0 +1,344 @@
+"""Concurrent end-to-end load test of the API on synthetic trees.
+
+Many client threads replay a weighted mix of ``GET /api/tree`` (JSON and
+binary), ``POST /api/analysis/discrete``, ``POST /api/analysis/discrete/compare``
+and ``GET /api/analysis/migration/matrix`` calls over keep-alive HTTP
+connections. The run reports throughput and p50/p95/p99 latency per
+operation, which exposes event-loop blocking and lock contention that
+micro-benchmarks do not.
+
+The server can be:
+
+- a local ``uvicorn`` subprocess (default), started on a free localhost port
+  with a scratch data directory; ``--workers`` sets its process count;
+- the app running in this process (``--in-process``), which is convenient
+  but shares the GIL with the clients;
+- an already running server (``--url``); the synthetic trees are uploaded to
+  it, and every analysis call stores artefacts in its data directory.
+
+Only localhost traffic is generated. Trees come from ``synthetic_tree.py``
+and are written to a scratch directory, which is removed after the run
+(with everything a spawned server stored in it) unless ``--keep`` is given.
+
+Usage (from the repository root)::
+
+    python benchmarks/load_test.py --tips 2000 --trees 3 --concurrency 16 --duration 30
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --mix tree=4,matrix=2
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_MIX = "tree=3,tree_binary=3,analysis=2,compare=1,matrix=2"
+OPERATIONS = ("tree", "tree_binary", "analysis", "compare", "matrix")
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: Optional[bytes] = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def _build_request(operation: str, trees: list[str], rng: random.Random) -> Request:
+    tree = rng.choice(trees)
+    if operation == "tree":
+        return Request("GET", "/api/tree?" + urlencode({"filename": tree}))
+    if operation == "tree_binary":
+        return Request("GET", "/api/tree?" + urlencode({"filename": tree, "format": "binary"}))
+    if operation == "analysis":
+        body = urlencode({"filename": tree}).encode("ascii")
+        return Request("POST", "/api/analysis/discrete", body, {"Content-Type": "application/x-www-form-urlencoded"})
+    if operation == "compare":
+        pair = rng.sample(trees, 2) if len(trees) > 1 else [tree, tree]
+        body = json.dumps({"filenames": pair}).encode("utf-8")
+        return Request("POST", "/api/analysis/discrete/compare", body, {"Content-Type": "application/json"})
+    if operation == "matrix":
+        return Request("GET", "/api/analysis/migration/matrix?" + urlencode({"filename": tree}))
+    raise ValueError(f"Unknown operation '{operation}'.")
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}' in --mix; expected {', '.join(OPERATIONS)}.")
+        mix[name] = float(weight or 1.0)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("--mix needs at least one positive weight.")
+    return mix
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, int(-(-fraction * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadTest:
+    def __init__(self, base_url: str, trees: list[str], mix: dict[str, float], seed: int) -> None:
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.trees = trees
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {name: [] for name in self.operations}
+        self.errors: dict[str, int] = {name: 0 for name in self.operations}
+        self.statuses: dict[str, dict[int, int]] = {name: {} for name in self.operations}
+
+    def _client(self, index: int, record_after: float, stop_at: float) -> None:
+        rng = random.Random(self.seed * 1_000_003 + index)
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=300)
+        while time.perf_counter() < stop_at:
+            operation = rng.choices(self.operations, weights=self.weights)[0]
+            request = _build_request(operation, self.trees, rng)
+            started = time.perf_counter()
+            status = 0
+            try:
+                connection.request(request.method, request.path, body=request.body, headers=request.headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=300)
+            elapsed = time.perf_counter() - started
+            if started < record_after:
+                continue
+            with self._lock:
+                self.statuses[operation][status] = self.statuses[operation].get(status, 0) + 1
+                if 200 <= status < 300:
+                    self.latencies[operation].append(elapsed)
+                else:
+                    self.errors[operation] += 1
+        connection.close()
+
+    def run(self, concurrency: int, duration: float, warmup: float) -> float:
+        started = time.perf_counter()
+        record_after = started + warmup
+        stop_at = record_after + duration
+        threads = [
+            threading.Thread(target=self._client, args=(index, record_after, stop_at), daemon=True)
+            for index in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Requests still running at stop_at finish late; measure the real window.
+        return max(time.perf_counter() - record_after, 1e-9)
+
+    def report(self, elapsed: float) -> dict[str, dict[str, float]]:
+        rows: dict[str, dict[str, float]] = {}
+        everything: list[float] = []
+        total_errors = 0
+        for operation in self.operations:
+            values = sorted(self.latencies[operation])
+            everything.extend(values)
+            total_errors += self.errors[operation]
+            rows[operation] = self._summary(values, self.errors[operation], elapsed)
+            rows[operation]["statuses"] = {str(code): count for code, count in sorted(self.statuses[operation].items())}
+        rows["all"] = self._summary(sorted(everything), total_errors, elapsed)
+        return rows
+
+    @staticmethod
+    def _summary(values: list[float], errors: int, elapsed: float) -> dict[str, float]:
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": _percentile(values, 0.50) * 1000.0,
+            "p95_ms": _percentile(values, 0.95) * 1000.0,
+            "p99_ms": _percentile(values, 0.99) * 1000.0,
+            "max_ms": (values[-1] if values else float("nan")) * 1000.0,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, timeout: float) -> None:
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request("GET", "/api/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout:.0f} s.")
+
+
+def _upload(base_url: str, path: Path) -> None:
+    parts = urlsplit(base_url)
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{path.name}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8") + path.read_bytes() + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=300)
+    connection.request(
+        "POST", "/api/tree/upload", body=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    response = connection.getresponse()
+    detail = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"Uploading {path.name} failed with {response.status}: {detail[:200]!r}")
+
+
+def _start_in_process(port: int):
+    import uvicorn  # noqa: PLC0415
+
+    from backend.app.main import app  # noqa: PLC0415
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="load-test-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server; trees are uploaded to it.")
+    target.add_argument("--in-process", action="store_true", help="Serve the app from this process.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes of the spawned server.")
+    parser.add_argument("--trees", type=int, default=3, help="Number of synthetic trees to serve.")
+    parser.add_argument("--tips", type=int, default=2000, help="Tips per synthetic tree.")
+    parser.add_argument("--states", type=int, default=8, help="Location states per synthetic tree.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds of load.")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring starts.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default {DEFAULT_MIX}).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the trees and the request sequence.")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON to this file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory of trees and artefacts.")
+    args = parser.parse_args()
+    mix = _parse_mix(args.mix)
+
+    sys.path[:0] = [str(REPO_ROOT), str(BENCHMARK_DIR)]
+    from synthetic_tree import write_mcc_tree  # noqa: PLC0415
+
+    workdir = Path(tempfile.mkdtemp(prefix="maple-load-"))
+    trees: list[Path] = []
+    process: Optional[subprocess.Popen] = None
+    server = server_thread = None
+    try:
+        for index in range(max(1, args.trees)):
+            path = write_mcc_tree(workdir / f"load_{index}.tree", args.tips, args.states, seed=args.seed + index)
+            trees.append(path)
+
+        if args.url:
+            base_url = args.url.rstrip("/")
+            _wait_until_ready(base_url, 30.0)
+            for path in trees:
+                _upload(base_url, path)
+        else:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            # The server reads the synthetic trees from, and writes its artefacts to, the scratch directory.
+            environment = {**os.environ, "LOCALPHYLOGEO_DATA_DIR": str(workdir)}
+            if args.in_process:
+                os.environ.update(environment)
+                server, server_thread = _start_in_process(port)
+            else:
+                process = subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "uvicorn",
+                        "backend.app.main:app",
+                        "--host",
+                        "127.0.0.1",
+                        "--port",
+                        str(port),
+                        "--workers",
+                        str(max(1, args.workers)),
+                        "--log-level",
+                        "warning",
+                    ],
+                    cwd=REPO_ROOT,
+                    env=environment,
+                )
+            _wait_until_ready(base_url, 60.0)
+
+        test = LoadTest(base_url, [path.name for path in trees], mix, args.seed)
+        print(
+            f"Load test: {args.concurrency} clients, {args.duration:g} s (+{args.warmup:g} s warm-up),"
+            f" {len(trees)} trees x {args.tips} tips against {base_url}",
+            flush=True,
+        )
+        elapsed = test.run(max(1, args.concurrency), args.duration, args.warmup)
+        report = test.report(elapsed)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            server_thread.join(timeout=10)
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        # The spawned server wrote its analysis artefacts here as well.
+        if args.keep:
+            print(f"Kept scratch directory {workdir}", flush=True)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'operation':<12} {'ok':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for operation, row in report.items():
+        print(
+            f"{operation:<12} {row['requests']:>7} {row['errors']:>7} {row['throughput_rps']:>8.1f}"
+            f" {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}"
+        )
+    if args.output:
+        document = {
+            "concurrency": args.concurrency,
+            "duration": elapsed,
+            "trees": len(trees),
+            "tips": args.tips,
+            "mix": mix,
+            "results": report,
+        }
+        args.output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    return 1 if report["all"]["requests"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
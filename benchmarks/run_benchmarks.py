@@ -0,0 +1,213 @@
+"""Time and peak-memory benchmarks of the parse/analysis pipeline on synthetic trees.
+
+For every requested tip count a deterministic MCC tree is generated (see
+``synthetic_tree.py``), then each case is run ``--repeat`` times:
+
+- ``parse``: ``load_mcc_tree`` on the NEXUS file;
+- ``analysis``: ``DiscreteAnalysisService.run_analysis`` including artefact writes;
+- ``matrix``: migration matrix of a freshly parsed tree;
+- ``comparison``: comparison of two analyses with a 100-resample permutation test;
+- ``serialize_json`` / ``serialize_binary``: the ``GET /api/tree`` encodings.
+
+After one untimed warm-up run the median wall time is reported. The peak
+traced Python allocation is measured in a separate run so tracing does not
+distort the timings. Results can be written as JSON and compared against an
+earlier run; the script exits non-zero when a case got slower than
+``--tolerance`` allows. The generated trees and analysis artefacts live in a
+scratch directory that is removed afterwards unless ``--keep`` is given.
+
+Usage (from the repository root)::
+
+    python benchmarks/run_benchmarks.py --tips 1000 10000 --output bench.json
+    python benchmarks/run_benchmarks.py --tips 1000 10000 --baseline bench.json --tolerance 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = Path(__file__).resolve().parent
+CASES = ("parse", "analysis", "matrix", "comparison", "serialize_json", "serialize_binary")
+
+Setup = Callable[[], Callable[[], Any]]
+
+
+def _build_cases(tree_path: Path, other_path: Path) -> dict[str, Setup]:
+    """Return, per case, a setup function that prepares inputs and returns the timed callable."""
+
+    from fastapi.encoders import jsonable_encoder  # noqa: PLC0415
+    from fastapi.responses import JSONResponse  # noqa: PLC0415
+
+    from backend.app.services.comparison_service import get_tree_comparison_service  # noqa: PLC0415
+    from backend.app.services.discrete_analysis import get_discrete_analysis_service  # noqa: PLC0415
+    from backend.app.services.migration_matrix import get_migration_matrix  # noqa: PLC0415
+    from backend.app.services.significance import PathSignificanceService  # noqa: PLC0415
+    from backend.app.services.tree_parser import load_mcc_tree  # noqa: PLC0415
+    from backend.app.services.tree_service import CachedTree, file_signature  # noqa: PLC0415
+    from backend.app.services.tree_transport import encode_tree_binary  # noqa: PLC0415
+
+    payload = load_mcc_tree(tree_path)
+    other = load_mcc_tree(other_path)
+    analysis = get_discrete_analysis_service()
+
+    def parse() -> Callable[[], Any]:
+        return lambda: load_mcc_tree(tree_path)
+
+    def run_analysis() -> Callable[[], Any]:
+        return lambda: analysis.run_analysis(nodes=list(payload.nodes), edges=list(payload.edges))
+
+    def matrix() -> Callable[[], Any]:
+        # A fresh CachedTree each run, so the derived matrix is really rebuilt.
+        cached = CachedTree(path=tree_path, signature=file_signature(tree_path), payload=payload)
+        return lambda: get_migration_matrix(cached)
+
+    def comparison() -> Callable[[], Any]:
+        results = [
+            ("Tree 1", analysis.run_analysis(nodes=list(payload.nodes), edges=list(payload.edges))),
+            ("Tree 2", analysis.run_analysis(nodes=list(other.nodes), edges=list(other.edges))),
+        ]
+        weights = [
+            analysis.branch_transition_weights(list(tree.nodes), list(tree.edges)) for tree in (payload, other)
+        ]
+        significance = PathSignificanceService(max_workers=1)
+
+        def compare() -> Any:
+            result = get_tree_comparison_service().compare(results, top_k=10)
+            return significance.annotate(result, weights, resamples=100, seed=0, time_budget=600.0)
+
+        return compare
+
+    def serialize_json() -> Callable[[], Any]:
+        return lambda: JSONResponse(jsonable_encoder(payload)).body
+
+    def serialize_binary() -> Callable[[], Any]:
+        return lambda: encode_tree_binary(payload)
+
+    return {
+        "parse": parse,
+        "analysis": run_analysis,
+        "matrix": matrix,
+        "comparison": comparison,
+        "serialize_json": serialize_json,
+        "serialize_binary": serialize_binary,
+    }
+
+
+def _measure(setup: Setup, repeat: int) -> dict[str, float]:
+    # An untimed run first, so lazy imports (pandas, Biopython) are not counted.
+    setup()()
+    timings = []
+    for _ in range(repeat):
+        call = setup()
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+
+    call = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def _compare(results: dict[str, dict[str, dict[str, float]]], baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    regressions = []
+    for size, cases in results.items():
+        for case, measured in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if previous is None:
+                continue
+            for metric in ("median_s", "peak_mb"):
+                if previous[metric] > 0 and measured[metric] > previous[metric] * (1.0 + tolerance):
+                    regressions.append(
+                        f"{case} @ {size} tips: {metric} {previous[metric]:.4g} -> {measured[metric]:.4g}"
+                    )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tips", type=int, nargs="+", default=[1000, 10000], help="Tip counts to benchmark.")
+    parser.add_argument("--states", type=int, default=8, help="Discrete location states in the synthetic trees.")
+    parser.add_argument("--density", type=float, default=1.0, help="Fraction of annotated internal nodes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic trees.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the median is reported.")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="Cases to run.")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before failing.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory of trees and artefacts.")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="maple-bench-"))
+    # Settings are read on first import; analyses must write into the scratch directory.
+    os.environ["LOCALPHYLOGEO_DATA_DIR"] = str(workdir)
+    sys.path[:0] = [str(REPO_ROOT), str(BENCHMARK_DIR)]
+    from synthetic_tree import write_mcc_tree  # noqa: PLC0415
+
+    try:
+        results: dict[str, dict[str, dict[str, float]]] = {}
+        print(f"{'tips':>8}  {'case':<18} {'median s':>10} {'min s':>10} {'peak MB':>9}")
+        for tips in args.tips:
+            tree_path = write_mcc_tree(workdir / f"bench_{tips}.tree", tips, args.states, args.density, args.seed)
+            other_path = write_mcc_tree(
+                workdir / f"bench_{tips}_b.tree", tips, args.states, args.density, args.seed + 1
+            )
+            cases = _build_cases(tree_path, other_path)
+            results[str(tips)] = {}
+            for case in args.cases:
+                measured = _measure(cases[case], max(1, args.repeat))
+                results[str(tips)][case] = measured
+                print(
+                    f"{tips:>8}  {case:<18} {measured['median_s']:>10.4f} {measured['min_s']:>10.4f}"
+                    f" {measured['peak_mb']:>9.1f}",
+                    flush=True,
+                )
+    finally:
+        if args.keep:
+            print(f"Kept scratch directory {workdir}", flush=True)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        document = {
+            "python": sys.version.split()[0],
+            "states": args.states,
+            "density": args.density,
+            "seed": args.seed,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
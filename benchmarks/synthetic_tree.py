@@ -0,0 +1,238 @@
+"""Deterministic generator of BEAST-style NEXUS MCC trees for benchmarks.
+
+The trees look like TreeAnnotator output for a discrete phylogeographic
+analysis:
+
+- a ``taxa`` block and a ``Translate`` block, with tip dates in the taxon names;
+- ``[&...]`` annotations with ``location.set``/``location.set.prob``
+  distributions, the modal ``location``, ``height``, ``height_median`` and
+  ``height_95%_HPD``;
+- ``posterior`` on internal nodes and ``location1``/``location2`` coordinates
+  with their 80% HPD polygons.
+
+The topology comes from random pairwise coalescence of serially sampled tips,
+and states evolve down the tree with occasional jumps. Everything is drawn
+from a seeded ``random.Random``, so the same arguments always give the same
+file. Generation is iterative, so deep or large trees (up to ~1M tips) do not
+hit the recursion limit.
+
+Usage (from the repository root)::
+
+    python benchmarks/synthetic_tree.py out.tree --tips 10000 --states 8 --density 1.0 --seed 0
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Days between the earliest and the latest sampled tip.
+SAMPLING_WINDOW_DAYS = 730
+DEFAULT_END_DATE = date(2024, 1, 1)
+
+
+def _state_names(count: int) -> list[str]:
+    width = len(str(count))
+    return [f"Region{index:0{width}d}" for index in range(1, count + 1)]
+
+
+def _format_number(value: float, digits: int = 6) -> str:
+    return f"{value:.{digits}f}".rstrip("0").rstrip(".") or "0"
+
+
+class _TreeBuilder:
+    def __init__(self, tips: int, states: int, density: float, seed: int, end_date: date) -> None:
+        if tips < 2:
+            raise ValueError("tips must be at least 2.")
+        if states < 1:
+            raise ValueError("states must be at least 1.")
+        if not 0.0 <= density <= 1.0:
+            raise ValueError("density must lie between 0 and 1.")
+        self.rng = random.Random(seed)
+        self.tips = tips
+        self.density = density
+        self.end_date = end_date
+        self.states = _state_names(states)
+        self.centres = [(self.rng.uniform(-55.0, 65.0), self.rng.uniform(-170.0, 170.0)) for _ in self.states]
+        # Each region is a sink for jumps with a different weight, as real migration is uneven.
+        self.jump_weights = [self.rng.paretovariate(1.5) for _ in self.states]
+
+        # Tip heights in years before the most recent sample.
+        self.heights: list[float] = [self.rng.uniform(0.0, SAMPLING_WINDOW_DAYS / 365.25) for _ in range(tips)]
+        self.heights[0] = 0.0
+        self.children: list[Optional[tuple[int, int]]] = [None] * tips
+        self._coalesce()
+
+    def _coalesce(self) -> None:
+        rng = self.rng
+        active = list(range(self.tips))
+        while len(active) > 1:
+            picks = []
+            for _ in range(2):
+                position = rng.randrange(len(active))
+                active[position], active[-1] = active[-1], active[position]
+                picks.append(active.pop())
+            left, right = picks
+            # Waiting times shrink with the number of lineages, as under a coalescent
+            # with an effective population size of a couple of years.
+            lineages = len(active) + 2
+            height = max(self.heights[left], self.heights[right]) + rng.expovariate(lineages * (lineages - 1) / 4.0)
+            self.heights.append(height)
+            self.children.append((left, right))
+            active.append(len(self.heights) - 1)
+        self.root = active[0]
+
+    def taxon(self, tip: int) -> str:
+        sampled = self.end_date - timedelta(days=round(self.heights[tip] * 365.25))
+        return f"taxon_{tip + 1}|{sampled.isoformat()}"
+
+    def _states_down_tree(self) -> list[int]:
+        rng = self.rng
+        states = [0] * len(self.heights)
+        states[self.root] = rng.randrange(len(self.states))
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            pair = self.children[node]
+            if pair is None:
+                continue
+            for child in pair:
+                branch = self.heights[node] - self.heights[child]
+                if rng.random() < min(0.9, 0.15 + branch):
+                    states[child] = rng.choices(range(len(self.states)), weights=self.jump_weights)[0]
+                else:
+                    states[child] = states[node]
+                stack.append(child)
+        return states
+
+    def _annotation(self, node: int, state: int, is_tip: bool) -> str:
+        rng = self.rng
+        height = self.heights[node]
+        fields: list[str] = []
+        annotate = is_tip or rng.random() < self.density
+        if annotate:
+            if len(self.states) > 1 and not is_tip:
+                alternatives = rng.sample(range(len(self.states)), min(3, len(self.states)))
+                members = [state] + [other for other in alternatives if other != state][:2]
+                # The modal state keeps the largest share, as in TreeAnnotator output.
+                modal = rng.uniform(0.5, 0.99)
+                splits = [rng.random() for _ in members[1:]]
+                probabilities = [modal] + [(1.0 - modal) * split / sum(splits) for split in splits]
+            else:
+                members, probabilities = [state], [1.0]
+            names = ",".join(f'"{self.states[member]}"' for member in members)
+            values = ",".join(_format_number(probability, 4) for probability in probabilities)
+            fields.append(f"location.set={{{names}}},location.set.prob={{{values}}}")
+            fields.append(f'location="{self.states[state]}"')
+            latitude, longitude = self.centres[state]
+            latitude = max(-89.0, min(89.0, latitude + rng.gauss(0.0, 1.5)))
+            longitude = max(-179.0, min(179.0, longitude + rng.gauss(0.0, 1.5)))
+            fields.append(f"location1={_format_number(latitude, 4)},location2={_format_number(longitude, 4)}")
+            if not is_tip:
+                spread = rng.uniform(0.3, 2.0)
+                lat_ring = [latitude - spread, latitude + spread, latitude + spread, latitude - spread]
+                lon_ring = [longitude - spread, longitude - spread, longitude + spread, longitude + spread]
+                fields.append(
+                    "location1_80%HPD_1={" + ",".join(_format_number(value, 4) for value in lat_ring) + "},"
+                    "location2_80%HPD_1={" + ",".join(_format_number(value, 4) for value in lon_ring) + "}"
+                )
+        low, high = height * rng.uniform(0.85, 0.98), height * rng.uniform(1.02, 1.2)
+        fields.append(
+            f"height={_format_number(height)},height_median={_format_number(height)},"
+            f"height_95%_HPD={{{_format_number(low)},{_format_number(high)}}}"
+        )
+        if not is_tip:
+            fields.append(f"posterior={_format_number(rng.uniform(0.2, 1.0), 4)}")
+        return "[&" + ",".join(fields) + "]"
+
+    def newick(self) -> Iterator[str]:
+        """Yield the annotated Newick string in pieces, pre-order without recursion."""
+
+        states = self._states_down_tree()
+        # Stack items are node indices (int) or literal text to emit (str).
+        stack: list[object] = [self.root]
+        parents: dict[int, int] = {}
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            node = item
+            pair = self.children[node]
+            suffix = self._annotation(node, states[node], pair is None)
+            if node in parents:
+                suffix += ":" + _format_number(self.heights[parents[node]] - self.heights[node])
+            if pair is None:
+                yield f"{node + 1}{suffix}"
+                continue
+            left, right = pair
+            parents[left] = parents[right] = node
+            stack.extend([")" + suffix, right, ",", left])
+            yield "("
+
+
+def generate_mcc_tree(
+    tips: int,
+    states: int = 8,
+    density: float = 1.0,
+    seed: int = 0,
+    end_date: date = DEFAULT_END_DATE,
+) -> Iterator[str]:
+    """Yield the NEXUS text of a synthetic MCC tree in chunks.
+
+    Args:
+        tips: Number of sampled tips.
+        states: Number of discrete location states.
+        density: Fraction of internal nodes carrying location annotations;
+            tips are always annotated.
+        seed: Seed of the random generator.
+        end_date: Date of the most recent sample.
+    """
+
+    builder = _TreeBuilder(tips, states, density, seed, end_date)
+    yield "#NEXUS\n\nBegin taxa;\n"
+    yield f"\tDimensions ntax={tips};\n\tTaxlabels\n"
+    for tip in range(tips):
+        yield f"\t\t{builder.taxon(tip)}\n"
+    yield "\t\t;\nEnd;\n\nBegin trees;\n\tTranslate\n"
+    for tip in range(tips):
+        yield f"\t\t{tip + 1} {builder.taxon(tip)}{',' if tip + 1 < tips else ''}\n"
+    yield ";\ntree TREE1 = [&R] "
+    yield from builder.newick()
+    yield ";\nEnd;\n"
+
+
+def write_mcc_tree(path: Path, tips: int, states: int = 8, density: float = 1.0, seed: int = 0) -> Path:
+    """Write a synthetic MCC tree to ``path`` and return it."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as stream:
+        buffer: list[str] = []
+        for chunk in generate_mcc_tree(tips, states=states, density=density, seed=seed):
+            buffer.append(chunk)
+            if len(buffer) >= 4096:
+                stream.write("".join(buffer))
+                buffer.clear()
+        stream.write("".join(buffer))
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", type=Path, help="Path of the NEXUS file to write.")
+    parser.add_argument("--tips", type=int, default=1000, help="Number of tips (1k-1M are realistic).")
+    parser.add_argument("--states", type=int, default=8, help="Number of discrete location states.")
+    parser.add_argument("--density", type=float, default=1.0, help="Fraction of internal nodes with location annotations.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; equal seeds give identical files.")
+    args = parser.parse_args()
+    write_mcc_tree(args.output, args.tips, states=args.states, density=args.density, seed=args.seed)
+    print(f"Wrote {args.output} ({args.output.stat().st_size / 1e6:.1f} MB, {args.tips} tips)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
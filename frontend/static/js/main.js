@@ -38,6 +38,7 @@ const selectionInfoViewState = {
 };
 const supportFileInput = document.getElementById('support-file');
 const pathTopKInput = document.getElementById('path-top-k');
+const pathReconstructionSelect = document.getElementById('path-reconstruction');
 const runDiscreteAnalysisButton = document.getElementById('run-discrete-analysis');
 const discreteStatusEl = document.getElementById('discrete-status');
 const migrationMatrixButton = document.getElementById('refresh-migration-matrix');
@@ -48,6 +49,7 @@ const pathwaysTable = document.getElementById('pathways-table');
 const downloadNodesLink = document.getElementById('download-nodes');
 const downloadEdgesLink = document.getElementById('download-edges');
 const downloadGeojsonLink = document.getElementById('download-geojson');
+const downloadArcsLink = document.getElementById('download-arcs');
 const downloadSummaryLink = document.getElementById('download-summary');
 const mapTileUrlInput = document.getElementById('map-tile-url');
 const applyMapLinkButton = document.getElementById('apply-map-link');
@@ -141,6 +143,9 @@ let controlsInitialized = false;
 let zoomBehavior = null;
 let zoomLayer = null;
 let traitSummaryCache = null;
+// Server-computed trait summary for the loaded tree: { filename, entries } or null.
+let serverTraitSummary = null;
+let serverTraitSummaryRequest = null;
 
 function ensureD3() {
   if (typeof window.d3 === 'undefined') {
@@ -425,12 +430,9 @@ const mapRenderState = {
   markers: new Map(),
   markerMeta: new Map(),
   edgeLayers: [],
-  nodeById: new Map(),
   displayedNodeIds: new Set(),
 };
 
-let cachedNodeMap = new Map();
-
 const discreteState = {
   analysisId: null,
   exports: {},
@@ -447,12 +449,393 @@ const comparisonState = {
 
 comparisonState.items = loadPersistedComparisonItems();
 
+// Read-only view of a tree over typed-array columns (decoded by tree-worker.js, or built from
+// the JSON payload). Views index into the columns; a TreeNode is only created for a node a view
+// actually touches, and client-side metadata traits live in an overlay next to the columns.
+class TreeColumns {
+  constructor({ nodeCount, metadata, dictionaries, traits, columns }) {
+    this.size = nodeCount;
+    this.metadata = metadata || {};
+    this.ids = dictionaries.id || [];
+    this.labels = dictionaries.label || [];
+    this.idCodes = columns.id;
+    this.labelCodes = columns.label;
+    this.parents = columns.parent;
+    this.branchLengths = columns.branch_length;
+    this.timesFromRoot = columns.time_from_root;
+    this.timesBeforePresent = columns.time_before_present;
+    this.traitColumns = new Map(traits.map((trait) => [
+      trait.name,
+      { kind: trait.kind, dictionary: trait.dictionary, values: columns[trait.column] },
+    ]));
+    this.extraTraits = new Map();
+    this.nodeCache = new Map();
+    this.indexById = null;
+    this.childOffsets = null;
+    this.childIndices = null;
+  }
+
+  // Columns for the JSON fallback, so the views only ever deal with one representation.
+  static fromPayload(payload) {
+    const nodes = Array.isArray(payload?.nodes) ? payload.nodes : [];
+    const size = nodes.length;
+    const encode = (values) => {
+      const dictionary = [];
+      const lookup = new Map();
+      const codes = new Int32Array(size);
+      values.forEach((value, index) => {
+        if (value === null || value === undefined) {
+          codes[index] = -1;
+          return;
+        }
+        const key = typeof value === 'string' ? value : JSON.stringify(value);
+        if (!lookup.has(key)) {
+          lookup.set(key, dictionary.length);
+          dictionary.push(value);
+        }
+        codes[index] = lookup.get(key);
+      });
+      return { codes, dictionary };
+    };
+    const floats = (read) => Float64Array.from(nodes, (node) => {
+      const value = read(node);
+      return typeof value === 'number' ? value : NaN;
+    });
+
+    const positions = new Map(nodes.map((node, index) => [node.id, index]));
+    const id = encode(nodes.map((node) => node.id));
+    const label = encode(nodes.map((node) => node.label));
+    const columns = {
+      id: id.codes,
+      label: label.codes,
+      parent: Int32Array.from(nodes, (node) => (positions.has(node.parent_id) ? positions.get(node.parent_id) : -1)),
+      branch_length: floats((node) => node.branch_length),
+      time_from_root: floats((node) => node.time_from_root),
+      time_before_present: floats((node) => node.time_before_present),
+    };
+    const traitNames = new Set();
+    nodes.forEach((node) => Object.keys(node.traits || {}).forEach((name) => traitNames.add(name)));
+    const traits = Array.from(traitNames, (name, position) => {
+      const column = `trait:${position}`;
+      const encoded = encode(nodes.map((node) => (node.traits || {})[name]));
+      columns[column] = encoded.codes;
+      return { name, kind: 'json', column, dictionary: encoded.dictionary };
+    });
+    return new TreeColumns({
+      nodeCount: size,
+      metadata: payload?.metadata,
+      dictionaries: { id: id.dictionary, label: label.dictionary },
+      traits,
+      columns,
+    });
+  }
+
+  id(index) {
+    return this.ids[this.idCodes[index]];
+  }
+
+  label(index) {
+    const code = this.labelCodes[index];
+    return code >= 0 ? this.labels[code] : null;
+  }
+
+  parentIndex(index) {
+    return this.parents[index];
+  }
+
+  branchLength(index) {
+    const value = this.branchLengths[index];
+    return Number.isNaN(value) ? null : value;
+  }
+
+  timeFromRoot(index) {
+    return this.timesFromRoot[index];
+  }
+
+  timeBeforePresent(index) {
+    return this.timesBeforePresent[index];
+  }
+
+  rootIndex() {
+    for (let index = 0; index < this.size; index += 1) {
+      if (this.parents[index] < 0) {
+        return index;
+      }
+    }
+    return -1;
+  }
+
+  indexOf(id) {
+    if (this.indexById === null) {
+      this.indexById = new Map();
+      for (let index = 0; index < this.size; index += 1) {
+        this.indexById.set(this.id(index), index);
+      }
+    }
+    const index = this.indexById.get(id);
+    return index === undefined ? -1 : index;
+  }
+
+  children(index) {
+    if (this.childOffsets === null) {
+      // Children grouped by parent in one pass over the parent column (CSR layout).
+      const offsets = new Int32Array(this.size + 1);
+      for (let child = 0; child < this.size; child += 1) {
+        if (this.parents[child] >= 0) {
+          offsets[this.parents[child] + 1] += 1;
+        }
+      }
+      for (let position = 0; position < this.size; position += 1) {
+        offsets[position + 1] += offsets[position];
+      }
+      const fill = offsets.slice(0, this.size);
+      const indices = new Int32Array(offsets[this.size]);
+      for (let child = 0; child < this.size; child += 1) {
+        const parent = this.parents[child];
+        if (parent >= 0) {
+          indices[fill[parent]] = child;
+          fill[parent] += 1;
+        }
+      }
+      this.childOffsets = offsets;
+      this.childIndices = indices;
+    }
+    return this.childIndices.subarray(this.childOffsets[index], this.childOffsets[index + 1]);
+  }
+
+  traitNames() {
+    return Array.from(new Set([...this.traitColumns.keys(), ...this.extraTraits.keys()]));
+  }
+
+  traitValue(index, name) {
+    const extra = this.extraTraits.get(name);
+    if (extra && extra.has(index)) {
+      return extra.get(index);
+    }
+    const column = this.traitColumns.get(name);
+    if (!column) {
+      return undefined;
+    }
+    const value = column.values[index];
+    if (column.kind === 'numeric') {
+      return Number.isNaN(value) ? undefined : value;
+    }
+    return value >= 0 ? column.dictionary[value] : undefined;
+  }
+
+  traitsAt(index) {
+    const traits = {};
+    this.traitColumns.forEach((_, name) => {
+      const value = this.traitValue(index, name);
+      if (value !== undefined) {
+        traits[name] = value;
+      }
+    });
+    this.extraTraits.forEach((values, name) => {
+      if (values.has(index)) {
+        traits[name] = values.get(index);
+      }
+    });
+    return traits;
+  }
+
+  // Distinct values of a trait with the number of nodes carrying each, read off the columns.
+  traitValueCounts(name) {
+    const counts = new Map();
+    const extra = this.extraTraits.get(name) || null;
+    if (extra) {
+      extra.forEach((value) => counts.set(value, (counts.get(value) || 0) + 1));
+    }
+    const column = this.traitColumns.get(name);
+    if (!column) {
+      return counts;
+    }
+    const { values } = column;
+    if (column.kind === 'numeric') {
+      for (let index = 0; index < values.length; index += 1) {
+        if (!Number.isNaN(values[index]) && !(extra && extra.has(index))) {
+          counts.set(values[index], (counts.get(values[index]) || 0) + 1);
+        }
+      }
+      return counts;
+    }
+    const codeCounts = new Int32Array(column.dictionary.length);
+    for (let index = 0; index < values.length; index += 1) {
+      if (values[index] >= 0 && !(extra && extra.has(index))) {
+        codeCounts[values[index]] += 1;
+      }
+    }
+    codeCounts.forEach((count, code) => {
+      if (count) {
+        const value = column.dictionary[code];
+        counts.set(value, (counts.get(value) || 0) + count);
+      }
+    });
+    return counts;
+  }
+
+  setTrait(index, name, value) {
+    if (!this.extraTraits.has(name)) {
+      this.extraTraits.set(name, new Map());
+    }
+    this.extraTraits.get(name).set(index, value);
+  }
+
+  clearTraits(names) {
+    names.forEach((name) => this.extraTraits.delete(name));
+  }
+
+  node(index) {
+    let node = this.nodeCache.get(index);
+    if (!node) {
+      node = new TreeNode(this, index);
+      this.nodeCache.set(index, node);
+    }
+    return node;
+  }
+
+  nodeById(id) {
+    const index = this.indexOf(id);
+    return index >= 0 ? this.node(index) : null;
+  }
+
+  // Every node and edge, for exports that really need all of them.
+  get nodes() {
+    return Array.from({ length: this.size }, (_, index) => this.node(index));
+  }
+
+  get edges() {
+    const edges = [];
+    for (let index = 0; index < this.size; index += 1) {
+      if (this.parents[index] >= 0) {
+        edges.push({ parent_id: this.id(this.parents[index]), child_id: this.id(index) });
+      }
+    }
+    return edges;
+  }
+}
+
+// One node of a TreeColumns, with the fields of the JSON node payload read off the columns.
+class TreeNode {
+  constructor(tree, index) {
+    this.tree = tree;
+    this.index = index;
+  }
+
+  get id() {
+    return this.tree.id(this.index);
+  }
+
+  get label() {
+    return this.tree.label(this.index);
+  }
+
+  get parent_id() {
+    const parent = this.tree.parentIndex(this.index);
+    return parent >= 0 ? this.tree.id(parent) : null;
+  }
+
+  get branch_length() {
+    return this.tree.branchLength(this.index);
+  }
+
+  get time_from_root() {
+    return this.tree.timeFromRoot(this.index);
+  }
+
+  get time_before_present() {
+    return this.tree.timeBeforePresent(this.index);
+  }
+
+  get traits() {
+    return this.tree.traitsAt(this.index);
+  }
+
+  trait(name) {
+    return this.tree.traitValue(this.index, name);
+  }
+}
+
+let treeWorker = null;
+let treeWorkerRequestCounter = 0;
+const treeWorkerRequests = new Map();
+
+function getTreeWorker() {
+  if (treeWorker !== null) {
+    return treeWorker || null;
+  }
+  if (typeof Worker === 'undefined') {
+    treeWorker = false;
+    return null;
+  }
+  try {
+    treeWorker = new Worker('js/tree-worker.js?v=0.7');
+  } catch (err) {
+    console.warn('Tree worker unavailable; falling back to JSON.', err);
+    treeWorker = false;
+    return null;
+  }
+  treeWorker.addEventListener('message', (event) => {
+    const { requestId } = event.data || {};
+    const pending = treeWorkerRequests.get(requestId);
+    if (pending) {
+      treeWorkerRequests.delete(requestId);
+      pending.resolve(event.data);
+    }
+  });
+  treeWorker.addEventListener('error', (event) => {
+    console.warn('Tree worker failed; falling back to JSON.', event);
+    treeWorkerRequests.forEach((pending) => pending.reject(new Error('Tree worker failed.')));
+    treeWorkerRequests.clear();
+    treeWorker.terminate();
+    treeWorker = false;
+  });
+  return treeWorker;
+}
+
+function requestBinaryTree(url) {
+  const worker = getTreeWorker();
+  if (!worker) {
+    return Promise.reject(new Error('Tree worker unavailable.'));
+  }
+  treeWorkerRequestCounter += 1;
+  const requestId = treeWorkerRequestCounter;
+  return new Promise((resolve, reject) => {
+    treeWorkerRequests.set(requestId, { resolve, reject });
+    worker.postMessage({ requestId, url });
+  });
+}
+
+function treeLoadErrorMessage(status, detail) {
+  const fallback = status === 404
+    ? 'Default MCC tree not found. Please upload a file first.'
+    : 'Unable to load tree data.';
+  return `Failed to load tree: ${detail || fallback}`;
+}
+
 async function fetchTree(filename = null) {
   const params = new URLSearchParams();
   if (filename) {
     params.set('filename', filename);
   }
   const url = params.toString() ? `/api/tree?${params.toString()}` : '/api/tree';
+
+  // Prefer the binary columnar transport decoded in a worker; fall back to JSON.
+  let result = null;
+  try {
+    const binaryParams = new URLSearchParams(params);
+    binaryParams.set('format', 'binary');
+    result = await requestBinaryTree(`/api/tree?${binaryParams.toString()}`);
+  } catch (err) {
+    result = null;
+  }
+  if (result && result.tree) {
+    return new TreeColumns(result.tree);
+  }
+  if (result && result.status >= 400) {
+    throw new Error(treeLoadErrorMessage(result.status, result.error));
+  }
+
   const response = await fetch(url);
   if (!response.ok) {
     const errorMessage = await buildErrorMessage(response,
@@ -461,7 +844,7 @@ async function fetchTree(filename = null) {
         : 'Unable to load tree data.');
     throw new Error(`Failed to load tree: ${errorMessage}`);
   }
-  return response.json();
+  return TreeColumns.fromPayload(await response.json());
 }
 
 async function buildErrorMessage(response, fallback) {
@@ -486,26 +869,15 @@ async function buildErrorMessage(response, fallback) {
   return message || response.statusText || 'Unknown error';
 }
 
-function buildHierarchy(nodes) {
-  const nodeMap = new Map();
-  nodes.forEach((node) => {
-    nodeMap.set(node.id, { ...node, children: [] });
-  });
-
-  let root = null;
-  nodes.forEach((node) => {
-    const enriched = nodeMap.get(node.id);
-    if (!node.parent_id) {
-      root = enriched;
-      return;
-    }
-    const parent = nodeMap.get(node.parent_id);
-    if (parent) {
-      parent.children.push(enriched);
-    }
-  });
-
-  return root;
+function buildHierarchy(tree) {
+  const rootIndex = tree.rootIndex();
+  if (rootIndex < 0) {
+    return null;
+  }
+  return window.d3.hierarchy(
+    tree.node(rootIndex),
+    (node) => Array.from(tree.children(node.index), (child) => tree.node(child)),
+  );
 }
 
 function sortHierarchyByLeafCount(root, order) {
@@ -628,10 +1000,10 @@ function drawTimelineGrid(container, xScale, height) {
   return lines;
 }
 
-function buildColorScale(nodes, preferredTrait = 'auto', direction = 'increasing') {
+function buildColorScale(tree, preferredTrait = 'auto', direction = 'increasing') {
   const d3 = window.d3;
   if (!traitStatsCache) {
-    traitStatsCache = analyzeTraits(nodes);
+    traitStatsCache = analyzeTraits(tree);
   }
   const stats = traitStatsCache;
 
@@ -673,7 +1045,7 @@ function buildColorScale(nodes, preferredTrait = 'auto', direction = 'increasing
       if (!candidate) {
         return;
       }
-      const coverage = info.count / nodes.length;
+      const coverage = info.count / tree.size;
       if (coverage > bestScore) {
         bestScore = coverage;
         selected = candidate;
@@ -946,11 +1318,11 @@ function shouldExcludeTraitOption(traitKey) {
   return traitKeyExclusionPattern.test(normalized);
 }
 
-function updateTraitOptions(nodes) {
+function updateTraitOptions(tree) {
   if (!colorSelect) {
     return;
   }
-  traitStatsCache = analyzeTraits(nodes);
+  traitStatsCache = analyzeTraits(tree);
   const entries = [];
   traitStatsCache.forEach((info, key) => {
     if (shouldExcludeTraitOption(key)) {
@@ -983,7 +1355,7 @@ function updateTraitOptions(nodes) {
     if (priorityDiff !== 0) {
       return priorityDiff;
     }
-    return (b.info.count / nodes.length) - (a.info.count / nodes.length);
+    return (b.info.count / tree.size) - (a.info.count / tree.size);
   });
 
   const currentValue = vizState.colorTrait || 'auto';
@@ -1035,7 +1407,7 @@ function refreshVisualizations() {
   renderTraits(cachedPayload);
 }
 
-function analyzeTraits(nodes) {
+function analyzeTraits(tree) {
   const stats = new Map();
   const ensureEntry = (key, typeHint = 'categorical') => {
     if (!stats.has(key)) {
@@ -1058,38 +1430,47 @@ function analyzeTraits(nodes) {
     return entry;
   };
 
-  nodes.forEach((node) => {
-    const traits = node.traits || {};
-    Object.entries(traits).forEach(([key, value]) => {
+  // Each distinct value is resolved once and weighted by the number of nodes carrying it.
+  tree.traitNames().forEach((key) => {
+    tree.traitValueCounts(key).forEach((count, value) => {
       const resolved = resolveValueInfo(value);
       if (!resolved) {
         return;
       }
       const entry = ensureEntry(key, resolved.type);
-      entry.count += 1;
+      entry.count += count;
       if (resolved.type === 'numeric') {
         entry.min = Math.min(entry.min, resolved.value);
         entry.max = Math.max(entry.max, resolved.value);
       } else {
-        entry.values.set(resolved.value, (entry.values.get(resolved.value) || 0) + 1);
+        entry.values.set(resolved.value, (entry.values.get(resolved.value) || 0) + count);
       }
     });
+  });
 
-    const prefix = deriveLabelPrefix(node.label);
+  const labelCounts = new Map();
+  for (let index = 0; index < tree.size; index += 1) {
+    const label = tree.label(index);
+    labelCounts.set(label, (labelCounts.get(label) || 0) + 1);
+  }
+  labelCounts.forEach((count, label) => {
+    const prefix = deriveLabelPrefix(label);
     if (prefix) {
       const entry = ensureEntry('__label_prefix', 'categorical');
-      entry.count += 1;
-      entry.values.set(prefix, (entry.values.get(prefix) || 0) + 1);
+      entry.count += count;
+      entry.values.set(prefix, (entry.values.get(prefix) || 0) + count);
     }
+  });
 
-    const heightValue = getNodeMetric(node);
+  for (let index = 0; index < tree.size; index += 1) {
+    const heightValue = tree.timeBeforePresent(index);
     if (Number.isFinite(heightValue)) {
       const entry = ensureEntry('height', 'numeric');
       entry.count += 1;
       entry.min = Math.min(entry.min, heightValue);
       entry.max = Math.max(entry.max, heightValue);
     }
-  });
+  }
 
   stats.forEach((entry) => {
     if (entry.type === 'numeric') {
@@ -1183,8 +1564,7 @@ function getTraitRawValue(nodeData, traitKey, info) {
   if (traitKey === 'height') {
     return getNodeMetric(nodeData);
   }
-  const traits = nodeData.traits || {};
-  const rawValue = traits[traitKey];
+  const rawValue = nodeData.trait(traitKey);
   if (info.type === 'numeric') {
     return extractNumericFromValue(rawValue);
   }
@@ -1280,13 +1660,12 @@ function renderTree(payload) {
     return;
   }
   const d3 = window.d3;
-  const rootData = buildHierarchy(payload.nodes);
-  if (!rootData) {
+  const root = buildHierarchy(payload);
+  if (!root) {
     treeSvg.selectAll('*').remove();
     return;
   }
 
-  const root = d3.hierarchy(rootData, (d) => d.children);
   sortHierarchyByLeafCount(root, vizState.sortOrder);
   const width = treeSvg.node().clientWidth || 1100;
   const leavesCount = root.leaves().length;
@@ -1405,9 +1784,8 @@ function renderTree(payload) {
     axisLabel = `Calendar year (latest ${formatDateLabel(referenceDate)})`;
   }
 
-  const nodeData = descendants.map((d) => d.data);
-  traitStatsCache = traitStatsCache || analyzeTraits(nodeData);
-  const colorConfig = buildColorScale(nodeData, vizState.colorTrait || 'auto', vizState.colorDirection);
+  traitStatsCache = traitStatsCache || analyzeTraits(payload);
+  const colorConfig = buildColorScale(payload, vizState.colorTrait || 'auto', vizState.colorDirection);
   colorState.trait = colorConfig.trait;
   colorState.scale = colorConfig.scale;
   colorState.type = colorConfig.type;
@@ -1709,20 +2087,22 @@ function ensureMap() {
   return leafletMap;
 }
 
-function extractCoordinates(node) {
+function extractCoordinates(tree, index) {
   const latKeys = ['location_lat', 'latitude', 'lat', 'location1'];
   const lonKeys = ['location_lon', 'longitude', 'lon', 'long', 'location2'];
   let lat;
   let lon;
   for (const key of latKeys) {
-    if (key in node.traits && typeof node.traits[key] === 'number') {
-      lat = node.traits[key];
+    const value = tree.traitValue(index, key);
+    if (typeof value === 'number') {
+      lat = value;
       break;
     }
   }
   for (const key of lonKeys) {
-    if (key in node.traits && typeof node.traits[key] === 'number') {
-      lon = node.traits[key];
+    const value = tree.traitValue(index, key);
+    if (typeof value === 'number') {
+      lon = value;
       break;
     }
   }
@@ -1744,15 +2124,16 @@ function buildNodePopup(node, approxYear = null) {
   }
 
   const traits = [];
-  if (node.traits && typeof node.traits === 'object') {
+  const nodeTraits = node.traits;
+  if (nodeTraits && typeof nodeTraits === 'object') {
     const keys = metadataState.metadataTraits instanceof Set
       ? Array.from(metadataState.metadataTraits)
       : [];
     keys.forEach((key) => {
-      if (!Object.prototype.hasOwnProperty.call(node.traits, key)) {
+      if (!Object.prototype.hasOwnProperty.call(nodeTraits, key)) {
         return;
       }
-      const rawValue = node.traits[key];
+      const rawValue = nodeTraits[key];
       let value;
       if (Array.isArray(rawValue)) {
         value = rawValue.join(', ');
@@ -1794,23 +2175,23 @@ function renderMap(payload) {
   mapRenderState.markers = new Map();
   mapRenderState.markerMeta = new Map();
   mapRenderState.edgeLayers = [];
-  mapRenderState.nodeById = new Map();
   mapRenderState.displayedNodeIds = new Set();
 
   const coords = [];
   const nodePoints = [];
   const leafSet = treeRenderState.leafIdSet || new Set();
 
-  payload.nodes.forEach((node) => {
-    mapRenderState.nodeById.set(node.id, node);
-    const point = extractCoordinates(node);
+  // Only nodes with coordinates get a marker, so only those get a node object.
+  for (let index = 0; index < payload.size; index += 1) {
+    const point = extractCoordinates(payload, index);
     if (!point) {
-      return;
+      continue;
     }
+    const node = payload.node(index);
     nodeCoordinateCache.set(node.id, point);
     coords.push(point);
     nodePoints.push({ node, point });
-  });
+  }
 
   prepareMigrationEvents(payload);
 
@@ -1828,14 +2209,17 @@ function renderMap(payload) {
       dashArray: isLeaf ? null : '4 4',
     };
     const marker = L.circleMarker(point, baseStyle);
-    const label = node.label ? `<strong>${node.label}</strong>` : `<strong>${node.id}</strong>`;
-    const time = Number.isFinite(node.time_before_present) ? node.time_before_present.toFixed(2) : null;
-    const approxYear = animationState.referenceYear && Number.isFinite(node.time_before_present)
-      ? animationState.referenceYear - node.time_before_present
-      : null;
-    const popup = buildNodePopup(node, approxYear);
-    const fallback = time !== null ? `${label}<br/>Time before present: ${time}` : label;
-    marker.bindPopup(popup || fallback);
+    // Popup content reads the node's traits, so it is only built when the popup opens.
+    marker.bindPopup(() => {
+      const label = node.label ? `<strong>${node.label}</strong>` : `<strong>${node.id}</strong>`;
+      const time = Number.isFinite(node.time_before_present) ? node.time_before_present.toFixed(2) : null;
+      const approxYear = animationState.referenceYear && Number.isFinite(node.time_before_present)
+        ? animationState.referenceYear - node.time_before_present
+        : null;
+      const popup = buildNodePopup(node, approxYear);
+      const fallback = time !== null ? `${label}<br/>Time before present: ${time}` : label;
+      return popup || fallback;
+    });
     geoLayerGroup.addLayer(marker);
     mapRenderState.markers.set(node.id, marker);
     mapRenderState.markerMeta.set(node.id, {
@@ -1845,9 +2229,15 @@ function renderMap(payload) {
     });
   });
 
-  payload.edges.forEach((edge) => {
-    const parentCoord = nodeCoordinateCache.get(edge.parent_id);
-    const childCoord = nodeCoordinateCache.get(edge.child_id);
+  for (let index = 0; index < payload.size; index += 1) {
+    const parent = payload.parentIndex(index);
+    if (parent < 0) {
+      continue;
+    }
+    const parentId = payload.id(parent);
+    const childId = payload.id(index);
+    const parentCoord = nodeCoordinateCache.get(parentId);
+    const childCoord = nodeCoordinateCache.get(childId);
     if (parentCoord && childCoord) {
       const baseStyle = {
         color: '#334155',
@@ -1858,12 +2248,12 @@ function renderMap(payload) {
       geoLayerGroup.addLayer(polyline);
       mapRenderState.edgeLayers.push({
         layer: polyline,
-        parentId: edge.parent_id,
-        childId: edge.child_id,
+        parentId,
+        childId,
         baseStyle,
       });
     }
-  });
+  }
 
   if (coords.length) {
     const bounds = L.latLngBounds(coords.map((c) => L.latLng(c[0], c[1])));
@@ -1878,8 +2268,73 @@ function renderMap(payload) {
 }
 
 function renderTraits(payload) {
-  traitSummaryCache = summarizeTraits(payload.nodes);
-  updateTraitSummary();
+  // Client-side metadata columns are unknown to the server, so summarise locally.
+  if (metadataState.appliedColumns.length) {
+    traitSummaryCache = summarizeTraits(payload);
+    updateTraitSummary();
+    return;
+  }
+  if (
+    serverTraitSummary &&
+    serverTraitSummary.filename === cachedFilename &&
+    (serverTraitSummary.complete || !wantsAllTraitValues())
+  ) {
+    traitSummaryCache = serverTraitSummary.entries;
+    updateTraitSummary();
+    return;
+  }
+  loadServerTraitSummary(cachedFilename, payload);
+}
+
+function wantsAllTraitValues() {
+  return traitLimitSelect?.value === 'all';
+}
+
+async function fetchTraitSummary(filename = null, complete = false) {
+  const params = new URLSearchParams({ limit: complete ? '0' : '50' });
+  if (filename) {
+    params.set('filename', filename);
+  }
+  const response = await fetch(`/api/tree/traits/summary?${params.toString()}`);
+  if (!response.ok) {
+    throw new Error(await buildErrorMessage(response, 'Unable to load trait summary.'));
+  }
+  return response.json();
+}
+
+async function loadServerTraitSummary(filename, payload) {
+  const complete = wantsAllTraitValues();
+  if (
+    serverTraitSummaryRequest &&
+    serverTraitSummaryRequest.filename === filename &&
+    (serverTraitSummaryRequest.complete || !complete)
+  ) {
+    return;
+  }
+  const request = { filename, complete };
+  serverTraitSummaryRequest = request;
+  try {
+    const summary = await fetchTraitSummary(filename, complete);
+    if (serverTraitSummaryRequest !== request) {
+      return;
+    }
+    serverTraitSummary = { filename, entries: summary.traits || [], complete };
+  } catch (error) {
+    console.error(error);
+    if (serverTraitSummaryRequest !== request) {
+      return;
+    }
+    // Fall back to the in-browser summary so the cards still render.
+    serverTraitSummary = { filename, entries: summarizeTraits(payload), complete: true };
+  } finally {
+    if (serverTraitSummaryRequest === request) {
+      serverTraitSummaryRequest = null;
+    }
+  }
+  if (cachedFilename === filename && !metadataState.appliedColumns.length) {
+    traitSummaryCache = serverTraitSummary.entries;
+    updateTraitSummary();
+  }
 }
 
 function renderMigrationMatrixTable(matrixPayload) {
@@ -1946,14 +2401,25 @@ function resolveDownloadPayload(basePayload) {
   if (!selectedIds || !selectedIds.size) {
     return { payload: basePayload, usingSelection: false, selectedIds: null };
   }
-  const nodes = Array.isArray(basePayload.nodes) ? basePayload.nodes : [];
-  const edges = Array.isArray(basePayload.edges) ? basePayload.edges : [];
-  const filteredNodes = nodes.filter((node) => node && selectedIds.has(node.id));
-  if (!filteredNodes.length) {
+  const indices = [];
+  selectedIds.forEach((id) => {
+    const index = basePayload.indexOf(id);
+    if (index >= 0) {
+      indices.push(index);
+    }
+  });
+  if (!indices.length) {
     return { payload: basePayload, usingSelection: false, selectedIds: null };
   }
-  const allowedIds = new Set(filteredNodes.map((node) => node.id));
-  const filteredEdges = edges.filter((edge) => allowedIds.has(edge.parent_id) && allowedIds.has(edge.child_id));
+  indices.sort((a, b) => a - b);
+  const filteredNodes = indices.map((index) => basePayload.node(index));
+  const filteredEdges = [];
+  indices.forEach((index) => {
+    const parent = basePayload.parentIndex(index);
+    if (parent >= 0 && selectedIds.has(basePayload.id(parent))) {
+      filteredEdges.push({ parent_id: basePayload.id(parent), child_id: basePayload.id(index) });
+    }
+  });
   return {
     payload: {
       nodes: filteredNodes,
@@ -2034,7 +2500,7 @@ function buildMapGeoJSON(payload) {
   const coordinateLookup = new Map();
 
   payload.nodes.forEach((node) => {
-    const point = extractCoordinates(node);
+    const point = extractCoordinates(node.tree, node.index);
     if (!point) {
       return;
     }
@@ -2262,7 +2728,7 @@ function drawMigrationTimelineOnCanvas(ctx, selectedIds = null) {
   }
   const cutoff = animationState.currentYear;
   const filterBySelection = selectedIds instanceof Set && selectedIds.size > 0;
-  const nodeLookup = mapRenderState.nodeById instanceof Map ? mapRenderState.nodeById : null;
+  const nodeLookup = cachedPayload;
 
   const toPoint = (coord) => {
     if (!coord) {
@@ -2315,7 +2781,7 @@ function drawMigrationTimelineOnCanvas(ctx, selectedIds = null) {
     if (!startPoint || !endPoint) {
       return;
     }
-    const childNode = nodeLookup ? nodeLookup.get(event.childId) : null;
+    const childNode = nodeLookup ? nodeLookup.nodeById(event.childId) : null;
     const eventColor = childNode ? getNodeColor(childNode) : '#2563eb';
     ctx.save();
     ctx.globalAlpha = 0.7;
@@ -2417,7 +2883,7 @@ async function downloadMapImage() {
     return;
   }
   const { payload, usingSelection, selectedIds } = resolveDownloadPayload(cachedPayload);
-  if (!payload || !Array.isArray(payload.nodes) || !payload.nodes.length) {
+  if (!payload || !(payload.nodes || []).length) {
     setStatus('No map data available to export.');
     return;
   }
@@ -2613,30 +3079,21 @@ function clearExternalMetadata(payload) {
     metadataState.appliedColumns = [];
     return;
   }
-  payload.nodes.forEach((node) => {
-    if (!node || !node.traits) {
-      return;
-    }
-    metadataState.appliedColumns.forEach((column) => {
-      if (Object.prototype.hasOwnProperty.call(node.traits, column)) {
-        delete node.traits[column];
-      }
-    });
-  });
+  payload.clearTraits(metadataState.appliedColumns);
   metadataState.appliedColumns = [];
 }
 
-function findMetadataEntry(node) {
-  if (!node || !metadataState.records.size) {
+function findMetadataEntry(label, id) {
+  if (!metadataState.records.size) {
     return null;
   }
   const candidates = [];
-  if (node.label) {
-    candidates.push(node.label);
-    candidates.push(node.label.replace(/["']/g, ''));
+  if (label) {
+    candidates.push(label);
+    candidates.push(label.replace(/["']/g, ''));
   }
-  if (node.id) {
-    candidates.push(node.id);
+  if (id) {
+    candidates.push(id);
   }
   for (const candidate of candidates) {
     if (!candidate) {
@@ -2671,13 +3128,10 @@ function applyMetadataToNodes(payload) {
     metadataState.columnDisplayNames = new Map();
   }
 
-  payload.nodes.forEach((node) => {
-    const entry = findMetadataEntry(node);
+  for (let index = 0; index < payload.size; index += 1) {
+    const entry = findMetadataEntry(payload.label(index), payload.id(index));
     if (!entry) {
-      return;
-    }
-    if (!node.traits || typeof node.traits !== 'object') {
-      node.traits = {};
+      continue;
     }
     let matchedNode = false;
     metadataState.columns.forEach((column) => {
@@ -2688,7 +3142,7 @@ function applyMetadataToNodes(payload) {
       if (value === null || value === undefined || value === '') {
         return;
       }
-      node.traits[traitKey] = value;
+      payload.setTrait(index, traitKey, value);
       appliedColumns.add(traitKey);
       metadataState.metadataTraits.add(traitKey);
       metadataState.columnDisplayNames.set(traitKey, column);
@@ -2697,7 +3151,7 @@ function applyMetadataToNodes(payload) {
     if (matchedNode) {
       matched += 1;
     }
-  });
+  }
 
   const columns = Array.from(appliedColumns);
   metadataState.appliedColumns = columns;
@@ -2782,7 +3236,7 @@ function resetMapViewport() {
         }
       }
       if (meta?.node) {
-        const coord = extractCoordinates(meta.node);
+        const coord = extractCoordinates(meta.node.tree, meta.node.index);
         if (Array.isArray(coord)
           && coord.length === 2
           && Number.isFinite(coord[0])
@@ -3028,14 +3482,13 @@ function updateMapSelection() {
     return;
   }
   const highlightColor = selectionHighlightColor;
-  const nodesById = new Map(cachedPayload.nodes.map((node) => [node.id, node]));
   const leafSet = treeRenderState.leafIdSet || new Set();
   selectionState.nodeIds.forEach((id) => {
     const coord = nodeCoordinateCache.get(id);
     if (!coord) {
       return;
     }
-    const node = nodesById.get(id);
+    const node = cachedPayload.nodeById(id);
     const isLeaf = leafSet.has(id);
     const marker = L.circleMarker(coord, {
       radius: Math.max(isLeaf ? vizState.nodeRadius + 2.5 : vizState.nodeRadius + 3.5, isLeaf ? 6.5 : 7.5),
@@ -3058,12 +3511,19 @@ function updateMapSelection() {
     selectionLayerGroup.addLayer(marker);
   });
 
-  cachedPayload.edges.forEach((edge) => {
-    if (!selectionState.nodeIds.has(edge.parent_id) || !selectionState.nodeIds.has(edge.child_id)) {
+  // Edges between selected nodes, found from each selected child's parent.
+  selectionState.nodeIds.forEach((childId) => {
+    const child = cachedPayload.indexOf(childId);
+    const parent = child >= 0 ? cachedPayload.parentIndex(child) : -1;
+    if (parent < 0) {
       return;
     }
-    const start = nodeCoordinateCache.get(edge.parent_id);
-    const end = nodeCoordinateCache.get(edge.child_id);
+    const parentId = cachedPayload.id(parent);
+    if (!selectionState.nodeIds.has(parentId)) {
+      return;
+    }
+    const start = nodeCoordinateCache.get(parentId);
+    const end = nodeCoordinateCache.get(childId);
     if (!start || !end) {
       return;
     }
@@ -3334,7 +3794,7 @@ function updateSelectionDetails() {
   }
   if (selectionState.nodeIds.size === 1) {
     const [singleId] = selectionState.nodeIds;
-    const node = cachedNodeMap.get(singleId);
+    const node = cachedPayload.nodeById(singleId);
     if (!node) {
       viewState.single.textContent = 'Unable to load node details.';
       showSelectionInfoView('single', viewState);
@@ -3349,13 +3809,13 @@ function updateSelectionDetails() {
     return;
   }
 
-  const total = Array.isArray(cachedPayload.nodes) ? cachedPayload.nodes.length : selectionState.nodeIds.size;
+  const total = cachedPayload.size;
   const samples = [];
   selectionState.nodeIds.forEach((id) => {
     if (samples.length >= 5) {
       return;
     }
-    const node = cachedNodeMap.get(id);
+    const node = cachedPayload.nodeById(id);
     samples.push(escapeHtml(node?.label || node?.id || id));
   });
   const ellipsis = selectionState.nodeIds.size > samples.length ? '…' : '';
@@ -3381,17 +3841,14 @@ function convertDateToYearFraction(date) {
   return year + diffMs / (365.25 * 24 * 60 * 60 * 1000);
 }
 
-function inferReferenceDate(nodes) {
+function inferReferenceDate(tree) {
   let latest = null;
   const dateRegex = /(date|year)/i;
-  nodes.forEach((node) => {
-    if (!node.traits) {
+  tree.traitNames().forEach((key) => {
+    if (!dateRegex.test(key)) {
       return;
     }
-    Object.entries(node.traits).forEach(([key, value]) => {
-      if (!dateRegex.test(key)) {
-        return;
-      }
+    tree.traitValueCounts(key).forEach((_, value) => {
       const parsed = Date.parse(value);
       if (Number.isNaN(parsed)) {
         return;
@@ -3500,7 +3957,7 @@ function refreshMigrationLayer() {
   const cutoff = animationState.currentYear;
   const selected = selectionState.nodeIds;
   const filterBySelection = selected && selected.size > 0;
-  const nodeLookup = mapRenderState.nodeById instanceof Map ? mapRenderState.nodeById : null;
+  const nodeLookup = cachedPayload;
 
   animationState.nodeAppearances.forEach((appearance) => {
     if (appearance.year > cutoff) {
@@ -3528,7 +3985,7 @@ function refreshMigrationLayer() {
     if (filterBySelection && (!selected.has(event.parentId) || !selected.has(event.childId))) {
       return;
     }
-    const childNode = nodeLookup ? nodeLookup.get(event.childId) : null;
+    const childNode = nodeLookup ? nodeLookup.nodeById(event.childId) : null;
     const eventColor = childNode ? getNodeColor(childNode) : '#2563eb';
     animationLayerGroup.addLayer(L.polyline([event.startCoord, event.endCoord], {
       color: eventColor,
@@ -3560,43 +4017,39 @@ function prepareMigrationEvents(payload) {
     updateTimelineLabel();
     return;
   }
-  const nodes = Array.isArray(payload.nodes) ? payload.nodes : [];
-  const edges = Array.isArray(payload.edges) ? payload.edges : [];
-  const referenceDate = vizState.latestDate || inferReferenceDate(nodes) || new Date();
+  const referenceDate = vizState.latestDate || inferReferenceDate(payload) || new Date();
   const referenceYear = convertDateToYearFraction(referenceDate) || new Date().getFullYear();
 
   const appearances = [];
-  nodes.forEach((node) => {
-    const coord = nodeCoordinateCache.get(node.id);
-    if (!coord || !Number.isFinite(node.time_before_present)) {
-      return;
+  const events = [];
+  for (let index = 0; index < payload.size; index += 1) {
+    const id = payload.id(index);
+    const coord = nodeCoordinateCache.get(id);
+    const time = payload.timeBeforePresent(index);
+    if (!coord || !Number.isFinite(time)) {
+      continue;
     }
-    const year = referenceYear - node.time_before_present;
-    appearances.push({ id: node.id, coord, year, node });
-  });
+    appearances.push({ id, coord, year: referenceYear - time, node: payload.node(index) });
 
-  const nodesById = new Map(nodes.map((node) => [node.id, node]));
-  const events = [];
-  edges.forEach((edge) => {
-    const parent = nodesById.get(edge.parent_id);
-    const child = nodesById.get(edge.child_id);
-    const startCoord = nodeCoordinateCache.get(edge.parent_id);
-    const endCoord = nodeCoordinateCache.get(edge.child_id);
-    if (!parent || !child || !startCoord || !endCoord) {
-      return;
+    const parent = payload.parentIndex(index);
+    if (parent < 0) {
+      continue;
     }
-    if (!Number.isFinite(parent.time_before_present) || !Number.isFinite(child.time_before_present)) {
-      return;
+    const parentId = payload.id(parent);
+    const startCoord = nodeCoordinateCache.get(parentId);
+    const parentTime = payload.timeBeforePresent(parent);
+    if (!startCoord || !Number.isFinite(parentTime)) {
+      continue;
     }
     events.push({
-      parentId: parent.id,
-      childId: child.id,
+      parentId,
+      childId: id,
       startCoord,
-      endCoord,
-      startYear: referenceYear - parent.time_before_present,
-      endYear: referenceYear - child.time_before_present,
+      endCoord: coord,
+      startYear: referenceYear - parentTime,
+      endYear: referenceYear - time,
     });
-  });
+  }
 
   events.sort((a, b) => a.endYear - b.endYear);
   appearances.sort((a, b) => a.year - b.year);
@@ -3712,11 +4165,10 @@ function stringifyValue(value) {
   return String(value);
 }
 
-function summarizeTraits(nodes) {
+function summarizeTraits(tree) {
   const summary = new Map();
-  nodes.forEach((node) => {
-    const traits = node.traits || {};
-    Object.entries(traits).forEach(([key, value]) => {
+  tree.traitNames().forEach((key) => {
+    tree.traitValueCounts(key).forEach((count, value) => {
       const normalized = Array.isArray(value) ? value : [value];
       normalized.forEach((entry) => {
         const asString = stringifyValue(entry);
@@ -3724,7 +4176,7 @@ function summarizeTraits(nodes) {
           summary.set(key, new Map());
         }
         const traitMap = summary.get(key);
-        traitMap.set(asString, (traitMap.get(asString) || 0) + 1);
+        traitMap.set(asString, (traitMap.get(asString) || 0) + count);
       });
     });
   });
@@ -3803,10 +4255,9 @@ async function render(forceFetch = true, filename = null) {
     if (needFetch) {
       cachedPayload = await fetchTree(currentFilename);
       cachedFilename = currentFilename;
-      cachedNodeMap = Array.isArray(cachedPayload?.nodes)
-        ? new Map(cachedPayload.nodes.map((node) => [node.id, node]))
-        : new Map();
       traitStatsCache = null;
+      serverTraitSummary = null;
+      serverTraitSummaryRequest = null;
       controlsInitialized = false;
       pauseMigrationAnimation();
       if (metadataState.records.size) {
@@ -3819,7 +4270,7 @@ async function render(forceFetch = true, filename = null) {
     }
 
     if (!controlsInitialized || needFetch) {
-      updateTraitOptions(cachedPayload.nodes || []);
+      updateTraitOptions(cachedPayload);
       if (layoutSelect) {
         layoutSelect.value = vizState.layout;
       }
@@ -4467,6 +4918,7 @@ function updateDiscreteDownloadLinks() {
     [downloadNodesLink, discreteState.exports?.nodes_csv, 'nodes.csv'],
     [downloadEdgesLink, discreteState.exports?.edges_csv, 'edges.csv'],
     [downloadGeojsonLink, discreteState.exports?.map_geojson, 'map.geojson'],
+    [downloadArcsLink, discreteState.exports?.arcs_geojson, 'arcs.geojson'],
     [downloadSummaryLink, discreteState.exports?.summary_md, 'summary.md'],
   ];
   mapping.forEach(([link, href, filename]) => {
@@ -4522,6 +4974,9 @@ async function runDiscreteAnalysis() {
     formData.append('filename', currentFilename);
   }
   formData.append('top_k', `${topK}`);
+  if (pathReconstructionSelect && pathReconstructionSelect.value) {
+    formData.append('reconstruction', pathReconstructionSelect.value);
+  }
   if (supportFileInput && supportFileInput.files && supportFileInput.files.length > 0) {
     formData.append('support_file', supportFileInput.files[0]);
   }
@@ -4561,7 +5016,7 @@ function updateDiscreteControlsAvailability() {
   if (!runDiscreteAnalysisButton) {
     return;
   }
-  const hasTree = Boolean(cachedPayload && Array.isArray(cachedPayload.nodes) && cachedPayload.nodes.length > 0);
+  const hasTree = Boolean(cachedPayload && cachedPayload.size > 0);
   runDiscreteAnalysisButton.disabled = !hasTree;
   if (!hasTree) {
     updateDiscreteDownloadLinks();
@@ -4652,10 +5107,7 @@ if (metadataButton) {
       const result = cachedPayload ? applyMetadataToNodes(cachedPayload) : { matched: 0, columns: [] };
       traitStatsCache = null;
       if (cachedPayload) {
-        cachedNodeMap = Array.isArray(cachedPayload.nodes)
-          ? new Map(cachedPayload.nodes.map((node) => [node.id, node]))
-          : new Map();
-        updateTraitOptions(cachedPayload.nodes || []);
+        updateTraitOptions(cachedPayload);
         renderTree(cachedPayload);
         renderMap(cachedPayload);
         renderTraits(cachedPayload);
@@ -4819,6 +5271,16 @@ if (traitSearchInput) {
 if (traitLimitSelect) {
   traitLimitSelect.addEventListener('change', () => {
     updateTraitSummary();
+    // The server summary lists at most 50 values per trait; "Show all" needs every one.
+    if (
+      cachedPayload &&
+      wantsAllTraitValues() &&
+      !metadataState.appliedColumns.length &&
+      serverTraitSummary?.filename === cachedFilename &&
+      !serverTraitSummary.complete
+    ) {
+      loadServerTraitSummary(cachedFilename, cachedPayload);
+    }
   });
 }
 
@@ -0,0 +1,82 @@
+// Fetches and decodes the binary columnar tree (GET /api/tree?format=binary) off the main thread.
+// The decoded typed-array columns are posted back with their buffer transferred, not copied;
+// main.js wraps them in a TreeColumns view instead of building an object per node.
+// Layout: "MPLT" magic, uint32 version, uint32 header length, JSON header, 8-byte aligned column buffers.
+// See backend/app/services/tree_transport.py for the full description.
+
+const TREE_MAGIC = 'MPLT';
+const TREE_VERSION = 1;
+const TYPED_ARRAYS = {
+  int32: Int32Array,
+  float64: Float64Array,
+};
+
+function decodeTreeBuffer(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(
+    view.getUint8(0),
+    view.getUint8(1),
+    view.getUint8(2),
+    view.getUint8(3),
+  );
+  if (magic !== TREE_MAGIC) {
+    throw new Error('Not a binary tree buffer.');
+  }
+  const version = view.getUint32(4, true);
+  if (version !== TREE_VERSION) {
+    throw new Error(`Unsupported binary tree version ${version}.`);
+  }
+  const headerLength = view.getUint32(8, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+  const bodyOffset = 12 + headerLength;
+
+  const columns = {};
+  header.columns.forEach((column) => {
+    const ArrayType = TYPED_ARRAYS[column.dtype];
+    if (!ArrayType) {
+      throw new Error(`Unsupported column type ${column.dtype}.`);
+    }
+    columns[column.name] = new ArrayType(buffer, bodyOffset + column.offset, column.length);
+  });
+
+  // JSON-encoded dictionaries are parsed once per distinct value, not once per node.
+  const traits = header.traits.map((trait) => ({
+    name: trait.name,
+    kind: trait.kind,
+    column: trait.column,
+    dictionary: trait.kind === 'json'
+      ? trait.dictionary.map((value) => JSON.parse(value))
+      : trait.dictionary || null,
+  }));
+
+  return {
+    buffer,
+    nodeCount: header.node_count,
+    metadata: header.metadata || {},
+    dictionaries: header.dictionaries || {},
+    traits,
+    columns,
+  };
+}
+
+self.addEventListener('message', async (event) => {
+  const { requestId, url } = event.data || {};
+  try {
+    const response = await fetch(url, { headers: { Accept: 'application/vnd.maple.tree' } });
+    if (!response.ok) {
+      let detail = '';
+      try {
+        const data = await response.json();
+        detail = typeof data === 'string' ? data : (data && data.detail) || '';
+      } catch (err) {
+        detail = '';
+      }
+      self.postMessage({ requestId, status: response.status, error: detail || response.statusText });
+      return;
+    }
+    const tree = decodeTreeBuffer(await response.arrayBuffer());
+    self.postMessage({ requestId, status: response.status, tree }, [tree.buffer]);
+  } catch (err) {
+    self.postMessage({ requestId, status: 0, error: err && err.message ? err.message : String(err) });
+  }
+});
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
 import sys
 import threading
@@ -31,35 +32,47 @@ def main() -> None:
     static_dir = _resource_path("frontend/static")
     os.environ.setdefault("MAPLE_STATIC_DIR", str(static_dir))
 
+    # Pre-parse stored trees in the background so the UI's first load is fast.
+    os.environ.setdefault("LOCALPHYLOGEO_WARMUP", "1")
+
     host = os.environ.get("MAPLE_HOST", "127.0.0.1")
     port = int(os.environ.get("MAPLE_PORT", "8000"))
 
     url = f"http://{host}:{port}/"
 
-    def opener() -> None:
-        # Give uvicorn a moment to start before opening the browser.
-        time.sleep(1.0)
-        try:
-            webbrowser.open(url)
-        except Exception:
-            pass
-
-    threading.Thread(target=opener, daemon=True).start()
-
     # IMPORTANT for PyInstaller:
     # Uvicorn can accept an import string ("backend.app.main:app"), but that import
     # happens dynamically at runtime and PyInstaller may not bundle `backend/`.
     # Import the FastAPI app object directly so PyInstaller can discover it.
     from backend.app.main import app as fastapi_app  # noqa: PLC0415
 
-    uvicorn.run(
-        fastapi_app,
-        host=host,
-        port=port,
-        log_level="info",
+    server = uvicorn.Server(
+        uvicorn.Config(
+            fastapi_app,
+            host=host,
+            port=port,
+            log_level="info",
+        )
     )
 
+    def opener() -> None:
+        # Open the browser as soon as uvicorn is accepting connections; give up
+        # if the server shuts down first (e.g. the port is already taken).
+        while not server.started:
+            if server.should_exit:
+                return
+            time.sleep(0.05)
+        try:
+            webbrowser.open(url)
+        except Exception:
+            pass
+
+    threading.Thread(target=opener, daemon=True).start()
+    server.run()
+
 
 if __name__ == "__main__":
+    # Frozen builds must bootstrap process-pool workers (comparison resampling).
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,84 @@
+"""Fail when importing the API gets slow or pulls heavy dependencies in eagerly.
+
+Runs ``python -X importtime -c "import backend.app.main"`` in fresh
+interpreters, takes the fastest cumulative import time of the app module and
+compares it with a budget. It also checks that the modules deferred to first
+use (pandas, Biopython, geopandas, shapely, multiprocessing) are not imported
+at startup.
+
+Usage (from the repository root)::
+
+    python scripts/check_import_time.py [--budget-ms 900] [--runs 3] [--top 15]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TARGET_MODULE = "backend.app.main"
+DEFAULT_BUDGET_MS = 900.0
+DEFERRED_MODULES = ("pandas", "Bio", "geopandas", "shapely", "multiprocessing")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent>\s*)(?P<module>\S+)$")
+
+
+def measure() -> tuple[float, dict[str, int], set[str]]:
+    """Import the app once; return its cumulative ms, per-module cumulative us and loaded top-level modules."""
+
+    probe = (
+        f"import sys, {TARGET_MODULE}; "
+        "print(','.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match["module"]] = int(match["cumulative"])
+    if TARGET_MODULE not in cumulative:
+        raise RuntimeError(f"{TARGET_MODULE} did not appear in the -X importtime output.")
+    loaded = set(completed.stdout.strip().split(","))
+    return cumulative[TARGET_MODULE] / 1000.0, cumulative, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum import time of the app.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to try; the fastest run counts.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list.")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(max(1, args.runs))]
+    elapsed, cumulative, loaded = min(runs, key=lambda run: run[0])
+
+    print(f"{TARGET_MODULE}: {elapsed:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})")
+    print("Slowest imports (cumulative ms):")
+    for module, micros in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {micros / 1000.0:8.1f}  {module}")
+
+    failures = []
+    eager = sorted(set(DEFERRED_MODULES) & loaded)
+    if eager:
+        failures.append(f"deferred modules imported at startup: {', '.join(eager)}")
+    if elapsed > args.budget_ms:
+        failures.append(f"import took {elapsed:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
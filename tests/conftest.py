@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.app.models.tree import TreePayload  # noqa: E402
+from tests.helpers import make_payload  # noqa: E402
+
+
+@pytest.fixture
+def five_node_payload() -> TreePayload:
+    """``R -> (X:1 -> (A:2, B:0.5), C:3)``."""
+
+    return make_payload(
+        [
+            ("R", None, 0.0, "R", {}),
+            ("X", "R", 1.0, "X", {}),
+            ("A", "X", 2.0, "A", {}),
+            ("B", "X", 0.5, "B", {}),
+            ("C", "R", 3.0, "C", {}),
+        ]
+    )
@@ -0,0 +1,50 @@
+"""Builders of small hand-checkable trees shared by the test modules."""
+
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+from backend.app.models.tree import TreeEdge, TreeMetadata, TreeNode, TreePayload
+
+# (id, parent id, branch length, label, traits); parents must precede their children.
+NodeSpec = tuple[str, Optional[str], float, Optional[str], dict[str, Any]]
+
+
+def make_payload(spec: Sequence[NodeSpec]) -> TreePayload:
+    """Build a TreePayload whose times are the summed branch lengths of ``spec``."""
+
+    times: dict[str, float] = {}
+    for node_id, parent_id, length, _, _ in spec:
+        times[node_id] = 0.0 if parent_id is None else times[parent_id] + length
+    latest = max(times.values())
+    nodes = [
+        TreeNode(
+            id=node_id,
+            label=label,
+            parent_id=parent_id,
+            branch_length=None if parent_id is None else length,
+            time_from_root=times[node_id],
+            time_before_present=latest - times[node_id],
+            traits=traits,
+        )
+        for node_id, parent_id, length, label, traits in spec
+    ]
+    edges = [TreeEdge(parent_id=parent_id, child_id=node_id) for node_id, parent_id, *_ in spec if parent_id]
+    tip_count = len({node.id for node in nodes} - {edge.parent_id for edge in edges})
+    return TreePayload(nodes=nodes, edges=edges, metadata=TreeMetadata(tip_count=tip_count))
+
+
+def quartet(first: tuple[str, str], second: tuple[str, str], lengths: Sequence[float] = (1.0,) * 6) -> TreePayload:
+    """Rooted four-taxon tree ``((first), (second))`` with branch lengths in node order."""
+
+    return make_payload(
+        [
+            ("root", None, 0.0, None, {}),
+            ("left", "root", lengths[0], None, {}),
+            ("right", "root", lengths[1], None, {}),
+            ("t1", "left", lengths[2], first[0], {}),
+            ("t2", "left", lengths[3], first[1], {}),
+            ("t3", "right", lengths[4], second[0], {}),
+            ("t4", "right", lengths[5], second[1], {}),
+        ]
+    )
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.app.services.admission import AdmissionController, OverBudgetError, ServerBusyError
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.001)
+
+
+class _Job(threading.Thread):
+    """Run ``controller.admit`` on a thread and hold the slot until released."""
+
+    def __init__(self, controller: AdmissionController, estimate: int, log: list) -> None:
+        super().__init__(daemon=True)
+        self.controller = controller
+        self.estimate = estimate
+        self.log = log
+        self.admitted = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+
+    def run(self) -> None:
+        try:
+            with self.controller.admit(self.estimate, f"job of {self.estimate}"):
+                self.log.append(self.estimate)
+                self.admitted.set()
+                self.release.wait(5)
+        except Exception as exc:  # noqa: BLE001 - inspected by the test
+            self.error = exc
+
+
+def test_estimate_over_budget_is_rejected_up_front():
+    controller = AdmissionController(max_concurrent=2, memory_budget=100, queue_timeout=1.0)
+
+    with pytest.raises(OverBudgetError, match="memory budget"):
+        controller.check(101, "parse")
+    with pytest.raises(OverBudgetError):
+        with controller.admit(101, "parse"):
+            pass
+    controller.check(100, "parse")
+
+    assert controller.stats()["rejected"] == 2
+    assert controller.stats()["admitted"] == 0
+
+
+def test_zero_budget_disables_the_memory_check():
+    controller = AdmissionController(max_concurrent=1, memory_budget=0, queue_timeout=1.0)
+
+    with controller.admit(10**12, "parse"):
+        assert controller.stats()["reserved_bytes"] == 10**12
+    assert controller.stats()["reserved_bytes"] == 0
+
+
+def test_second_job_waits_for_the_slot():
+    controller = AdmissionController(max_concurrent=1, memory_budget=0, queue_timeout=5.0)
+    log: list = []
+    first, second = _Job(controller, 1, log), _Job(controller, 2, log)
+
+    first.start()
+    assert first.admitted.wait(5)
+    second.start()
+    _wait_for(lambda: controller.stats()["queued"] == 1)
+    assert not second.admitted.is_set()
+
+    first.release.set()
+    assert second.admitted.wait(5)
+    second.release.set()
+    for job in (first, second):
+        job.join(5)
+
+    assert log == [1, 2]
+    assert controller.stats()["running"] == 0
+    assert controller.stats()["admitted"] == 2
+
+
+def test_queue_timeout_raises_server_busy():
+    controller = AdmissionController(max_concurrent=1, memory_budget=0, queue_timeout=0.05)
+
+    with controller.admit(1, "parse"):
+        with pytest.raises(ServerBusyError) as info:
+            with controller.admit(1, "analysis"):
+                pass
+
+    assert "analysis" in str(info.value)
+    assert info.value.retry_after == 1
+    stats = controller.stats()
+    assert (stats["timed_out"], stats["queued"], stats["running"]) == (1, 0, 0)
+
+
+def test_large_waiter_is_not_overtaken_by_later_small_jobs():
+    controller = AdmissionController(max_concurrent=2, memory_budget=100, queue_timeout=5.0)
+    log: list = []
+    holder, large, small = _Job(controller, 60, log), _Job(controller, 80, log), _Job(controller, 10, log)
+
+    holder.start()
+    assert holder.admitted.wait(5)
+    large.start()
+    _wait_for(lambda: controller.stats()["queued"] == 1)
+    small.start()
+    _wait_for(lambda: controller.stats()["queued"] == 2)
+    # The small job would fit next to the holder, but the large one is ahead of it.
+    time.sleep(0.05)
+    assert not small.admitted.is_set()
+
+    holder.release.set()
+    assert large.admitted.wait(5)
+    assert small.admitted.wait(5)
+    for job in (large, small):
+        job.release.set()
+    for job in (holder, large, small):
+        job.join(5)
+        assert job.error is None
+
+    assert log == [60, 80, 10]
+    assert controller.stats()["reserved_bytes"] == 0
+
+
+def test_errors_map_to_413_and_503_with_retry_after():
+    from backend.app.main import over_budget_handler, server_busy_handler
+
+    over = asyncio.run(over_budget_handler(None, OverBudgetError("too big")))
+    busy = asyncio.run(server_busy_handler(None, ServerBusyError("busy", retry_after=7)))
+
+    assert over.status_code == 413
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "7"
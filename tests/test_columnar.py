@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend.app.services import columnar
+from backend.app.services.columnar import StringColumn, StringIndex, build_trait_columns
+from backend.app.services.shared_cache import SharedCache
+from backend.app.services.tree_service import CachedTree
+from tests.helpers import make_payload
+
+TRAITS = {
+    "R": {"height": 0.5, "count": 3, "location": "Zürich", "location.set": ["A", "B"], "flag": True},
+    "A": {"height": 1.5, "location": "Bern", "mixed": 1},
+    "B": {"count": 7, "mixed": "x", "location.set.prob": [0.25, 0.75]},
+}
+
+
+@pytest.fixture
+def payload():
+    return make_payload(
+        [
+            ("R", None, 0.0, None, TRAITS["R"]),
+            ("A", "R", 1.0, "tip α", TRAITS["A"]),
+            ("B", "R", 2.0, "", TRAITS["B"]),
+        ]
+    )
+
+
+def test_string_column_round_trips_missing_and_unicode_entries():
+    values = ["n1", None, "", "tip α", "Zürich"]
+    column = StringColumn.from_strings(values)
+
+    assert list(column) == values
+    assert [column[position] for position in range(len(values))] == values
+    assert column[-1] == "Zürich"
+    with pytest.raises(IndexError):
+        column[len(values)]
+
+
+def test_string_index_finds_positions_by_binary_search():
+    ids = ["n10", "n2", "root", "n1"]
+    column = StringColumn.from_strings(ids)
+    index = StringIndex(column=column, order=StringIndex.sort_order(ids))
+
+    assert {node_id: index[node_id] for node_id in ids} == {"n10": 0, "n2": 1, "root": 2, "n1": 3}
+    assert index.get("n3") is None
+    assert "root" in index and "zzz" not in index
+
+
+def test_trait_columns_decode_to_the_original_traits(payload):
+    traits = build_trait_columns(payload)
+
+    assert [traits.columns[name].kind for name in ("height", "count", "location", "flag", "mixed")] == [
+        "float",
+        "integer",
+        "categorical",
+        "json",
+        "json",
+    ]
+    assert list(traits.rows()) == [node.traits for node in payload.nodes]
+    assert [traits.row(position) for position in range(traits.size)] == [node.traits for node in payload.nodes]
+    assert traits.columns["count"].present().tolist() == [0, 2]
+
+
+def test_workers_attach_to_shared_columns_without_the_payload(payload, tmp_path, monkeypatch):
+    shared = SharedCache(tmp_path / "cache", max_bytes=1 << 30)
+    monkeypatch.setattr(columnar, "get_shared_cache", lambda: shared)
+    signature = ("tree", 1, 1)
+    first = CachedTree(path=Path("tree"), signature=signature, _payload=payload)
+    built = columnar.get_columnar_tree(first)
+    columnar.get_trait_columns(first)
+
+    second = CachedTree(path=Path("tree"), signature=signature)
+    attached = columnar.get_columnar_tree(second)
+    traits = columnar.get_trait_columns(second)
+
+    assert isinstance(attached.parent, np.memmap)
+    assert list(attached.ids) == built.ids
+    assert list(attached.labels) == built.labels
+    assert {node_id: attached.index[node_id] for node_id in built.ids} == built.index
+    assert attached.root == built.root
+    assert list(traits.rows()) == [node.traits for node in payload.nodes]
+    assert second._payload is None
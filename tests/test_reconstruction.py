@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import itertools
+import math
+
+import pytest
+
+from backend.app.services.columnar import build_columnar_tree
+from backend.app.services.reconstruction import reconstruct_states
+from tests.helpers import make_payload
+
+# Tip branch lengths and the internal branch of R -> (A:1.0, Y:0.5 -> (B:0.8, C:1.2)).
+LENGTHS = {"A": 1.0, "Y": 0.5, "B": 0.8, "C": 1.2}
+
+
+@pytest.fixture
+def tree():
+    payload = make_payload(
+        [
+            ("R", None, 0.0, None, {}),
+            ("A", "R", LENGTHS["A"], "A", {}),
+            ("Y", "R", LENGTHS["Y"], None, {}),
+            ("B", "Y", LENGTHS["B"], "B", {}),
+            ("C", "Y", LENGTHS["C"], "C", {}),
+        ]
+    )
+    return build_columnar_tree(payload)
+
+
+def _observations(tree, by_id):
+    return [by_id.get(node_id) for node_id in tree.ids]
+
+
+def _brute_force(observed, states, rate):
+    """Enumerate root and internal states of the three-tip tree under symmetric Mk."""
+
+    size = len(states)
+    decay = rate * size / (size - 1)
+
+    def transition(start, end, length):
+        keep = math.exp(-decay * length)
+        return keep * (start == end) + (1.0 - keep) / size
+
+    def evidence(node, state):
+        distribution = observed.get(node)
+        return distribution.get(states[state], 0.0) if distribution else 1.0
+
+    joint = {}
+    for root, internal in itertools.product(range(size), repeat=2):
+        joint[root, internal] = (
+            evidence("R", root)
+            * evidence("Y", internal)
+            * sum(transition(root, tip, LENGTHS["A"]) * evidence("A", tip) for tip in range(size))
+            * transition(root, internal, LENGTHS["Y"])
+            * sum(transition(internal, tip, LENGTHS["B"]) * evidence("B", tip) for tip in range(size))
+            * sum(transition(internal, tip, LENGTHS["C"]) * evidence("C", tip) for tip in range(size))
+            / size
+        )
+    total = sum(joint.values())
+    root = [sum(joint[state, other] for other in range(size)) / total for state in range(size)]
+    internal = [sum(joint[other, state] for other in range(size)) / total for state in range(size)]
+    return math.log(total), root, internal
+
+
+@pytest.mark.parametrize(
+    "observed",
+    [
+        {"A": {"X": 1.0}, "B": {"Y": 1.0}, "C": {"Z": 1.0}},
+        {"A": {"X": 0.6, "Y": 0.4}, "B": {"Y": 1.0}, "C": {"Y": 1.0}},
+        {"A": {"X": 1.0}, "B": {"Y": 1.0}, "C": {"Z": 1.0}, "Y": {"Y": 0.9, "Z": 0.1}},
+    ],
+)
+def test_ml_matches_brute_force_enumeration(tree, observed):
+    rate = 0.7
+    result = reconstruct_states(tree, _observations(tree, observed), method="ml", rate=rate, min_probability=0.0)
+
+    states = sorted({state for distribution in observed.values() for state in distribution})
+    log_likelihood, root, internal = _brute_force(observed, states, rate)
+    assert result.states == states
+    assert result.log_likelihood == pytest.approx(log_likelihood, rel=1e-9)
+    root_distribution = result.distributions[tree.index["R"]]
+    assert [root_distribution.get(state, 0.0) for state in states] == pytest.approx(root, abs=1e-9)
+    if "Y" in observed:
+        # Annotated internal nodes keep their own distribution.
+        assert result.distributions[tree.index["Y"]] == observed["Y"]
+        assert not result.inferred[tree.index["Y"]]
+    else:
+        internal_distribution = result.distributions[tree.index["Y"]]
+        assert [internal_distribution.get(state, 0.0) for state in states] == pytest.approx(internal, abs=1e-9)
+
+
+def test_parsimony_picks_the_majority_state(tree):
+    observed = {"A": {"X": 1.0}, "B": {"Y": 1.0}, "C": {"Y": 1.0}}
+
+    result = reconstruct_states(tree, _observations(tree, observed), method="parsimony")
+
+    assert result.parsimony_score == 1
+    assert result.distributions[tree.index["Y"]] == {"Y": 1.0}
+    # X and Y at the root both cost one change.
+    assert result.distributions[tree.index["R"]] in ({"X": 1.0}, {"Y": 1.0})
+    assert result.inferred.tolist() == [True, False, True, False, False]
+
+
+def test_parsimony_score_counts_changes(tree):
+    observed = {"A": {"X": 1.0}, "B": {"Y": 1.0}, "C": {"Z": 1.0}}
+
+    result = reconstruct_states(tree, _observations(tree, observed), method="parsimony")
+
+    assert result.parsimony_score == 2
+    internal = next(iter(result.distributions[tree.index["Y"]]))
+    assert internal in {"Y", "Z"}
+
+
+def test_conflicting_internal_annotation_charges_every_child(tree):
+    observed = {"A": {"Y": 1.0}, "B": {"Y": 1.0}, "C": {"Y": 1.0}, "Y": {"Z": 1.0}}
+
+    result = reconstruct_states(tree, _observations(tree, observed), method="parsimony")
+
+    # Z at the annotated node differs from both of its children and from A or the root.
+    assert result.parsimony_score == 3
+    assert result.distributions[tree.index["Y"]] == {"Z": 1.0}
+
+
+def test_rejects_unknown_method(tree):
+    with pytest.raises(ValueError):
+        reconstruct_states(tree, [None] * tree.size, method="bayes")
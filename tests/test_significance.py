@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.app.models.discrete import DiscreteComparisonResult, PathDifference, TreeComparisonSummary
+from backend.app.services import significance
+from backend.app.services.significance import PathSignificanceService, build_contribution_table
+
+PATHS = [("A", "B"), ("B", "C")]
+
+
+def _comparison(tree_count: int = 2) -> DiscreteComparisonResult:
+    return DiscreteComparisonResult(
+        trees=[TreeComparisonSummary(label=f"tree {index}", analysis_id=str(index)) for index in range(tree_count)],
+        path_differences=[PathDifference(src=src, dst=dst) for src, dst in PATHS],
+    )
+
+
+def _branch_weights(branches: int = 6, tree_count: int = 2, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return [
+        [{path: float(rng.uniform(0.0, 1.0)) for path in PATHS if rng.uniform() < 0.7} for _ in range(branches)]
+        for _ in range(tree_count)
+    ]
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Twelve pooled branches and BATCH_ELEMENTS=36 give batches of three resamples.
+    monkeypatch.setattr(significance, "BATCH_ELEMENTS", 36)
+    return 3
+
+
+def test_contribution_table_keeps_every_branch_on_the_pooled_axis():
+    weights = [[{PATHS[0]: 1.0}, {}], [{PATHS[1]: 2.0, ("X", "Y"): 5.0}]]
+
+    table = build_contribution_table(weights, PATHS)
+
+    assert table.rows.tolist() == [0, 2]
+    assert table.groups.tolist() == [0, 0, 1]
+    assert table.matrix.tolist() == [[1.0, 0.0], [0.0, 2.0]]
+    assert table.group_sums().tolist() == [[1.0, 0.0], [0.0, 2.0]]
+
+
+def test_permutation_p_values_count_resamples_at_least_as_extreme(monkeypatch):
+    weights = [[{PATHS[0]: 3.0, PATHS[1]: 1.0}], [{PATHS[0]: 1.0, PATHS[1]: 1.0}]]
+    # Observed deltas are 2.0 and 0.0.
+    deltas = np.array([[1.0, 0.0], [2.0, 0.5], [2.5, 0.0], [0.5, 0.0]])
+    service = PathSignificanceService(max_workers=1)
+    monkeypatch.setattr(service, "_run", lambda *args: (deltas, False))
+
+    result = service.annotate(_comparison(), weights, method="permutation", resamples=4)
+
+    # (exceeding + 1) / (completed + 1)
+    assert [difference.p_value for difference in result.path_differences] == pytest.approx([3 / 5, 5 / 5])
+    assert result.significance.resamples_completed == 4
+    assert not result.significance.truncated
+
+
+def test_bootstrap_intervals_are_central_quantiles(monkeypatch):
+    deltas = np.column_stack([np.arange(101, dtype=float), np.arange(101, dtype=float) * 2.0])
+    service = PathSignificanceService(max_workers=1)
+    monkeypatch.setattr(service, "_run", lambda *args: (deltas, False))
+
+    result = service.annotate(_comparison(), _branch_weights(), method="bootstrap", resamples=101, confidence=0.9)
+
+    first, second = result.path_differences
+    assert (first.ci_low, first.ci_high) == pytest.approx((5.0, 95.0))
+    assert (second.ci_low, second.ci_high) == pytest.approx((10.0, 190.0))
+    assert first.p_value is None
+
+
+def test_same_seed_gives_identical_results():
+    weights = _branch_weights()
+    service = PathSignificanceService(max_workers=1)
+
+    first = service.annotate(_comparison(), weights, resamples=200, seed=7)
+    second = service.annotate(_comparison(), weights, resamples=200, seed=7)
+    other = service.annotate(_comparison(), weights, method="bootstrap", resamples=200, seed=8)
+
+    assert [d.p_value for d in first.path_differences] == [d.p_value for d in second.path_differences]
+    assert all(0.0 < d.p_value <= 1.0 for d in first.path_differences)
+    assert all(d.ci_low <= d.ci_high for d in other.path_differences)
+
+
+@pytest.mark.parametrize("method", ["permutation", "bootstrap"])
+def test_exhausted_budget_keeps_a_prefix_of_the_full_run(small_batches, method):
+    table = build_contribution_table(_branch_weights(), PATHS)
+    service = PathSignificanceService(max_workers=1)
+
+    full, full_truncated = service._run(method, table, 10, 3, time_budget=60.0)
+    partial, truncated = service._run(method, table, 10, 3, time_budget=0.0)
+
+    assert full.shape == (10, len(PATHS)) and not full_truncated
+    # The first batch always runs; nothing after it fits in a zero budget.
+    assert truncated
+    assert partial.shape[0] == small_batches
+    np.testing.assert_array_equal(partial, full[: partial.shape[0]])
+
+
+def test_truncated_summary_reports_completed_resamples(small_batches):
+    service = PathSignificanceService(max_workers=1)
+
+    result = service.annotate(_comparison(), _branch_weights(), resamples=10, time_budget=0.0)
+
+    summary = result.significance
+    assert summary.truncated
+    assert (summary.resamples_requested, summary.resamples_completed) == (10, small_batches)
+    assert all(d.p_value >= 1 / (small_batches + 1) for d in result.path_differences)
+
+
+@pytest.mark.parametrize("method", ["permutation", "bootstrap"])
+def test_pool_matches_inline_run_for_the_same_seed(monkeypatch, small_batches, method):
+    monkeypatch.setattr(significance, "INLINE_WORK_LIMIT", 0)
+    table = build_contribution_table(_branch_weights(), PATHS)
+    inline = PathSignificanceService(max_workers=1)
+    pooled = PathSignificanceService(max_workers=2)
+    try:
+        expected, _ = inline._run(method, table, 10, 5, time_budget=60.0)
+        actual, truncated = pooled._run(method, table, 10, 5, time_budget=60.0)
+        partial, _ = pooled._run(method, table, 10, 5, time_budget=0.0)
+        assert pooled._executor is not None
+    finally:
+        pooled.shutdown()
+
+    assert not truncated
+    np.testing.assert_array_equal(actual, expected)
+    # Batches of 3, 3, 3 and 1: a truncated pooled run stops on a batch boundary.
+    assert partial.shape[0] in (3, 6, 9, 10)
+    np.testing.assert_array_equal(partial, expected[: partial.shape[0]])
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.app.services.single_flight import SingleFlight, get_single_flight, single_flight_stats
+
+CALLERS = 8
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.001)
+
+
+def _run_concurrently(group: SingleFlight, key, fn, release: threading.Event):
+    """Start ``CALLERS`` calls of ``group.do(key, fn)`` and release ``fn`` once all have joined."""
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(group.do, key, fn) for _ in range(CALLERS)]
+        _wait_for(lambda: group.stats()["coalesced"] >= CALLERS - 1)
+        release.set()
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result(timeout=5))
+            except Exception as exc:  # noqa: BLE001 - collected for the assertions
+                outcomes.append(exc)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_execution():
+    group = SingleFlight("test")
+    release = threading.Event()
+    invocations = []
+
+    def compute():
+        invocations.append(threading.get_ident())
+        release.wait(5)
+        return object()
+
+    results = _run_concurrently(group, "key", compute, release)
+
+    assert len(invocations) == 1
+    assert all(result is results[0] for result in results)
+    assert group.stats() == {"executed": 1, "coalesced": CALLERS - 1, "in_flight": 0}
+
+
+def test_exception_is_raised_in_every_waiter():
+    group = SingleFlight("test")
+    release = threading.Event()
+    invocations = []
+
+    def fail():
+        invocations.append(1)
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    outcomes = _run_concurrently(group, "key", fail, release)
+
+    assert len(invocations) == 1
+    assert len(outcomes) == CALLERS
+    assert all(isinstance(outcome, RuntimeError) and str(outcome) == "boom" for outcome in outcomes)
+    assert group.stats()["in_flight"] == 0
+
+
+def test_key_is_released_after_the_call():
+    group = SingleFlight("test")
+    invocations = []
+
+    def compute():
+        invocations.append(1)
+        return len(invocations)
+
+    assert group.do("key", compute) == 1
+    assert group.do("key", compute) == 2
+    with pytest.raises(ValueError):
+        group.do("key", lambda: int("x"))
+    assert group.do("key", compute) == 3
+    assert group.stats() == {"executed": 4, "coalesced": 0, "in_flight": 0}
+
+
+def test_different_keys_run_independently():
+    group = SingleFlight("test")
+    release = threading.Event()
+    started = threading.Barrier(2, timeout=5)
+
+    def compute(value):
+        started.wait()
+        release.wait(5)
+        return value
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(group.do, "a", lambda: compute(1))
+        second = pool.submit(group.do, "b", lambda: compute(2))
+        # Both leaders reach the barrier only if neither waits on the other.
+        _wait_for(lambda: group.stats()["in_flight"] == 2)
+        release.set()
+        assert (first.result(timeout=5), second.result(timeout=5)) == (1, 2)
+
+    assert group.stats() == {"executed": 2, "coalesced": 0, "in_flight": 0}
+
+
+def test_named_groups_are_process_wide():
+    group = get_single_flight("test_named_groups")
+
+    assert get_single_flight("test_named_groups") is group
+    group.do("key", lambda: None)
+    assert single_flight_stats()["test_named_groups"] == {"executed": 1, "coalesced": 0, "in_flight": 0}
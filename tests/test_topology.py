@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.app.services.columnar import build_columnar_tree
+from backend.app.services.topology import TopologyComparisonService, build_clade_table
+from tests.helpers import make_payload, quartet
+
+
+def _quartet_table(first, second, **kwargs):
+    return build_clade_table(build_columnar_tree(quartet(first, second, **kwargs)))
+
+
+def test_clade_bitsets_follow_sorted_tip_labels():
+    table = _quartet_table(("B", "A"), ("D", "C"))
+
+    assert table.tips == ("A", "B", "C", "D")
+    # A=1, B=2, C=4, D=8; the root clade (15) is left out.
+    assert set(table.clades) == {1, 2, 4, 8, 0b0011, 0b1100}
+    assert table.internal_count == 2
+
+
+def test_identical_trees_have_zero_distance():
+    tables = [_quartet_table(("A", "B"), ("C", "D")) for _ in range(2)]
+
+    result = TopologyComparisonService().compare(tables)
+
+    assert result.clade_counts == [2, 2]
+    assert result.robinson_foulds == [[0, 0], [0, 0]]
+    assert result.normalized_robinson_foulds == [[0.0, 0.0], [0.0, 0.0]]
+    assert result.weighted_robinson_foulds == [[0.0, 0.0], [0.0, 0.0]]
+
+
+def test_trees_without_shared_clades_have_maximal_distance():
+    first = _quartet_table(("A", "B"), ("C", "D"))
+    second = _quartet_table(("A", "C"), ("B", "D"))
+
+    result = TopologyComparisonService().compare([first, second])
+
+    # {A,B} and {C,D} against {A,C} and {B,D}: all four clades are unmatched.
+    assert result.robinson_foulds == [[0, 4], [4, 0]]
+    assert result.normalized_robinson_foulds[0][1] == 1.0
+    # Both internal clades of length 1 differ on each side; the pendant branches match.
+    assert result.weighted_robinson_foulds[0][1] == pytest.approx(4.0)
+
+
+def test_weighted_distance_sums_branch_length_differences():
+    first = _quartet_table(("A", "B"), ("C", "D"), lengths=(1.0, 1.0, 1.0, 1.0, 1.0, 1.0))
+    second = _quartet_table(("A", "B"), ("C", "D"), lengths=(1.5, 1.0, 1.0, 3.0, 1.0, 0.25))
+
+    result = TopologyComparisonService().compare([first, second])
+
+    assert result.robinson_foulds[0][1] == 0
+    # |1 - 1.5| for {A,B}, |1 - 3| for B and |1 - 0.25| for D.
+    assert result.weighted_robinson_foulds[0][1] == pytest.approx(0.5 + 2.0 + 0.75)
+
+
+def test_different_tip_sets_are_rejected():
+    first = _quartet_table(("A", "B"), ("C", "D"))
+    second = _quartet_table(("A", "B"), ("C", "E"))
+
+    with pytest.raises(ValueError, match="tip set"):
+        TopologyComparisonService().compare([first, second])
+
+
+def test_unary_nodes_add_their_branches():
+    payload = make_payload(
+        [
+            ("root", None, 0.0, None, {}),
+            ("x", "root", 1.0, None, {}),
+            ("y", "x", 0.5, None, {}),
+            ("a", "y", 1.0, "A", {}),
+            ("b", "y", 1.0, "B", {}),
+            ("c", "root", 2.0, "C", {}),
+        ]
+    )
+
+    table = build_clade_table(build_columnar_tree(payload))
+
+    assert table.clades[0b011] == pytest.approx(1.5)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.app.services.columnar import build_columnar_tree
+from backend.app.services.tree_index import build_tree_index
+
+
+@pytest.fixture
+def index(five_node_payload):
+    return build_tree_index(build_columnar_tree(five_node_payload))
+
+
+def test_lca_and_mrca(index):
+    r, x, a, b, c = (index.resolve(name) for name in "RXABC")
+
+    assert index.lca(a, b) == x
+    assert index.lca(b, a) == x
+    assert index.lca(a, c) == r
+    assert index.lca(x, a) == x
+    assert index.lca(a, a) == a
+    assert index.mrca([a, b]) == x
+    assert index.mrca([b, c, a]) == r
+    assert index.mrca([c]) == c
+
+
+def test_patristic_distance(index):
+    r, x, a, b, c = (index.resolve(name) for name in "RXABC")
+
+    assert index.patristic_distance(a, b) == pytest.approx(2.5)
+    assert index.patristic_distance(a, c) == pytest.approx(6.0)
+    assert index.patristic_distance(x, c) == pytest.approx(4.0)
+    assert index.patristic_distance(r, b) == pytest.approx(1.5)
+    assert index.patristic_distance(a, a) == 0.0
+
+
+def test_ancestry_and_descendant_tips(index):
+    r, x, a, b, c = (index.resolve(name) for name in "RXABC")
+
+    assert index.is_ancestor(r, a)
+    assert index.is_ancestor(x, b)
+    assert not index.is_ancestor(a, x)
+    assert not index.is_ancestor(x, c)
+    assert not index.is_ancestor(x, x)
+    assert index.descendant_tips(x).tolist() == [a, b]
+    assert index.descendant_tips(r).tolist() == [a, b, c]
+    assert index.descendant_tip_count(c) == 1
+
+
+def test_postorder_rank_matches_a_traversal(index):
+    # Children in file order: A, B, X, C, R.
+    expected = [index.resolve(name) for name in "ABXCR"]
+
+    assert sorted(range(len(expected)), key=lambda position: index.postorder_rank[position]) == expected
+
+
+def test_unknown_reference(index):
+    with pytest.raises(KeyError):
+        index.resolve("nope")